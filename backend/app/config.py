@@ -1,5 +1,6 @@
 import os
-from typing import Optional
+from typing import Any, Optional
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -24,7 +25,114 @@ class Settings(BaseSettings):
     # Ollama Settings
     ollama_base_url: str = "http://ollama:11434"
     ollama_model: str = "llama3.2"
-    ollama_timeout: int = 300
+    ollama_timeout: int = 300  # Upper bound for a single Ollama call; the request deadline may cut it shorter
+    ollama_health_timeout: float = 5.0
+    
+    # Deadline Settings
+    request_timeout_default: float = 120.0  # Seconds per request; clients may send X-Request-Timeout
+    request_timeout_max: float = 900.0  # Caps client timeouts; route defaults may not exceed it
+    request_timeout_routes: dict[str, float] = {
+        "/api/v1/agent": 300.0,
+        "/api/v1/agent/stream": 300.0,
+        "/api/v1/agent/jobs": 900.0  # Measured from submission, so it includes time spent queued
+    }
+    
+    # Model Router Settings
+    model_routing_mode: str = "off"  # "off", "shadow" (log and count decisions only) or "on"
+    # Tried in order, cheapest first; requests no tier fits use ollama_model
+    model_router_tiers: list[dict[str, Any]] = [
+        {"name": "small", "model": "llama3.2:1b", "max_prompt_tokens": 256, "max_history_messages": 4, "tools": False}
+    ]
+    
+    # Model Comparison Settings
+    compare_max_models: int = 4  # Models per /api/v1/chat/compare request
+    compare_max_concurrency: int = 2  # Generations all comparisons may run at once; the rest wait for a slot
+    
+    # Circuit Breaker Settings
+    circuit_breaker_failure_threshold: int = 3  # Consecutive failures before a generation path is skipped
+    circuit_breaker_recovery_timeout: float = 30.0  # Seconds before a skipped path is probed again
+    generation_retries: int = 2  # Retries per path, only when Ollama never started the generation
+    generation_retry_backoff: float = 0.2  # Base seconds, doubled per retry with full jitter
+    
+    # Compression Settings
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # Bytes; smaller responses are sent uncompressed
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # Used when the optional brotli package is installed
+    
+    # Rate Limit Settings
+    rate_limit_enabled: bool = False
+    rate_limit_requests_per_minute: float = 60.0
+    rate_limit_burst: int = 20
+    rate_limit_tokens_per_minute: int = 20000  # Generated (eval_count) tokens; 0 disables the token budget
+    rate_limit_backend: str = "memory"  # "memory" (per worker) or "sqlite" (shared by all workers on the host)
+    rate_limit_sqlite_path: str = "data/rate_limits.db"
+    rate_limit_trust_forwarded: bool = False  # Key anonymous clients by X-Real-IP / last X-Forwarded-For hop (behind nginx)
+    rate_limit_api_keys: list[str] = []  # API keys with their own budget; other clients are keyed by IP
+    rate_limit_paths: list[str] = [
+        "/api/v1/chat", "/api/v1/chat/stream", "/api/v1/chat/compare", "/api/v1/ask", "/api/v1/agent", "/api/v1/agent/stream", "/api/v1/agent/jobs",
+        "/api/v1/documents", "/api/v1/documents/search", "/api/v1/embeddings", "/api/v1/ws"
+    ]
+    
+    # Retrieval (RAG) Settings
+    rag_index_path: str = "data/rag"  # Directory holding the memory-mapped vectors and chunk metadata
+    rag_embedding_model: str = "nomic-embed-text"
+    rag_chunk_size: int = 1000  # Characters per chunk
+    rag_chunk_overlap: int = 200
+    rag_embed_batch_size: int = 32  # Chunks per Ollama /api/embed call
+    rag_top_k: int = 4
+    rag_ivf_threshold: int = 50000  # Vectors before search switches from exact to partitioned (IVF)
+    rag_ivf_probes: int = 8  # Partitions scanned per query once partitioned
+    
+    # Embedding Settings
+    embedding_cache_size: int = 50000  # Vectors kept in the LRU cache (packed float32)
+    embedding_batch_window_ms: float = 5.0  # How long concurrent inputs are collected into one upstream call
+    embedding_max_batch_size: int = 64  # Inputs per upstream call; a full batch is sent immediately
+    embedding_max_inputs: int = 512  # Inputs per request
+    
+    # Conversation Memory Settings
+    conversation_max_messages: int = 1000  # Older messages are dropped once a conversation holds this many
+    conversation_prompt_messages: int = 20  # Newest messages sent as chat history with each prompt
+    
+    # Conversation Snapshot Settings
+    conversation_snapshot_enabled: bool = False  # Snapshot conversations on shutdown and restore them on startup
+    conversation_snapshot_path: str = "data/conversations.ndjson"  # An .idx sidecar is written next to it
+    
+    # WebSocket Settings
+    ws_max_streams: int = 4  # Concurrent chat streams per connection
+    ws_send_queue_size: int = 64  # Outgoing frames buffered per connection before streams wait for the client
+    
+    # Idempotency Settings
+    idempotency_enabled: bool = True  # Honour Idempotency-Key headers on idempotency_paths
+    idempotency_ttl: int = 3600  # Seconds a completed response is replayed for
+    idempotency_max_entries: int = 10000
+    idempotency_paths: list[str] = [
+        "/api/v1/chat", "/api/v1/agent", "/api/v1/agent/jobs", "/api/v1/embeddings", "/api/v1/documents"
+    ]
+    
+    # Usage Accounting Settings
+    usage_enabled: bool = True  # Record prompt/completion tokens and time per client and model
+    usage_db_path: str = "data/usage.db"
+    usage_flush_interval: float = 10.0  # Seconds between batched writes of the in-memory totals
+    
+    # Agent Job Settings
+    agent_job_workers: int = 4
+    agent_job_queue_size: int = 100
+    agent_job_result_ttl: int = 3600
+    
+    # Admin Settings
+    admin_api_key: Optional[str] = None  # Admin endpoints are disabled when unset
+    
+    # Runtime Configuration Settings
+    config_reload_path: Optional[str] = None  # JSON file of setting overrides, applied whenever it changes
+    config_reload_interval: float = 5.0  # Seconds between checks of config_reload_path
+    
+    # Profiling Settings
+    profiling_enabled: bool = False
+    profiling_mode: str = "sampler"  # "sampler" (collapsed stacks) or "cprofile" (pstats)
+    profiling_sample_rate: int = 0  # Profile 1 in N requests; 0 profiles only on X-Profile: 1
+    profiling_sample_interval_ms: float = 5.0
+    profiling_buffer_size: int = 20
     
     # LangChain Settings
     langchain_verbose: bool = False
@@ -32,12 +140,29 @@ class Settings(BaseSettings):
     
     # Logging Settings
     log_level: str = "INFO"
+    slow_request_threshold: float = 5.0  # Seconds; slower requests log their timing breakdown
     log_format: str = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+    log_json: bool = False
+    # Fraction of successful requests logged per path (errors are always logged)
+    log_sample_rates: dict[str, float] = {"/ping": 0.0, "/api/v1/health": 0.0, "/metrics": 0.0}
+    
+    @model_validator(mode="after")
+    def check_route_timeouts(self) -> "Settings":
+        """Route defaults above the cap would be silently cut to it."""
+        too_long = sorted(path for path, budget in self.request_timeout_routes.items() if budget > self.request_timeout_max)
+        if too_long:
+            raise ValueError(
+                f"request_timeout_routes for {', '.join(too_long)} exceed request_timeout_max ({self.request_timeout_max}s)"
+            )
+        return self
     
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
+        # Allow the model_routing_mode / model_router_tiers fields without
+        # pydantic warning about its own model_ namespace
+        protected_namespaces = ("settings_",)
 
 
 # Global settings instance
@@ -1,19 +1,71 @@
 import sys
+import asyncio
+import json
 import time
+import random
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.exceptions import RequestValidationError
 from loguru import logger
 from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.routes import llm
+from app.routes import llm, jobs, admin, documents, embeddings, websocket, usage as usage_routes
 from app.config import settings
 from app.models.schemas import ErrorResponse
+from app.responses import CompressionMiddleware, FastJSONResponse
+from app.services import deadline, idempotency, metrics, rate_limit, timing, usage
+from app.services.deadline import DeadlineExceeded
+from app.services.idempotency import idempotency_requests, idempotency_store
+from app.services.profiling import profiler
+from app.services.rate_limit import rate_limiter
+from app.services.runtime_config import runtime_config
+
+
+async def warm_up_agent_service() -> None:
+    """Construct the agent service off the event loop and check Ollama."""
+    try:
+        from app.services.langchain_agent import get_agent_service
+        agent_service = await asyncio.to_thread(get_agent_service)
+        health = await agent_service.health_check()
+        if health["status"] == "healthy":
+            logger.success("✅ Ollama connection successful")
+        else:
+            logger.warning(f"⚠️ Ollama connection issues: {health.get('error', 'Unknown')}")
+    except Exception as e:
+        logger.error(f"❌ Failed to connect to Ollama: {e}")
+
+
+async def restore_conversations() -> None:
+    """Attach the conversation snapshot; conversations are decoded on first access."""
+    from app.services.conversations import conversation_store
+    from app.services.snapshots import restore_snapshot
+    
+    try:
+        started = time.perf_counter()
+        reader = await asyncio.to_thread(restore_snapshot, conversation_store, settings.conversation_snapshot_path)
+        if reader is not None:
+            logger.info(f"💾 Restored {len(reader)} conversations from snapshot in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"❌ Failed to restore conversation snapshot: {e}")
+
+
+async def snapshot_conversations() -> None:
+    """Write all conversations to the snapshot file."""
+    from app.services.conversations import conversation_store
+    from app.services.snapshots import write_snapshot
+    
+    try:
+        started = time.perf_counter()
+        count = await asyncio.to_thread(write_snapshot, conversation_store, settings.conversation_snapshot_path)
+        logger.info(f"💾 Snapshotted {count} conversations in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"❌ Failed to snapshot conversations: {e}")
 
 
 @asynccontextmanager
@@ -27,54 +79,136 @@ async def lifespan(app: FastAPI):
     logger.info(f"Ollama URL: {settings.ollama_base_url}")
     logger.info(f"Model: {settings.ollama_model}")
     
-    try:
-        # Test Ollama connection
-        from app.services.langchain_agent import agent_service
-        health = await agent_service.health_check()
-        if health["status"] == "healthy":
-            logger.success("✅ Ollama connection successful")
-        else:
-            logger.warning(f"⚠️ Ollama connection issues: {health.get('error', 'Unknown')}")
-    except Exception as e:
-        logger.error(f"❌ Failed to connect to Ollama: {e}")
+    # Warm up the agent service and check Ollama in the background so the
+    # server starts accepting requests (and answering /ping) immediately
+    warmup = asyncio.create_task(warm_up_agent_service())
+    
+    # Conversations are restored in the background too; only the snapshot's
+    # index is loaded, so even large snapshots are available within moments
+    restore = None
+    if settings.conversation_snapshot_enabled:
+        restore = asyncio.create_task(restore_conversations())
+    
+    # Start agent job workers
+    from app.services.jobs import job_manager
+    await job_manager.start()
+    
+    # Usage is aggregated in memory and written to SQLite in the background
+    usage_flusher = None
+    if settings.usage_enabled:
+        from app.services.usage import usage_recorder
+        usage_flusher = asyncio.create_task(usage_recorder.run())
+    
+    # Setting overrides from the config file are applied now and on every change
+    config_watcher = None
+    if settings.config_reload_path:
+        config_watcher = asyncio.create_task(runtime_config.watch(settings.config_reload_path))
     
     yield
     
     # Shutdown
     logger.info("🔄 OllamaStack API shutting down...")
+    warmup.cancel()
+    if config_watcher is not None:
+        config_watcher.cancel()
+    await job_manager.stop()
+    if usage_flusher is not None:
+        # Cancelling flushes what is left
+        usage_flusher.cancel()
+        await asyncio.gather(usage_flusher, return_exceptions=True)
+    if settings.conversation_snapshot_enabled:
+        # Let a restore in progress finish, or the snapshot would miss its conversations
+        if restore is not None:
+            await restore
+        await snapshot_conversations()
+    from app.services.langchain_agent import close_agent_service
+    await close_agent_service()
     logger.success("✅ Shutdown complete")
+    await logger.complete()
 
 
 # Configure logging
+def format_json_record(record: Dict[str, Any]) -> str:
+    """Render a log record as a single compact JSON line."""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **{key: value for key, value in record["extra"].items() if key != "_json"}
+    }
+    if record["exception"] is not None:
+        entry["exception"] = repr(record["exception"].value)
+    # Stash the rendered line so the format template doesn't re-parse JSON braces
+    record["extra"]["_json"] = json.dumps(entry, default=str)
+    return "{extra[_json]}\n"
+
+
 def configure_logging():
     """Configure application logging."""
     logger.remove()  # Remove default handler
     
-    # Add console logging
+    log_format = format_json_record if settings.log_json else settings.log_format
+    
+    # Add console logging; sinks are queued so writes never block the event loop,
+    # and variable values in tracebacks are only captured in debug mode
     logger.add(
         sys.stdout,
-        format=settings.log_format,
+        format=log_format,
         level=settings.log_level,
-        colorize=True,
-        backtrace=True,
-        diagnose=True,
+        colorize=not settings.log_json,
+        enqueue=True,
+        backtrace=settings.debug,
+        diagnose=settings.debug,
     )
     
     # Add file logging
     logger.add(
         "logs/app.log",
-        format=settings.log_format,
+        format=log_format,
         level=settings.log_level,
         rotation="100 MB",
         retention="30 days",
         compression="zip",
-        backtrace=True,
-        diagnose=True,
+        enqueue=True,
+        backtrace=settings.debug,
+        diagnose=settings.debug,
     )
 
 
+def should_log_request(path: str) -> bool:
+    """Decide whether to log a successful request, applying per-route sampling."""
+    rate = settings.log_sample_rates.get(path, 1.0)
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
 # Initialize logging
 configure_logging()
+runtime_config.on_change(("log_level", "log_format", "log_json"), configure_logging)
+
+
+class ReloadableCORSMiddleware:
+    """CORSMiddleware that is rebuilt when the CORS settings change at runtime."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._build()
+        runtime_config.on_change(("cors_origins", "cors_methods", "cors_headers"), self._build)
+    
+    def _build(self) -> None:
+        self._cors = CORSMiddleware(
+            self.app,
+            allow_origins=settings.cors_origins,
+            allow_credentials=True,
+            allow_methods=settings.cors_methods,
+            allow_headers=settings.cors_headers,
+        )
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._cors(scope, receive, send)
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -83,26 +217,148 @@ app = FastAPI(
     version=settings.app_version,
     debug=settings.debug,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json"
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=settings.cors_methods,
-    allow_headers=settings.cors_headers,
-)
-
 # Add trusted host middleware for security
 app.add_middleware(
     TrustedHostMiddleware,
     allowed_hosts=["*"]  # Configure appropriately for production
 )
 
+# Compress large responses (SSE streams are left alone)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality
+    )
+
+
+@app.middleware("http")
+async def deadline_middleware(request: Request, call_next):
+    """
+    Start the request deadline from X-Request-Timeout or the route default.
+    """
+    deadline.start(deadline.budget_for(request.url.path, request.headers.get("x-request-timeout")))
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def rate_limit_middleware(request: Request, call_next):
+    """
+    Apply per-client request-rate and generated-token budgets to generation routes.
+    """
+    key = rate_limiter.client_key(request.headers, request.client.host if request.client else None)
+    # Usage is accounted per client whether or not it is rate limited
+    usage.bind(key)
+    if (
+        not settings.rate_limit_enabled
+        or request.method == "OPTIONS"
+        or request.url.path not in settings.rate_limit_paths
+    ):
+        return await call_next(request)
+    
+    decision = await rate_limiter.acheck(key)
+    if not decision.allowed:
+        logger.warning("Rate limited {} on {} {}: {}", key, request.method, request.url.path, decision.reason)
+        return FastJSONResponse(
+            status_code=429,
+            content=ErrorResponse(error="Too Many Requests", detail=decision.reason),
+            headers=decision.headers()
+        )
+    
+    # Generations charge their eval_count to this client as they complete
+    rate_limit.bind(key)
+    response = await call_next(request)
+    response.headers.update(decision.headers())
+    return response
+
+
+@app.middleware("http")
+async def idempotency_middleware(request: Request, call_next):
+    """
+    Run a request with an Idempotency-Key once; retries get the same response.
+    
+    A retry that arrives while the first request is still running waits for
+    it. Runs outside the rate limiter, so replays cost no request budget.
+    """
+    key = request.headers.get("idempotency-key")
+    if (
+        not key
+        or not settings.idempotency_enabled
+        or request.method != "POST"
+        or request.url.path not in settings.idempotency_paths
+    ):
+        return await call_next(request)
+    if len(key) > 255:
+        return FastJSONResponse(
+            status_code=400,
+            content=ErrorResponse(error="Bad Request", detail="Idempotency-Key must be at most 255 characters")
+        )
+    
+    client_key = rate_limiter.client_key(request.headers, request.client.host if request.client else None)
+    scope_key = idempotency.scope_key(client_key, request.url.path, key)
+    fingerprint = idempotency.fingerprint(await request.body())
+    attached = False
+    while True:
+        state, entry = idempotency_store.begin(scope_key, fingerprint)
+        if state == idempotency.MISMATCH:
+            idempotency_requests.inc("mismatch")
+            return FastJSONResponse(
+                status_code=422,
+                content=ErrorResponse(error="Unprocessable Entity", detail="Idempotency-Key was already used with a different request body")
+            )
+        if state == idempotency.DONE:
+            idempotency_requests.inc("attached" if attached else "replayed")
+            return entry.response.replay()
+        if state == idempotency.NEW:
+            break
+        # Still running: wait, then replay its response or, if it failed, run ourselves
+        attached = True
+        await entry.wait()
+    
+    idempotency_requests.inc("new")
+    stored = None
+    try:
+        response = await call_next(request)
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            return response  # Streams are not buffered, so they cannot be replayed
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        if response.status_code < 400:
+            stored = idempotency.StoredResponse.capture(response.status_code, response.headers, body)
+        buffered = Response(content=body, status_code=response.status_code)
+        # Copy raw headers so repeated ones (Set-Cookie, Link) are kept
+        buffered.raw_headers = [
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        ] + buffered.raw_headers
+        return buffered
+    finally:
+        idempotency_store.complete(scope_key, entry, stored)
+
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """
+    Profile opted-in or sampled requests into the admin profile buffer.
+    """
+    if not profiler.should_profile(request.headers.get("X-Profile")):
+        return await call_next(request)
+    
+    session = profiler.start(request.method, request.url.path)
+    response = None
+    try:
+        response = await call_next(request)
+        return response
+    finally:
+        profile = profiler.finish(session, response.status_code if response is not None else None)
+        if response is not None:
+            response.headers["X-Profile-Id"] = profile.profile_id
+
 
 @app.middleware("http")
 async def logging_middleware(request: Request, call_next):
@@ -110,41 +366,88 @@ async def logging_middleware(request: Request, call_next):
     Logging middleware to track requests and responses.
     """
     start_time = time.time()
-    
-    # Log request
-    logger.info(f"📥 {request.method} {request.url.path} - Client: {request.client.host if request.client else 'unknown'}")
+    timings = timing.start_request()
     
     # Process request
     try:
         response = await call_next(request)
         process_time = time.time() - start_time
         
-        # Log response
-        logger.info(f"📤 {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+        # Log one line per request; health probes and similar routes are sampled
+        if response.status_code >= 400 or should_log_request(request.url.path):
+            logger.bind(
+                method=request.method,
+                path=request.url.path,
+                status=response.status_code,
+                duration_ms=round(process_time * 1000, 2),
+                client=request.client.host if request.client else "unknown"
+            ).info("📤 {} {} - Status: {} - Time: {:.3f}s", request.method, request.url.path, response.status_code, process_time)
+        
+        # Record metrics against the route template to keep label cardinality bounded
+        record_request_metrics(request, response.status_code, process_time)
         
         # Add performance headers
+        timings.finish()
         response.headers["X-Process-Time"] = str(process_time)
         response.headers["X-API-Version"] = settings.app_version
+        response.headers["Server-Timing"] = timings.server_timing()
+        
+        if process_time > settings.slow_request_threshold:
+            logger.warning(f"🐢 Slow request {request.method} {request.url.path} ({process_time:.3f}s):\n{timings.render()}")
         
         return response
         
     except Exception as e:
         process_time = time.time() - start_time
-        logger.error(f"❌ {request.method} {request.url.path} - Error: {str(e)} - Time: {process_time:.3f}s")
+        logger.error("❌ {} {} - Error: {} - Time: {:.3f}s", request.method, request.url.path, e, process_time)
+        record_request_metrics(request, 500, process_time)
         raise
 
 
+# Add CORS middleware last so it is outermost: preflights are answered before
+# any budget is spent, and responses from the middlewares above (429s from the
+# rate limiter, for example) carry CORS headers too
+app.add_middleware(ReloadableCORSMiddleware)
+
+
+def record_request_metrics(request: Request, status_code: int, process_time: float) -> None:
+    """Record request count, latency and errors for the matched route."""
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    
+    metrics.http_requests.inc(request.method, route_path, str(status_code))
+    metrics.http_request_duration.observe(process_time, request.method, route_path)
+    if status_code >= 500:
+        metrics.http_errors.inc(request.method, route_path)
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions."""
     logger.error(f"HTTP Exception: {exc.status_code} - {exc.detail}")
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             error=f"HTTP {exc.status_code}",
             detail=exc.detail
-        ).dict()
+        )
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exception_handler(request: Request, exc: DeadlineExceeded):
+    """Handle requests whose deadline passed, reporting where the time went."""
+    timings = timing.current()
+    logger.warning(f"Deadline exceeded: {request.method} {request.url.path} - {exc}")
+    
+    return FastJSONResponse(
+        status_code=504,
+        content=ErrorResponse(
+            error="Gateway Timeout",
+            detail=str(exc),
+            timings=timings.to_dict() if timings is not None else None
+        )
     )
 
 
@@ -153,12 +456,12 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     """Handle request validation errors."""
     logger.error(f"Validation Error: {exc.errors()}")
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=422,
         content=ErrorResponse(
             error="Validation Error",
             detail=f"Invalid request data: {exc.errors()}"
-        ).dict()
+        )
     )
 
 
@@ -167,17 +470,23 @@ async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions."""
     logger.error(f"Unhandled Exception: {type(exc).__name__}: {str(exc)}")
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Internal Server Error",
             detail="An unexpected error occurred. Please try again later." if not settings.debug else str(exc)
-        ).dict()
+        )
     )
 
 
 # Include routers
 app.include_router(llm.router)
+app.include_router(jobs.router)
+app.include_router(documents.router)
+app.include_router(embeddings.router)
+app.include_router(websocket.router)
+app.include_router(usage_routes.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -203,6 +512,17 @@ async def ping():
     return {"status": "ok", "timestamp": time.time()}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics in the text exposition format.
+    """
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -6,8 +6,10 @@ from .schemas import (
     ChatMessage,
     ChatRequest,
     ChatResponse,
+    ConversationHistoryResponse,
     AgentRequest,
     AgentResponse,
+    AgentJobResponse,
     HealthResponse,
     ErrorResponse
 )
@@ -16,8 +18,10 @@ __all__ = [
     "ChatMessage",
     "ChatRequest", 
     "ChatResponse",
+    "ConversationHistoryResponse",
     "AgentRequest",
     "AgentResponse",
+    "AgentJobResponse",
     "HealthResponse",
     "ErrorResponse"
 ] 
\ No newline at end of file
@@ -1,10 +1,11 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 
 class ChatMessage(BaseModel):
     """Individual chat message."""
+    id: Optional[int] = Field(None, description="Message ID, increasing within a conversation")
     role: str = Field(..., description="Role of the message sender (user, assistant, system)")
     content: str = Field(..., description="Content of the message")
     timestamp: Optional[datetime] = Field(default_factory=datetime.now)
@@ -17,6 +18,36 @@ class ChatRequest(BaseModel):
     model: Optional[str] = Field(None, description="Specific model to use")
     temperature: Optional[float] = Field(0.7, ge=0.0, le=2.0, description="Temperature for response generation")
     max_tokens: Optional[int] = Field(1000, ge=1, le=4000, description="Maximum tokens in response")
+    include_timings: Optional[bool] = Field(False, description="Include a server-side timing breakdown in metadata.timings")
+
+
+class CompareRequest(BaseModel):
+    """Request model for comparing models on one message."""
+    message: str = Field(..., min_length=1, max_length=10000, description="User message sent to every model")
+    models: List[str] = Field(..., min_length=1, description="Models to compare (at most COMPARE_MAX_MODELS)")
+    temperature: float = Field(0.7, ge=0.0, le=2.0, description="Temperature for response generation")
+    max_tokens: int = Field(1000, ge=1, le=4000, description="Maximum tokens in each response")
+    stream: bool = Field(False, description="Stream model-tagged Server-Sent Events instead of one JSON response")
+
+
+class CompareResult(BaseModel):
+    """One model's answer and timings in a comparison."""
+    model: str = Field(..., description="Model")
+    message: Optional[str] = Field(None, description="Model response")
+    error: Optional[str] = Field(None, description="Error message if the model failed")
+    queued_ms: Optional[float] = Field(None, description="Time spent waiting for a generation slot")
+    ttft_ms: Optional[float] = Field(None, description="Time to first token, from the start of generation")
+    tokens_per_second: Optional[float] = Field(None, description="Decode speed")
+    duration_ms: Optional[float] = Field(None, description="Generation time")
+    prompt_tokens: int = Field(0, description="Prompt tokens evaluated")
+    completion_tokens: int = Field(0, description="Tokens generated")
+
+
+class CompareResponse(BaseModel):
+    """Response model for model comparison."""
+    results: List[CompareResult] = Field(default=[], description="One result per model, in request order")
+    duration_ms: float = Field(..., description="Time until every model finished")
+    timestamp: datetime = Field(default_factory=datetime.now)
 
 
 class ChatResponse(BaseModel):
@@ -28,12 +59,22 @@ class ChatResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional metadata")
 
 
+class ConversationHistoryResponse(BaseModel):
+    """A page of conversation history."""
+    conversation_id: str = Field(..., description="Conversation ID")
+    messages: List[ChatMessage] = Field(default=[], description="Messages in the page, oldest first")
+    message_count: int = Field(..., description="Total messages in the conversation")
+    has_more: bool = Field(False, description="Whether more messages exist beyond this page in the paging direction")
+    last_updated: Optional[datetime] = Field(None, description="When the last message was added")
+
+
 class AgentRequest(BaseModel):
     """Request model for agent endpoints."""
     task: str = Field(..., min_length=1, max_length=10000, description="Task for the agent to perform")
     agent_type: Optional[str] = Field("default", description="Type of agent to use")
     tools: Optional[List[str]] = Field(default=[], description="List of tools the agent can use")
     max_iterations: Optional[int] = Field(10, ge=1, le=50, description="Maximum iterations for agent")
+    include_timings: Optional[bool] = Field(False, description="Include a server-side timing breakdown in metadata.timings")
 
 
 class AgentResponse(BaseModel):
@@ -45,12 +86,111 @@ class AgentResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional metadata")
 
 
+class AgentJobResponse(BaseModel):
+    """Status and result of an asynchronous agent job."""
+    job_id: str = Field(..., description="Job ID")
+    status: str = Field(..., description="Job status (queued, running, succeeded, failed, cancelled)")
+    progress: Dict[str, Any] = Field(default={}, description="Job progress")
+    result: Optional[AgentResponse] = Field(None, description="Agent result once the job has succeeded")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: datetime = Field(..., description="When the job was queued")
+    started_at: Optional[datetime] = Field(None, description="When a worker picked up the job")
+    finished_at: Optional[datetime] = Field(None, description="When the job finished")
+
+
+class DocumentIngestRequest(BaseModel):
+    """Request model for document ingestion."""
+    text: str = Field(..., min_length=1, max_length=5000000, description="Document text")
+    source: Optional[str] = Field(None, description="Where the document came from (file name, URL)")
+    metadata: Optional[Dict[str, Any]] = Field(default={}, description="Metadata stored with every chunk")
+
+
+class DocumentIngestResponse(BaseModel):
+    """Response model for document ingestion."""
+    document_id: str = Field(..., description="Document ID")
+    chunks: int = Field(..., description="Chunks the document was split into")
+    total_chunks: int = Field(..., description="Chunks in the index after ingestion")
+
+
+class DocumentChunk(BaseModel):
+    """A retrieved document chunk."""
+    document_id: str = Field(..., description="Document ID")
+    source: Optional[str] = Field(None, description="Where the document came from")
+    chunk: int = Field(..., description="Position of the chunk in its document")
+    text: str = Field(..., description="Chunk text")
+    metadata: Dict[str, Any] = Field(default={}, description="Document metadata")
+    score: float = Field(..., description="Cosine similarity to the query")
+
+
+class DocumentSearchResponse(BaseModel):
+    """Response model for document search."""
+    query: str = Field(..., description="Search query")
+    results: List[DocumentChunk] = Field(default=[], description="Matching chunks, most similar first")
+
+
+class EmbeddingRequest(BaseModel):
+    """Request model for the embeddings endpoint."""
+    input: Union[str, List[str]] = Field(..., description="Text or list of texts to embed")
+    model: Optional[str] = Field(None, description="Embedding model (defaults to RAG_EMBEDDING_MODEL)")
+    encoding_format: Literal["float", "base64"] = Field(
+        "float", description="float arrays, or base64 of little-endian float32 bytes"
+    )
+
+
+class EmbeddingData(BaseModel):
+    """One embedding, in the order of the request's inputs."""
+    index: int = Field(..., description="Position of the input in the request")
+    embedding: Union[List[float], str] = Field(..., description="Float array or base64-encoded float32 bytes")
+
+
+class EmbeddingResponse(BaseModel):
+    """Response model for the embeddings endpoint."""
+    model: str = Field(..., description="Model used for the embeddings")
+    encoding_format: str = Field(..., description="Encoding of the embeddings")
+    data: List[EmbeddingData] = Field(default=[], description="One embedding per input")
+    usage: Dict[str, int] = Field(default={}, description="Input counts")
+
+
+class WebSocketChatFrame(BaseModel):
+    """A ``chat`` frame on the WebSocket endpoint, starting one stream."""
+    id: str = Field(..., min_length=1, max_length=100, description="Client-chosen stream ID, echoed on every event of the stream")
+    message: str = Field(..., min_length=1, max_length=10000, description="User message")
+    conversation_id: Optional[str] = Field(None, description="Conversation ID for context")
+    model: Optional[str] = Field(None, description="Specific model to use")
+    temperature: float = Field(0.7, ge=0.0, le=2.0, description="Temperature for response generation")
+    max_tokens: int = Field(1000, ge=1, le=4000, description="Maximum tokens in response")
+    timeout: Optional[float] = Field(None, gt=0, description="Seconds allowed for the stream, like X-Request-Timeout")
+
+
+class UsageBucket(BaseModel):
+    """Usage of one model by one tenant over one time bucket."""
+    start: datetime = Field(..., description="Start of the bucket (UTC)")
+    tenant: str = Field(..., description="Client the usage is charged to (API key or IP)")
+    model: str = Field(..., description="Model that served the generations")
+    requests: int = Field(..., description="Completed generations")
+    prompt_tokens: int = Field(..., description="Prompt tokens evaluated")
+    completion_tokens: int = Field(..., description="Tokens generated")
+    prompt_ms: float = Field(..., description="Time spent evaluating prompts, in milliseconds")
+    completion_ms: float = Field(..., description="Time spent generating, in milliseconds")
+    total_ms: float = Field(..., description="Total generation time reported by Ollama, in milliseconds")
+
+
+class UsageResponse(BaseModel):
+    """Response model for the usage endpoint."""
+    start: datetime = Field(..., description="Start of the queried range (UTC)")
+    end: datetime = Field(..., description="End of the queried range (UTC)")
+    granularity: str = Field(..., description="Bucket size (minute, hour or day)")
+    buckets: List[UsageBucket] = Field(default=[], description="Usage per bucket, tenant and model, oldest first")
+    totals: Dict[str, float] = Field(default={}, description="Sums over all buckets")
+
+
 class HealthResponse(BaseModel):
     """Health check response model."""
     status: str = Field(..., description="Service status")
     timestamp: datetime = Field(default_factory=datetime.now)
     version: str = Field(..., description="API version")
     ollama_status: str = Field(..., description="Ollama service status")
+    generation_paths: Optional[Dict[str, Any]] = Field(None, description="Circuit breaker state per generation path")
     uptime: float = Field(..., description="Service uptime in seconds")
 
 
@@ -59,4 +199,5 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Detailed error information")
     timestamp: datetime = Field(default_factory=datetime.now)
-    request_id: Optional[str] = Field(None, description="Request ID for tracking") 
\ No newline at end of file
+    request_id: Optional[str] = Field(None, description="Request ID for tracking")
+    timings: Optional[Dict[str, Any]] = Field(None, description="Elapsed time breakdown when the request deadline was exceeded") 
\ No newline at end of file
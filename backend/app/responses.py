@@ -0,0 +1,156 @@
+"""
+Fast JSON responses and response compression.
+"""
+
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class FastJSONResponse(ORJSONResponse):
+    """JSON response rendered by orjson, or by pydantic-core for models.
+
+    Returning ``FastJSONResponse(model)`` from a route skips FastAPI's
+    ``jsonable_encoder`` pass and the ``response_model`` re-validation, so the
+    model is serialized exactly once, in Rust.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _gzip_compressor(level: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    return compressor.compress, compressor.flush
+
+
+def _brotli_compressor(quality: int) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    compressor = brotli.Compressor(quality=quality)
+    return compressor.process, compressor.finish
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring q=0."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """Compress responses of at least ``minimum_size`` bytes with brotli or gzip.
+
+    Server-Sent Events, already encoded responses and bodies without content
+    pass through untouched, so streamed events are never held back by the
+    compressor.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        pending: List[bytes] = []
+        pending_size = 0
+        passthrough = False
+        compress: Optional[Callable[[bytes], bytes]] = None
+        finish: Optional[Callable[[], bytes]] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, pending_size, passthrough, compress, finish
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith("text/event-stream")
+                    or message["status"] in (204, 304)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compress is None:
+                pending.append(body)
+                pending_size += len(body)
+                if more_body and pending_size < self.minimum_size:
+                    return
+                body = b"".join(pending)
+                pending.clear()
+
+                if pending_size < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                if encoding == "br":
+                    compress, finish = _brotli_compressor(self.brotli_quality)
+                else:
+                    compress, finish = _gzip_compressor(self.gzip_level)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                if not more_body:
+                    data = compress(body) + finish()
+                    headers["Content-Length"] = str(len(data))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+
+                del headers["Content-Length"]
+                await send(start)
+
+            data = compress(body)
+            if not more_body:
+                data += finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,189 @@
+import asyncio
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from loguru import logger
+
+from app.config import settings
+from app.services.conversations import conversation_store
+from app.services.profiling import profiler
+from app.services.runtime_config import RESTART_REQUIRED, SECRET_SETTINGS, ConfigError, runtime_config
+from app.services.snapshots import SnapshotError, export_lines, import_lines
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Allow the request only with a valid X-Admin-Key header."""
+    if not settings.admin_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admin API is disabled"
+        )
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.admin_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
+
+
+router = APIRouter(prefix="/api/v1/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """
+    List the most recently captured request profiles.
+
+    Returns:
+        Profile summaries, newest first
+    """
+    profiles = profiler.list()
+    return {
+        "profiles": profiles,
+        "count": len(profiles),
+        "enabled": settings.profiling_enabled,
+        "mode": settings.profiling_mode
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats|collapsed)$", description="Output format")
+):
+    """
+    Download a captured request profile.
+
+    Args:
+        profile_id: Profile identifier from the profile list
+        format: ``text`` (pstats report) or ``pstats`` (binary, for snakeviz)
+            for cProfile captures; ``collapsed`` stacks for sampler captures
+
+    Returns:
+        The profile in the requested format
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+
+    if profile.mode == "sampler":
+        return PlainTextResponse(profile.collapsed())
+    if format == "pstats":
+        return Response(
+            profile.pstats_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    return PlainTextResponse(profile.text())
+
+
+@router.get("/conversations/export")
+async def export_conversations():
+    """
+    Export every conversation in the snapshot format.
+
+    Returns:
+        NDJSON: a header line, then one conversation record per line
+    """
+    return StreamingResponse(
+        export_lines(conversation_store),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="conversations.ndjson"'}
+    )
+
+
+@router.post("/conversations/import")
+async def import_conversations(request: Request):
+    """
+    Import conversations in the snapshot format (as produced by the export).
+
+    Conversations with the same ID are replaced.
+
+    Args:
+        request: NDJSON body with a snapshot header line
+
+    Returns:
+        Number of conversations imported
+    """
+    body = await request.body()
+    try:
+        count = await asyncio.to_thread(import_lines, conversation_store, body.splitlines())
+    except SnapshotError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    logger.info(f"Imported {count} conversations")
+    return {"imported": count, "conversations": len(conversation_store)}
+
+
+def _redact(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: "***" if name in SECRET_SETTINGS and value is not None else value for name, value in values.items()}
+
+
+def _config_state() -> Dict[str, Any]:
+    return {
+        "version": runtime_config.version,
+        "reloaded_at": runtime_config.reloaded_at,
+        "settings": _redact(settings.model_dump()),
+        "overrides": {source: _redact(layer) for source, layer in runtime_config.overrides().items()},
+        "restart_required": sorted(RESTART_REQUIRED)
+    }
+
+
+@router.get("/config")
+async def get_config():
+    """
+    Show the effective settings and the overrides applied at runtime.
+
+    Returns:
+        Settings, overrides by source, and the settings that need a restart
+    """
+    return _config_state()
+
+
+@router.patch("/config")
+async def update_config(overrides: Dict[str, Any] = Body(..., description="Settings to override")):
+    """
+    Change settings without a restart.
+
+    The overrides are merged into earlier admin overrides, validated
+    together with every other setting and applied at once; requests already
+    running finish with the clients and limits they started with.
+
+    Args:
+        overrides: Setting names and their new values
+
+    Returns:
+        The settings that changed and the resulting configuration
+    """
+    try:
+        changed = runtime_config.update("admin", overrides)
+    except ConfigError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return {"changed": sorted(changed), **_config_state()}
+
+
+@router.delete("/config")
+async def reset_config():
+    """
+    Drop every admin override, returning to the startup and file settings.
+
+    Returns:
+        The settings that changed and the resulting configuration
+    """
+    try:
+        changed = runtime_config.update("admin", {}, replace=True)
+    except ConfigError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    return {"changed": sorted(changed), **_config_state()}
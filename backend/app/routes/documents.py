@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from loguru import logger
+
+from app.models.schemas import DocumentIngestRequest, DocumentIngestResponse, DocumentSearchResponse
+from app.responses import FastJSONResponse
+from app.services import deadline
+from app.services.deadline import DeadlineExceeded
+from app.services.rag import get_document_store
+
+router = APIRouter(prefix="/api/v1/documents", tags=["Documents"])
+
+
+@router.post("", response_model=DocumentIngestResponse, status_code=status.HTTP_201_CREATED)
+async def ingest_document(request: DocumentIngestRequest):
+    """
+    Chunk, embed and index a document for retrieval.
+
+    Args:
+        request: Document text, source and metadata
+
+    Returns:
+        DocumentIngestResponse: The document ID and chunk counts
+    """
+    try:
+        async with deadline.enforce():
+            result = await get_document_store().ingest(request.text, request.source, request.metadata)
+        return FastJSONResponse(DocumentIngestResponse(**result), status_code=status.HTTP_201_CREATED)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Document ingestion error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Document ingestion failed: {str(e)}"
+        )
+
+
+@router.get("/search", response_model=DocumentSearchResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Search query"),
+    k: int = Query(4, ge=1, le=50, description="Maximum chunks to return")
+):
+    """
+    Find the document chunks most similar to a query.
+
+    Args:
+        q: Search query
+        k: Maximum number of chunks to return
+
+    Returns:
+        DocumentSearchResponse: Matching chunks, most similar first
+    """
+    try:
+        async with deadline.enforce():
+            results = await get_document_store().search(q, k)
+        return FastJSONResponse(DocumentSearchResponse(query=q, results=results))
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Document search error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Document search failed: {str(e)}"
+        )
+
+
+@router.get("")
+async def document_index_stats():
+    """
+    Summarize the document index.
+
+    Returns:
+        Chunk count, vector dimensions and partitioning of the index
+    """
+    return get_document_store().stats()
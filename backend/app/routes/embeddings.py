@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, status
+from loguru import logger
+
+from app.config import settings
+from app.models.schemas import EmbeddingRequest, EmbeddingResponse
+from app.responses import FastJSONResponse
+from app.services import deadline
+from app.services.deadline import DeadlineExceeded
+from app.services.embeddings import embedding_service, encode_base64, unpack
+
+router = APIRouter(prefix="/api/v1/embeddings", tags=["Embeddings"])
+
+
+@router.post("", response_model=EmbeddingResponse)
+async def create_embeddings(request: EmbeddingRequest):
+    """
+    Embed one or many texts.
+
+    Inputs from concurrent requests are batched into shared upstream calls,
+    and repeated inputs are served from the cache.
+
+    Args:
+        request: Inputs, model and encoding format
+
+    Returns:
+        EmbeddingResponse: One embedding per input, in input order
+    """
+    inputs = [request.input] if isinstance(request.input, str) else request.input
+    if not inputs or len(inputs) > settings.embedding_max_inputs:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Expected between 1 and {settings.embedding_max_inputs} inputs"
+        )
+    model = request.model or settings.rag_embedding_model
+    
+    try:
+        async with deadline.enforce():
+            vectors = await embedding_service.embed(inputs, model)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Embedding error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Embedding failed: {str(e)}"
+        )
+    
+    encode = encode_base64 if request.encoding_format == "base64" else unpack
+    # Rendered straight from dicts by orjson; validating thousands of floats
+    # through the response model would dominate the request
+    return FastJSONResponse({
+        "model": model,
+        "encoding_format": request.encoding_format,
+        "data": [{"index": i, "embedding": encode(data)} for i, data in enumerate(vectors)],
+        "usage": {"inputs": len(inputs), "dimensions": len(vectors[0]) // 4}
+    })
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, status
+from loguru import logger
+
+from app.models.schemas import AgentRequest, AgentJobResponse
+from app.responses import FastJSONResponse
+from app.services.jobs import job_manager, JobQueueFullError
+
+router = APIRouter(prefix="/api/v1/agent/jobs", tags=["Agent Jobs"])
+
+
+@router.post("", response_model=AgentJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_agent_job(request: AgentRequest):
+    """
+    Queue an agent task for asynchronous execution.
+
+    Args:
+        request: Agent request containing task and configuration
+
+    Returns:
+        AgentJobResponse: The queued job; poll it by job_id for progress and result
+    """
+    try:
+        job = await job_manager.submit(request.model_dump())
+        return FastJSONResponse(AgentJobResponse(**job.to_dict()), status_code=status.HTTP_202_ACCEPTED)
+    except JobQueueFullError as e:
+        logger.warning(f"Rejected agent job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+
+@router.get("/{job_id}", response_model=AgentJobResponse)
+async def get_agent_job(job_id: str):
+    """
+    Retrieve the status, progress and result of an agent job.
+
+    Args:
+        job_id: Job identifier returned on submission
+
+    Returns:
+        AgentJobResponse: Current job state
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found or expired"
+        )
+    return FastJSONResponse(AgentJobResponse(**job.to_dict()))
+
+
+@router.delete("/{job_id}", response_model=AgentJobResponse)
+async def cancel_agent_job(job_id: str):
+    """
+    Cancel a queued or running agent job.
+
+    Args:
+        job_id: Job identifier returned on submission
+
+    Returns:
+        AgentJobResponse: Job state after cancellation
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found or expired"
+        )
+    return FastJSONResponse(AgentJobResponse(**job.to_dict()))
@@ -3,16 +3,20 @@ import time
 from typing import Optional
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, status
+from fastapi.responses import Response, StreamingResponse
 from loguru import logger
 
 from app.models.schemas import (
-    ChatRequest, ChatResponse, AgentRequest, AgentResponse,
-    HealthResponse, ErrorResponse
+    ChatRequest, ChatResponse, CompareRequest, CompareResponse, AgentRequest, AgentResponse,
+    ConversationHistoryResponse, HealthResponse, ErrorResponse
 )
-from app.services.langchain_agent import agent_service
+from app.services import deadline, rate_limit, timing
+from app.services.deadline import DeadlineExceeded
+from app.services.langchain_agent import get_agent_service
 from app.config import settings
+from app.responses import FastJSONResponse
 
 router = APIRouter(prefix="/api/v1", tags=["LLM"])
 
@@ -25,6 +29,11 @@ def get_uptime() -> float:
     return time.time() - _start_time
 
 
+def format_sse(event: dict) -> str:
+    """Format an event dictionary as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {orjson.dumps(event, default=str).decode()}\n\n"
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
@@ -33,13 +42,18 @@ async def health_check():
     Returns:
         HealthResponse: Current service status and Ollama connectivity
     """
+    agent_service = get_agent_service()
     try:
         ollama_health = await agent_service.health_check()
+        paths = ollama_health.get("generation_paths") or {}
+        # An open circuit means requests are running on a fallback path
+        circuits_closed = all(path["state"] == "closed" for path in paths.values())
         
         return HealthResponse(
-            status="healthy" if ollama_health["status"] == "healthy" else "degraded",
+            status="healthy" if ollama_health["status"] == "healthy" and circuits_closed else "degraded",
             version=settings.app_version,
             ollama_status=ollama_health["status"],
+            generation_paths=ollama_health.get("generation_paths"),
             uptime=get_uptime()
         )
     except Exception as e:
@@ -61,18 +75,23 @@ async def chat(request: ChatRequest):
     Returns:
         ChatResponse: AI response with conversation metadata
     """
+    agent_service = get_agent_service()
     try:
-        logger.info(f"Chat request received: {request.message[:50]}...")
+        logger.debug("Chat request received: {}...", request.message[:50])
         
-        result = await agent_service.chat(
-            message=request.message,
-            conversation_id=request.conversation_id,
-            model=request.model,
-            temperature=request.temperature
-        )
+        async with deadline.enforce():
+            result = await agent_service.chat(
+                message=request.message,
+                conversation_id=request.conversation_id,
+                model=request.model,
+                temperature=request.temperature,
+                include_timings=request.include_timings
+            )
         
-        return ChatResponse(**result)
+        return FastJSONResponse(ChatResponse(**result))
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(
@@ -81,6 +100,119 @@ async def chat(request: ChatRequest):
         )
 
 
+@router.post("/chat/stream")
+async def stream_chat(request: ChatRequest):
+    """
+    Chat with the AI assistant, streaming the answer token by token.
+    
+    Args:
+        request: Chat request containing message and optional parameters
+        
+    Returns:
+        StreamingResponse: Server-Sent Events with start, token and end events
+    """
+    agent_service = get_agent_service()
+    logger.debug("Chat stream request received: {}...", request.message[:50])
+    
+    async def event_stream():
+        try:
+            async for event in deadline.iterate(agent_service.stream_chat(
+                message=request.message,
+                conversation_id=request.conversation_id,
+                model=request.model,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens
+            )):
+                yield format_sse(event)
+        except DeadlineExceeded as e:
+            logger.warning(f"Chat stream deadline exceeded: {e}")
+            yield format_sse({"type": "error", "detail": str(e), "status": status.HTTP_504_GATEWAY_TIMEOUT})
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield format_sse({"type": "error", "detail": f"Chat processing failed: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chat/compare", response_model=CompareResponse)
+async def compare_models(request: CompareRequest):
+    """
+    Send one message to several models concurrently and compare their answers.
+    
+    Generations share COMPARE_MAX_CONCURRENCY slots across all comparisons,
+    and each model beyond the first costs the client one more request from
+    its rate limit budget.
+    
+    Args:
+        request: Message, models and generation parameters
+        
+    Returns:
+        CompareResponse: Each model's answer, TTFT, decode speed and latency,
+        or Server-Sent Events tagged by model when ``stream`` is set
+    """
+    models = request.models
+    if len(models) > settings.compare_max_models:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.compare_max_models} models can be compared"
+        )
+    if len(set(models)) != len(models):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Models must be unique"
+        )
+    await rate_limit.charge_requests(len(models) - 1)
+    
+    agent_service = get_agent_service()
+    logger.debug("Compare request received for {}: {}...", models, request.message[:50])
+    events = agent_service.compare(
+        message=request.message,
+        models=models,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens
+    )
+    
+    if request.stream:
+        async def event_stream():
+            try:
+                async for event in deadline.iterate(events):
+                    yield format_sse(event)
+            except DeadlineExceeded as e:
+                logger.warning(f"Compare stream deadline exceeded: {e}")
+                yield format_sse({"type": "error", "detail": str(e), "status": status.HTTP_504_GATEWAY_TIMEOUT})
+            finally:
+                await events.aclose()
+        
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    results = {model: {"model": model} for model in models}
+    try:
+        async with deadline.enforce():
+            async for event in events:
+                if event["type"] == "start":
+                    results[event["model"]]["queued_ms"] = event["queued_ms"]
+                elif event["type"] == "end":
+                    results[event["model"]].update(
+                        {key: value for key, value in event.items() if key != "type"}
+                    )
+                elif event["type"] == "error":
+                    results[event["model"]]["error"] = event["detail"]
+                elif event["type"] == "done":
+                    duration_ms = event["duration_ms"]
+    finally:
+        await events.aclose()
+    
+    return FastJSONResponse(CompareResponse(results=list(results.values()), duration_ms=duration_ms))
+
+
 @router.post("/agent", response_model=AgentResponse)
 async def run_agent_task(request: AgentRequest):
     """
@@ -92,18 +224,23 @@ async def run_agent_task(request: AgentRequest):
     Returns:
         AgentResponse: Agent execution result with steps and metadata
     """
+    agent_service = get_agent_service()
     try:
-        logger.info(f"Agent task received: {request.task[:50]}...")
+        logger.debug("Agent task received: {}...", request.task[:50])
         
-        result = await agent_service.run_agent(
-            task=request.task,
-            agent_type=request.agent_type,
-            tools=request.tools,
-            max_iterations=request.max_iterations
-        )
+        async with deadline.enforce():
+            result = await agent_service.run_agent(
+                task=request.task,
+                agent_type=request.agent_type,
+                tools=request.tools,
+                max_iterations=request.max_iterations,
+                include_timings=request.include_timings
+            )
         
-        return AgentResponse(**result)
+        return FastJSONResponse(AgentResponse(**result))
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Agent execution error: {e}")
         raise HTTPException(
@@ -112,34 +249,97 @@ async def run_agent_task(request: AgentRequest):
         )
 
 
-@router.get("/conversations/{conversation_id}/history")
-async def get_conversation_history(conversation_id: str):
+@router.post("/agent/stream")
+async def stream_agent_task(request: AgentRequest):
+    """
+    Execute a task using an AI agent, streaming each step as it happens.
+    
+    Args:
+        request: Agent request containing task and configuration
+        
+    Returns:
+        StreamingResponse: Server-Sent Events with start, step, token,
+        tool_call, tool_result and end events
+    """
+    agent_service = get_agent_service()
+    logger.debug("Agent stream task received: {}...", request.task[:50])
+    
+    async def event_stream():
+        try:
+            async for event in deadline.iterate(agent_service.stream_agent(
+                task=request.task,
+                agent_type=request.agent_type,
+                tools=request.tools,
+                max_iterations=request.max_iterations
+            )):
+                yield format_sse(event)
+        except DeadlineExceeded as e:
+            # Headers are already sent, so the timeout is reported in-band
+            logger.warning(f"Agent stream deadline exceeded: {e}")
+            timings = timing.current()
+            yield format_sse({
+                "type": "error",
+                "detail": str(e),
+                "status": status.HTTP_504_GATEWAY_TIMEOUT,
+                "timings": timings.to_dict() if timings is not None else None
+            })
+        except Exception as e:
+            logger.error(f"Agent stream error: {e}")
+            yield format_sse({"type": "error", "detail": f"Agent execution failed: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/conversations/{conversation_id}/history", response_model=ConversationHistoryResponse)
+async def get_conversation_history(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Maximum messages to return"),
+    before: Optional[int] = Query(None, ge=0, description="Return messages with IDs below this one"),
+    after: Optional[int] = Query(None, ge=0, description="Return messages with IDs above this one"),
+    if_none_match: Optional[str] = Header(None)
+):
     """
-    Retrieve conversation history for a specific conversation.
+    Retrieve a page of conversation history.
+    
+    Without cursors the newest ``limit`` messages are returned. Pass ``after``
+    (the last ID seen) to fetch only new messages, or ``before`` (the first ID
+    seen) to page back through older ones. Responses carry an ``ETag``; send
+    it back in ``If-None-Match`` to get ``304 Not Modified`` when nothing changed.
     
     Args:
         conversation_id: Unique conversation identifier
+        limit: Maximum number of messages to return
+        before: Upper (exclusive) message ID cursor
+        after: Lower (exclusive) message ID cursor
+        if_none_match: ETag from a previous response
         
     Returns:
-        Conversation history and metadata
+        ConversationHistoryResponse: Messages in the page and paging metadata
     """
+    agent_service = get_agent_service()
     try:
-        memory = agent_service.get_memory(conversation_id)
-        messages = []
+        # Reading history must not create the conversation
+        memory = agent_service.memory_store.get(conversation_id)
+        if memory is None:
+            return FastJSONResponse(ConversationHistoryResponse(conversation_id=conversation_id, message_count=0))
         
-        for message in memory.chat_memory.messages:
-            messages.append({
-                "role": "user" if hasattr(message, 'content') and isinstance(message, type(memory.chat_memory.messages[0])) else "assistant",
-                "content": message.content,
-                "timestamp": datetime.now().isoformat()
-            })
+        etag = memory.etag
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
         
-        return {
-            "conversation_id": conversation_id,
-            "messages": messages,
-            "message_count": len(messages),
-            "last_updated": datetime.now().isoformat()
-        }
+        messages, has_more = memory.page(limit, before=before, after=after)
+        history = ConversationHistoryResponse(
+            conversation_id=conversation_id,
+            messages=[m.to_dict() for m in messages],
+            message_count=memory.message_count,
+            has_more=has_more,
+            last_updated=memory.updated_at
+        )
+        return FastJSONResponse(history, headers={"ETag": etag})
         
     except Exception as e:
         logger.error(f"Error retrieving conversation history: {e}")
@@ -160,6 +360,7 @@ async def clear_conversation(conversation_id: str):
     Returns:
         Confirmation of conversation clearance
     """
+    agent_service = get_agent_service()
     try:
         if conversation_id in agent_service.memory_store:
             del agent_service.memory_store[conversation_id]
@@ -216,6 +417,7 @@ async def list_available_tools():
     Returns:
         List of available tools with descriptions
     """
+    agent_service = get_agent_service()
     try:
         tools_info = []
         for tool in agent_service.tools:
@@ -251,10 +453,12 @@ async def ask(question: str):
     Returns:
         Simple Q&A response
     """
+    agent_service = get_agent_service()
     try:
         logger.warning("Legacy /ask endpoint used - consider migrating to /chat")
         
-        result = await agent_service.chat(message=question)
+        async with deadline.enforce():
+            result = await agent_service.chat(message=question)
         
         return {
             "question": question,
@@ -263,6 +467,8 @@ async def ask(question: str):
             "timestamp": result["timestamp"].isoformat()
         }
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Legacy ask error: {e}")
         raise HTTPException(
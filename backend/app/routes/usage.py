@@ -0,0 +1,88 @@
+import secrets
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+
+from app.config import settings
+from app.models.schemas import UsageResponse
+from app.responses import FastJSONResponse
+from app.services import usage
+from app.services.usage import FIELDS, usage_recorder
+
+router = APIRouter(prefix="/api/v1/usage", tags=["Usage"])
+
+
+def _is_admin(x_admin_key: Optional[str]) -> bool:
+    return bool(
+        settings.admin_api_key and x_admin_key
+        and secrets.compare_digest(x_admin_key, settings.admin_api_key)
+    )
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+@router.get("", response_model=UsageResponse)
+async def get_usage(
+    start: Optional[datetime] = Query(None, description="Start of the range (defaults to 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="End of the range (defaults to now)"),
+    granularity: str = Query("hour", pattern="^(minute|hour|day)$", description="Bucket size"),
+    tenant: Optional[str] = Query(None, description="Only this tenant; admins only, except for your own"),
+    model: Optional[str] = Query(None, description="Only this model"),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Report token usage per tenant and model, rolled up into time buckets.
+
+    Usage is charged to the same client key as rate limits: the hashed API
+    key, or the IP address without one. Callers see their own usage; a
+    valid X-Admin-Key allows querying every tenant.
+
+    Args:
+        start: Start of the range; naive datetimes are taken as UTC
+        end: End of the range; naive datetimes are taken as UTC
+        granularity: ``minute``, ``hour`` or ``day`` buckets
+        tenant: Tenant to report on
+        model: Model to report on
+
+    Returns:
+        UsageResponse: Usage per bucket, tenant and model, with totals
+    """
+    if not settings.usage_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usage accounting is disabled"
+        )
+
+    own = usage.current_tenant()
+    if not _is_admin(x_admin_key):
+        if tenant is not None and tenant != own:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Querying other tenants requires an admin key"
+            )
+        tenant = own
+
+    end_ts = end.replace(tzinfo=end.tzinfo or timezone.utc).timestamp() if end else time.time()
+    start_ts = start.replace(tzinfo=start.tzinfo or timezone.utc).timestamp() if start else end_ts - 86400
+    if start_ts >= end_ts:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="start must be before end"
+        )
+
+    buckets = await usage_recorder.query(start_ts, end_ts, granularity, tenant=tenant, model=model)
+    totals = {field: sum(bucket[field] for bucket in buckets) for field in FIELDS}
+    for bucket in buckets:
+        bucket["start"] = _utc(bucket["start"])
+
+    return FastJSONResponse(UsageResponse(
+        start=_utc(start_ts),
+        end=_utc(end_ts),
+        granularity=granularity,
+        buckets=buckets,
+        totals=totals
+    ))
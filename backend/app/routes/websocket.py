@@ -0,0 +1,18 @@
+from fastapi import APIRouter, WebSocket
+
+from app.services.chat_socket import ChatConnection
+
+router = APIRouter(prefix="/api/v1", tags=["WebSocket"])
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """
+    Chat over a WebSocket, with several conversations multiplexed on one connection.
+    
+    Clients send ``chat`` frames to start streams and ``cancel`` frames to
+    abort them; the server answers with start, token, end, cancelled and
+    error events tagged with the stream ``id``.
+    """
+    await websocket.accept()
+    await ChatConnection(websocket).serve()
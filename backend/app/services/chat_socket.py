@@ -0,0 +1,195 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+import orjson
+from fastapi import WebSocket
+from loguru import logger
+from pydantic import ValidationError
+
+from app.config import settings
+from app.models.schemas import WebSocketChatFrame
+from app.services import deadline, metrics, rate_limit, usage
+from app.services.deadline import DeadlineExceeded
+from app.services.langchain_agent import get_agent_service
+from app.services.rate_limit import rate_limiter
+
+WS_PATH = "/api/v1/ws"
+
+
+class ChatConnection:
+    """Chat streams multiplexed over one WebSocket connection.
+
+    A ``chat`` frame starts a stream under the client-chosen ``id`` and every
+    event of that stream is sent back tagged with it; a ``cancel`` frame
+    cancels the stream's task, which closes its upstream Ollama request.
+
+    Outgoing frames go through a bounded queue drained by a single writer.
+    When the client reads slower than tokens arrive the queue fills, streams
+    wait on it and stop reading from Ollama, so a slow client holds back its
+    own generations instead of having them buffered in memory. At most
+    ``WS_MAX_STREAMS`` streams run at once per connection.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_streams: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        self.websocket = websocket
+        self.max_streams = max_streams or settings.ws_max_streams
+        self.client_key = rate_limiter.client_key(websocket.headers, websocket.client.host if websocket.client else None)
+        self.streams: Dict[str, asyncio.Task] = {}
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.ws_send_queue_size)
+        self._closed = False
+
+    async def serve(self) -> None:
+        """Handle frames until the client disconnects."""
+        writer = asyncio.create_task(self._write())
+        websocket_connections.inc()
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                try:
+                    frame = orjson.loads(message.get("text") or message.get("bytes") or b"")
+                except orjson.JSONDecodeError:
+                    frame = None
+                if not isinstance(frame, dict):
+                    self.reply({"type": "error", "detail": "Frames must be JSON objects"})
+                    continue
+                self.handle(frame)
+        finally:
+            websocket_connections.dec()
+            self._closed = True
+            streams = list(self.streams.values())
+            for task in streams:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+    def handle(self, frame: Dict[str, Any]) -> None:
+        frame_type = frame.get("type")
+        stream_id = frame.get("id")
+        if frame_type == "chat":
+            self._start(frame)
+        elif frame_type == "cancel":
+            task = self.streams.get(stream_id)
+            if task is None:
+                self.reply({"type": "error", "id": stream_id, "detail": "No such stream"})
+            else:
+                task.cancel()
+        else:
+            self.reply({"type": "error", "id": stream_id, "detail": f"Unknown frame type: {frame_type}"})
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the client, waiting while the queue is full."""
+        if not self._closed:
+            await self._outbox.put(event)
+
+    def reply(self, event: Dict[str, Any]) -> None:
+        """Queue a reply to a client frame without waiting.
+
+        The receive loop must never block on the client, or cancel frames
+        would wait behind a full queue; replies that do not fit are dropped.
+        """
+        try:
+            self._outbox.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Dropping WebSocket reply, client is not reading: {}", event.get("detail"))
+
+    async def _write(self) -> None:
+        while True:
+            event = await self._outbox.get()
+            try:
+                await self.websocket.send_text(orjson.dumps(event, default=str).decode())
+            except Exception as e:
+                # The receive loop sees the disconnect and cleans up
+                logger.debug(f"WebSocket send failed: {e}")
+                return
+
+    def _start(self, frame: Dict[str, Any]) -> None:
+        try:
+            request = WebSocketChatFrame(**frame)
+        except (ValidationError, TypeError) as e:
+            self.reply({"type": "error", "id": frame.get("id"), "status": 422, "detail": str(e)})
+            return
+        if request.id in self.streams:
+            self.reply({"type": "error", "id": request.id, "status": 409, "detail": "Stream ID already in use"})
+            return
+        if len(self.streams) >= self.max_streams:
+            websocket_streams.inc("rejected")
+            self.reply({
+                "type": "error", "id": request.id, "status": 429,
+                "detail": f"At most {self.max_streams} concurrent streams per connection"
+            })
+            return
+        self.streams[request.id] = asyncio.create_task(self._stream(request))
+
+    async def _admit(self, request: WebSocketChatFrame) -> bool:
+        """Charge a stream to the client's request budget, replying with a 429 if it is spent."""
+        if not settings.rate_limit_enabled or WS_PATH not in settings.rate_limit_paths:
+            return True
+        decision = await rate_limiter.acheck(self.client_key)
+        if decision.allowed:
+            return True
+        websocket_streams.inc("rejected")
+        self.reply({
+            "type": "error", "id": request.id, "status": 429,
+            "detail": decision.reason, "retry_after": decision.retry_after
+        })
+        return False
+
+    async def _stream(self, request: WebSocketChatFrame) -> None:
+        """Run one chat stream, forwarding its events to the client."""
+        admitted = False
+        try:
+            admitted = await self._admit(request)
+        finally:
+            if not admitted:
+                # Refused, or cancelled before it started
+                self.streams.pop(request.id, None)
+        if not admitted:
+            return
+        # Each stream is a request of its own for deadlines and token budgets
+        deadline.start(deadline.budget_for(WS_PATH, str(request.timeout) if request.timeout else None))
+        rate_limit.bind(self.client_key)
+        usage.bind(self.client_key)
+        events: AsyncIterator[Dict[str, Any]] = get_agent_service().stream_chat(
+            message=request.message,
+            conversation_id=request.conversation_id,
+            model=request.model,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens
+        )
+        stream = deadline.iterate(events)
+        outcome, final = "completed", None
+        try:
+            async for event in stream:
+                await self.send({**event, "id": request.id})
+        except asyncio.CancelledError:
+            outcome, final = "cancelled", {"type": "cancelled"}
+        except DeadlineExceeded as e:
+            outcome, final = "timeout", {"type": "error", "status": 504, "detail": str(e)}
+        except Exception as e:
+            logger.error(f"WebSocket chat stream error: {e}")
+            outcome, final = "failed", {"type": "error", "status": 500, "detail": f"Chat processing failed: {str(e)}"}
+        finally:
+            # Close the upstream request before waiting on the client again:
+            # a stream cancelled while blocked on a full queue is still open
+            await stream.aclose()
+            await events.aclose()
+            self.streams.pop(request.id, None)
+        websocket_streams.inc(outcome)
+        if final is not None:
+            await self.send({**final, "id": request.id})
+
+
+websocket_connections = metrics.registry.gauge(
+    "websocket_connections", "Open WebSocket chat connections."
+)
+websocket_streams = metrics.registry.counter(
+    "websocket_streams_total", "WebSocket chat streams by outcome.", ("outcome",)
+)
@@ -0,0 +1,121 @@
+import time
+import random
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Ollama answers 503 when its queue is full and 429 when rate limited; both are
+# refusals before any work was done
+RETRYABLE_STATUS_CODES = {429, 502, 503}
+
+
+class CircuitOpenError(Exception):
+    """Raised when no generation path is currently allowed to run."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with single-probe half-open state.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls are skipped. Once ``recovery_timeout`` seconds have passed, one call
+    is let through as a probe: success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self.failures += 1
+            if error is not None:
+                self.last_error = f"{type(error).__name__}: {error}"
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Give up a half-open probe that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        """Record the outcome of the wrapped call on the breaker."""
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success()
+
+    def reset(self) -> None:
+        self.record_success()
+        self.last_error = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in_seconds": retry_in,
+            "last_error": self.last_error
+        }
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed generation can safely be retried.
+
+    Only failures where Ollama never started the generation qualify: the
+    connection could not be made, or the server refused the request outright.
+    Read timeouts and errors mid-response are not retried, since the work may
+    already be done (or still running).
+    """
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, ConnectionRefusedError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def backoff_delay(attempt: int, base: float) -> float:
+    """Full-jitter exponential backoff for retry ``attempt`` (0-based)."""
+    return random.uniform(0, base * (2 ** attempt))
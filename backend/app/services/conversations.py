@@ -0,0 +1,315 @@
+import uuid
+import threading
+from array import array
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.services.snapshots import SnapshotReader
+
+ROLES = ("user", "assistant", "system")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+
+class StoredMessage:
+    """A message in a conversation, with a stable id and creation time.
+
+    Conversations do not keep these around; they are built on demand from
+    the compact buffer when a message is returned.
+    """
+
+    __slots__ = ("id", "role", "content", "timestamp")
+
+    def __init__(self, message_id: int, role: str, content: str, timestamp: Optional[datetime] = None):
+        self.id = message_id
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp or datetime.now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp
+        }
+
+
+class MessageBuffer:
+    """Ring buffer of the most recent messages, stored column by column.
+
+    Each message costs a role byte, an 8-byte timestamp and its UTF-8
+    content. Storage doubles as needed up to ``maxlen``; after that the
+    oldest message is overwritten.
+    """
+
+    __slots__ = ("maxlen", "_roles", "_timestamps", "_contents", "_start", "_count")
+
+    def __init__(self, maxlen: int):
+        self.maxlen = max(1, maxlen)
+        self._roles = bytearray()
+        self._timestamps = array("d")
+        self._contents: List[Optional[bytes]] = []
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _grow(self) -> None:
+        capacity = min(max(4, 2 * len(self._roles)), self.maxlen)
+        order = [(self._start + i) % len(self._roles) for i in range(self._count)] if self._roles else []
+        padding = capacity - self._count
+        self._roles = bytearray(self._roles[i] for i in order) + bytearray(padding)
+        self._timestamps = array("d", [self._timestamps[i] for i in order] + [0.0] * padding)
+        self._contents = [self._contents[i] for i in order] + [None] * padding
+        self._start = 0
+
+    def append(self, role: int, timestamp: float, content: bytes) -> Optional[bytes]:
+        """Add a message, returning the content of the message it evicted, if any."""
+        if self._count == len(self._roles) and len(self._roles) < self.maxlen:
+            self._grow()
+        capacity = len(self._roles)
+        evicted = None
+        if self._count < capacity:
+            slot = (self._start + self._count) % capacity
+            self._count += 1
+        else:
+            slot = self._start
+            evicted = self._contents[slot]
+            self._start = (self._start + 1) % capacity
+        self._roles[slot] = role
+        self._timestamps[slot] = timestamp
+        self._contents[slot] = content
+        return evicted
+
+    def get(self, index: int) -> Tuple[int, float, bytes]:
+        """Role code, timestamp and content of the ``index``-th oldest message."""
+        slot = (self._start + index) % len(self._roles)
+        return self._roles[slot], self._timestamps[slot], self._contents[slot]
+
+
+class Conversation:
+    """Message log for one conversation, keeping the most recent messages.
+
+    Message ids increase by one per message, so they double as pagination
+    cursors and the last id identifies the conversation's current version.
+    Messages live in a compact ``MessageBuffer`` of at most
+    ``CONVERSATION_MAX_MESSAGES``; ``StoredMessage`` and LangChain message
+    objects are only built when messages are read.
+    """
+
+    __slots__ = ("conversation_id", "created_at", "_next_id", "_epoch", "_buffer", "_content_bytes")
+
+    def __init__(self, conversation_id: str, max_messages: Optional[int] = None):
+        self.conversation_id = conversation_id
+        self.created_at = datetime.now()
+        self._next_id = 1
+        # Distinguishes this conversation from an earlier one with the same id
+        # that was cleared, so ETags never repeat across a clear
+        self._epoch = uuid.uuid4().hex[:8]
+        self._buffer = MessageBuffer(max_messages or settings.conversation_max_messages)
+        self._content_bytes = 0
+
+    def add(self, role: str, content: str, timestamp: Optional[datetime] = None) -> StoredMessage:
+        message = StoredMessage(self._next_id, role, content, timestamp)
+        encoded = content.encode()
+        evicted = self._buffer.append(ROLE_CODES[role], message.timestamp.timestamp(), encoded)
+        self._content_bytes += len(encoded) - (len(evicted) if evicted is not None else 0)
+        self._next_id += 1
+        return message
+
+    def add_user_message(self, content: str) -> StoredMessage:
+        return self.add("user", content)
+
+    def add_ai_message(self, content: str) -> StoredMessage:
+        return self.add("assistant", content)
+
+    def _message(self, index: int) -> StoredMessage:
+        role, timestamp, content = self._buffer.get(index)
+        return StoredMessage(self.first_id + index, ROLES[role], content.decode(), datetime.fromtimestamp(timestamp))
+
+    @property
+    def messages(self) -> List[StoredMessage]:
+        """All retained messages, oldest first (built on each access)."""
+        return [self._message(i) for i in range(len(self._buffer))]
+
+    def recent(self, count: int) -> List[StoredMessage]:
+        """The newest ``count`` messages, oldest first."""
+        total = len(self._buffer)
+        return [self._message(i) for i in range(max(0, total - count), total)]
+
+    @property
+    def message_count(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def content_bytes(self) -> int:
+        """UTF-8 size of the retained messages' content."""
+        return self._content_bytes
+
+    @property
+    def first_id(self) -> int:
+        return self._next_id - len(self._buffer)
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    @property
+    def updated_at(self) -> datetime:
+        if not self._buffer:
+            return self.created_at
+        return datetime.fromtimestamp(self._buffer.get(len(self._buffer) - 1)[1])
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self._epoch}-{self.last_id}"'
+
+    def page(
+        self,
+        limit: int,
+        before: Optional[int] = None,
+        after: Optional[int] = None
+    ) -> Tuple[List[StoredMessage], bool]:
+        """Return up to ``limit`` messages between the cursors and whether more remain.
+
+        With ``after`` the page starts right after that id (oldest first), which
+        is what polling clients want; otherwise it ends right before ``before``
+        (or at the newest message), which is how older history is paged in.
+        """
+        total = len(self._buffer)
+        # Retained ids are contiguous, so cursors map straight to buffer positions
+        start = min(max(after - self.first_id + 1, 0), total) if after is not None else 0
+        end = min(max(before - self.first_id, 0), total) if before is not None else total
+        if end <= start:
+            return [], False
+        if after is not None:
+            return [self._message(i) for i in range(start, min(end, start + limit))], end - start > limit
+        return [self._message(i) for i in range(max(start, end - limit), end)], end - start > limit
+
+    def to_record(self) -> Dict[str, Any]:
+        """Compact, JSON-serializable form used by snapshots and exports."""
+        first_id = self.first_id
+        messages = []
+        for i in range(len(self._buffer)):
+            role, timestamp, content = self._buffer.get(i)
+            messages.append([first_id + i, ROLES[role], content.decode(), round(timestamp, 3)])
+        return {
+            "id": self.conversation_id,
+            "epoch": self._epoch,
+            "created": round(self.created_at.timestamp(), 3),
+            "next_id": self._next_id,
+            "messages": messages
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Conversation":
+        """Rebuild a conversation from ``to_record`` output."""
+        conversation = cls(record["id"])
+        conversation._epoch = record["epoch"]
+        conversation.created_at = datetime.fromtimestamp(record["created"])
+        for _, role, content, ts in record["messages"]:
+            conversation.add(role, content, datetime.fromtimestamp(ts))
+        conversation._next_id = record["next_id"]
+        return conversation
+
+    def to_langchain_messages(self, count: Optional[int] = None) -> List[Any]:
+        """Convert the newest ``count`` (default all) messages to LangChain messages for prompt building."""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        total = len(self._buffer)
+        messages = []
+        for i in range(max(0, total - count) if count is not None else 0, total):
+            role, _, content = self._buffer.get(i)
+            message_class = HumanMessage if role == ROLE_CODES["user"] else AIMessage
+            messages.append(message_class(content=content.decode()))
+        return messages
+
+
+class ConversationStore(MutableMapping):
+    """Live conversations, backed by a restored snapshot.
+
+    Conversations from a snapshot are only decoded when first accessed;
+    until then they are an entry in the snapshot's index. A conversation
+    created before the snapshot finished loading shadows the restored one.
+    """
+
+    def __init__(self):
+        self._live: Dict[str, Conversation] = {}
+        self._restored: Optional["SnapshotReader"] = None
+        self._lock = threading.Lock()
+
+    def attach(self, reader: "SnapshotReader") -> None:
+        """Serve not-yet-live conversations from ``reader``."""
+        # Under the lock, so a conversation created meanwhile cannot be
+        # both live and in the reader (and listed twice)
+        with self._lock:
+            for conversation_id in list(self._live):
+                reader.discard(conversation_id)
+            self._restored = reader
+
+    @property
+    def restored(self) -> Optional["SnapshotReader"]:
+        return self._restored
+
+    def _materialize(self, conversation_id: str) -> Optional[Conversation]:
+        reader = self._restored
+        if reader is None or conversation_id not in reader:
+            return None
+        with self._lock:
+            conversation = self._live.get(conversation_id)
+            if conversation is None:
+                conversation = reader.read(conversation_id)
+                self._live[conversation_id] = conversation
+            reader.discard(conversation_id)
+        return conversation
+
+    def __getitem__(self, conversation_id: str) -> Conversation:
+        conversation = self._live.get(conversation_id)
+        if conversation is None:
+            conversation = self._materialize(conversation_id)
+            if conversation is None:
+                raise KeyError(conversation_id)
+        return conversation
+
+    def __setitem__(self, conversation_id: str, conversation: Conversation) -> None:
+        with self._lock:
+            self._live[conversation_id] = conversation
+            if self._restored is not None:
+                self._restored.discard(conversation_id)
+
+    def __delitem__(self, conversation_id: str) -> None:
+        with self._lock:
+            restored = self._restored is not None and conversation_id in self._restored
+            if restored:
+                self._restored.discard(conversation_id)
+            if self._live.pop(conversation_id, None) is None and not restored:
+                raise KeyError(conversation_id)
+
+    def __contains__(self, conversation_id: object) -> bool:
+        return conversation_id in self._live or (self._restored is not None and conversation_id in self._restored)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._live)
+        if self._restored is not None:
+            yield from self._restored.ids()
+
+    def __len__(self) -> int:
+        pending = len(self._restored) if self._restored is not None else 0
+        return len(self._live) + pending
+
+    def live(self) -> Dict[str, Conversation]:
+        """Conversations that have been created or accessed in this process."""
+        return self._live
+
+    def clear(self) -> None:
+        self._live.clear()
+        self._restored = None
+
+
+# Global conversation store, shared by the agent service and snapshots
+conversation_store = ConversationStore()
@@ -0,0 +1,117 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterable, AsyncIterator, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Seconds a per-call timeout may run past the request deadline
+TIMEOUT_GRACE = 1.0
+
+
+class Deadline:
+    """Point in time by which a request's work has to be finished."""
+
+    __slots__ = ("budget", "started", "expires_at")
+
+    def __init__(self, budget: float, started: Optional[float] = None):
+        self.budget = budget
+        self.started = time.monotonic() if started is None else started
+        self.expires_at = self.started + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is cancelled because its deadline passed."""
+
+    def __init__(self, deadline: Deadline):
+        super().__init__(f"Deadline of {deadline.budget:g}s exceeded after {deadline.elapsed():.2f}s")
+        self.deadline = deadline
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def budget_for(path: str, requested: Optional[str] = None) -> float:
+    """Seconds allowed for a request: the client's X-Request-Timeout if valid, else the route default."""
+    budget = settings.request_timeout_routes.get(path, settings.request_timeout_default)
+    if requested:
+        try:
+            value = float(requested)
+        except ValueError:
+            value = 0.0
+        if value > 0:
+            budget = value
+    return min(budget, settings.request_timeout_max)
+
+
+def start(budget: float) -> Deadline:
+    """Set the deadline for the current request or job."""
+    deadline = Deadline(budget)
+    _current_deadline.set(deadline)
+    return deadline
+
+
+def bind(deadline: Optional[Deadline]) -> None:
+    _current_deadline.set(deadline)
+
+
+def current() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def timeout(default: float) -> float:
+    """A timeout for one call: ``default``, shortened to what is left of the deadline."""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    # A little past the deadline, so enforce() cancels the call first and an
+    # expired deadline is never counted as an Ollama failure by the breakers
+    return min(default, max(0.0, deadline.remaining()) + TIMEOUT_GRACE)
+
+
+@asynccontextmanager
+async def enforce() -> AsyncIterator[None]:
+    """Cancel the enclosed work when the current deadline passes.
+
+    Raises DeadlineExceeded instead of the cancellation; a no-op when no
+    deadline is set.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        yield
+        return
+    try:
+        async with asyncio.timeout(deadline.remaining()) as scope:
+            yield
+    except TimeoutError:
+        if scope.expired():
+            raise DeadlineExceeded(deadline) from None
+        raise
+
+
+async def iterate(iterable: AsyncIterable[T]) -> AsyncIterator[T]:
+    """Iterate under the current deadline, for use inside async generators.
+
+    Only the wait for each item is covered, so the consumer's own awaits
+    between items are never cancelled from under it.
+    """
+    iterator = iterable.__aiter__()
+    while True:
+        async with enforce():
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+        yield item
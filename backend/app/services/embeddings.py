@@ -0,0 +1,217 @@
+import sys
+import base64
+import asyncio
+import hashlib
+import contextvars
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.services import metrics, timing
+from app.services.runtime_config import runtime_config
+
+# (model, sha256 of the input text)
+CacheKey = Tuple[str, str]
+
+
+def pack(vector: List[float]) -> bytes:
+    """Store a vector as little-endian float32 bytes, a quarter of a float list's size."""
+    packed = array("f", vector)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack(data: bytes) -> List[float]:
+    values = array("f", data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
+
+
+def encode_base64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+class _Batch:
+    """Inputs for one model waiting to be sent upstream together."""
+
+    __slots__ = ("model", "entries", "timer")
+
+    def __init__(self, model: str):
+        self.model = model
+        self.entries: Dict[CacheKey, Tuple[str, asyncio.Future]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class EmbeddingService:
+    """Deduplicating, caching micro-batcher in front of Ollama's /api/embed.
+
+    Inputs are keyed by model and content hash. Cached vectors are returned
+    immediately; identical inputs already on their way upstream share one
+    future; everything else joins the model's open batch, which is sent as a
+    single upstream call after ``batch_window`` seconds or once it holds
+    ``max_batch_size`` inputs, whichever comes first. Vectors are cached as
+    packed float32 bytes in a bounded LRU.
+    """
+
+    def __init__(self, cache_size: int, batch_window: float, max_batch_size: int):
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._cache: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._open: Dict[str, _Batch] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def cache_get(self, key: CacheKey) -> Optional[bytes]:
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+        return data
+
+    def cache_put(self, key: CacheKey, data: bytes) -> None:
+        self._cache[key] = data
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
+
+    def configure(self, cache_size: int, batch_window: float, max_batch_size: int) -> None:
+        """Apply new limits; open batches keep the window they started with."""
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        # Futures and timers belong to the loop they were created on
+        if self._loop is not loop:
+            self._open.clear()
+            self._inflight.clear()
+            self._tasks.clear()
+            self._loop = loop
+        return loop
+
+    async def embed(self, texts: List[str], model: Optional[str] = None) -> List[bytes]:
+        """Return packed float32 vectors for ``texts``, in order."""
+        model = model or settings.rag_embedding_model
+        loop = self._bind_loop()
+        results: List[Optional[bytes]] = [None] * len(texts)
+        waiting: List[Tuple[int, asyncio.Future]] = []
+        hits = 0
+
+        for i, text in enumerate(texts):
+            key = (model, hashlib.sha256(text.encode()).hexdigest())
+            cached = self.cache_get(key)
+            if cached is not None:
+                results[i] = cached
+                hits += 1
+                continue
+            future = self._inflight.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._inflight[key] = future
+                self._enqueue(loop, model, key, text, future)
+            waiting.append((i, future))
+
+        embedding_cache.inc("hit", amount=hits)
+        embedding_cache.inc("miss", amount=len(waiting))
+        if waiting:
+            with timing.span("embed"):
+                # Shielded so a caller giving up never cancels a future other callers share
+                vectors = await asyncio.gather(*(asyncio.shield(future) for _, future in waiting))
+            for (i, _), vector in zip(waiting, vectors):
+                results[i] = vector
+        return results
+
+    def _enqueue(self, loop: asyncio.AbstractEventLoop, model: str, key: CacheKey, text: str, future: asyncio.Future) -> None:
+        batch = self._open.get(model)
+        if batch is None:
+            batch = self._open[model] = _Batch(model)
+            batch.timer = loop.call_later(self.batch_window, self._dispatch, batch)
+        batch.entries[key] = (text, future)
+        if len(batch.entries) >= self.max_batch_size:
+            batch.timer.cancel()
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: _Batch) -> None:
+        if self._open.get(batch.model) is batch:
+            del self._open[batch.model]
+        # A fresh context, so the upstream call is not bound to the deadline
+        # of whichever caller happened to open the batch
+        task = self._loop.create_task(self._send(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: _Batch) -> None:
+        from app.services.langchain_agent import get_agent_service
+
+        keys = list(batch.entries)
+        texts = [batch.entries[key][0] for key in keys]
+        embedding_batch_size.observe(len(texts))
+        try:
+            vectors = await get_agent_service().embed(texts, batch.model)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+            for key, vector in zip(keys, vectors):
+                data = pack(vector)
+                self.cache_put(key, data)
+                future = batch.entries[key][1]
+                if not future.done():
+                    future.set_result(data)
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} inputs failed: {e}")
+            for key in keys:
+                future = batch.entries[key][1]
+                if not future.done():
+                    future.set_exception(e)
+                    # Retrieved here so callers that gave up don't leave it unobserved
+                    future.exception()
+        finally:
+            for key in keys:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "cache_size": self.cache_size,
+            "open_batches": len(self._open),
+            "inflight": len(self._inflight)
+        }
+
+
+embedding_cache = metrics.registry.counter(
+    "embedding_cache_requests_total", "Embedding inputs answered from the cache (hit) or not (miss).", ("result",)
+)
+embedding_batch_size = metrics.registry.histogram(
+    "embedding_upstream_batch_size", "Inputs per upstream /api/embed call.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+# Global embedding service instance
+embedding_service = EmbeddingService(
+    cache_size=settings.embedding_cache_size,
+    batch_window=settings.embedding_batch_window_ms / 1000,
+    max_batch_size=settings.embedding_max_batch_size
+)
+
+
+def _apply_settings() -> None:
+    embedding_service.configure(
+        cache_size=settings.embedding_cache_size,
+        batch_window=settings.embedding_batch_window_ms / 1000,
+        max_batch_size=settings.embedding_max_batch_size
+    )
+
+
+runtime_config.on_change(
+    ("embedding_cache_size", "embedding_batch_window_ms", "embedding_max_batch_size"), _apply_settings
+)
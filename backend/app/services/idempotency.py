@@ -0,0 +1,162 @@
+import gzip
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from starlette.responses import Response
+
+from app.config import settings
+from app.responses import brotli
+from app.services import metrics
+
+NEW = "new"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+MISMATCH = "mismatch"
+
+# Per-request headers that must not be replayed
+_SKIPPED_HEADERS = ("content-length", "content-encoding", "vary", "server-timing", "x-profile-id")
+
+
+class StoredResponse:
+    """A completed response, kept to answer retries with the same key."""
+
+    __slots__ = ("status_code", "headers", "body")
+
+    def __init__(self, status_code: int, headers: List[Tuple[str, str]], body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    @classmethod
+    def capture(cls, status_code: int, headers, body: bytes) -> "StoredResponse":
+        """Keep a response, decoding its body so any client can be served it."""
+        encoding = headers.get("content-encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "br" and brotli is not None:
+            body = brotli.decompress(body)
+        # Raw headers keep repeated ones (Set-Cookie, Link) that items() would merge
+        raw = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers.raw]
+        kept = [
+            (name, value) for name, value in raw
+            if name.lower() not in _SKIPPED_HEADERS and not name.lower().startswith("ratelimit")
+        ]
+        return cls(status_code, kept, body)
+
+    def replay(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        for name, value in self.headers:
+            response.headers.append(name, value)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+
+class IdempotencyEntry:
+    """One idempotency key: the request it belongs to and, once done, its response."""
+
+    __slots__ = ("fingerprint", "response", "expires_at", "_done")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.response: Optional[StoredResponse] = None
+        self.expires_at = float("inf")
+        self._done = asyncio.Event()
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+
+class IdempotencyStore:
+    """Bounded TTL store of idempotency keys, in process.
+
+    The first request with a key runs; requests with the same key that
+    arrive while it runs wait for it, and later ones within ``ttl`` get its
+    stored response. Only successful responses are stored: after a failure
+    the key is released and the next retry runs again. At most
+    ``max_entries`` completed keys are kept, oldest evicted first.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, IdempotencyEntry]" = OrderedDict()
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else settings.idempotency_ttl
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries if self._max_entries is not None else settings.idempotency_max_entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def begin(self, key: str, fingerprint: str, now: Optional[float] = None) -> Tuple[str, IdempotencyEntry]:
+        """Claim ``key`` for a request, or return the entry already holding it."""
+        now = time.monotonic() if now is None else now
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            entry = IdempotencyEntry(fingerprint)
+            self._entries[key] = entry
+            return NEW, entry
+        if entry.fingerprint != fingerprint:
+            return MISMATCH, entry
+        return (DONE if entry.response is not None else IN_FLIGHT), entry
+
+    def complete(self, key: str, entry: IdempotencyEntry, response: Optional[StoredResponse], now: Optional[float] = None) -> None:
+        """Store the response for ``key``, or release the key when there is none."""
+        now = time.monotonic() if now is None else now
+        if response is None:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        else:
+            entry.response = response
+            entry.expires_at = now + self.ttl
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict(now)
+        entry._done.set()
+
+    def _evict(self, now: float) -> None:
+        # Completed entries are kept in completion order, so the ones that
+        # expire first come first; in-flight entries are never evicted
+        stale = []
+        excess = len(self._entries) - self.max_entries
+        for key, entry in self._entries.items():
+            if entry.response is None:
+                continue
+            if entry.expires_at > now and excess <= 0:
+                break
+            stale.append(key)
+            excess -= 1
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def scope_key(client_key: str, path: str, idempotency_key: str) -> str:
+    """Keys are only unique per client and route."""
+    return f"{client_key} {path} {idempotency_key}"
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+idempotency_requests = metrics.registry.counter(
+    "idempotency_requests_total",
+    "Requests with an Idempotency-Key by outcome (new, attached, replayed or mismatch).",
+    ("outcome",)
+)
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,282 @@
+import time
+import uuid
+import asyncio
+import contextvars
+from typing import Dict, Any, List, Optional, Set
+from datetime import datetime
+
+from loguru import logger
+
+from app.config import settings
+from app.services import deadline, rate_limit, usage
+from app.services.deadline import DeadlineExceeded
+from app.services.langchain_agent import get_agent_service
+from app.services.runtime_config import runtime_config
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class AgentJob:
+    """A single queued agent task and its progress."""
+
+    __slots__ = (
+        "job_id", "request", "status", "steps", "progress", "result", "error",
+        "created_at", "started_at", "finished_at", "expires_at", "task", "client_key",
+        "tenant", "deadline"
+    )
+
+    def __init__(self, request: Dict[str, Any]):
+        self.job_id = str(uuid.uuid4())
+        self.request = request
+        # Rate limit key of the submitter, charged for the job's generations
+        self.client_key = rate_limit.current_key()
+        self.tenant = usage.current_tenant()
+        # Deadline of the submitting request, so time spent queued counts against it
+        self.deadline = deadline.current()
+        self.status = "queued"
+        self.steps: List[Dict[str, Any]] = []
+        self.progress: Dict[str, Any] = {
+            "iteration": 0,
+            "max_iterations": request.get("max_iterations", 10),
+            "steps_completed": 0,
+            "last_action": None
+        }
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.expires_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class AgentJobManager:
+    """Bounded in-process worker pool for asynchronous agent jobs."""
+
+    def __init__(self, workers: int, queue_size: int, result_ttl: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, AgentJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._idle: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        """Start the worker pool on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # Unbounded; submit() enforces queue_size so it can be resized
+            self._queue = asyncio.Queue()
+            self._worker_tasks = []
+            self._loop = loop
+            self._add_workers()
+            logger.info(f"Started {self.workers} agent job workers (queue size {self.queue_size})")
+        return self._queue
+
+    def _add_workers(self) -> None:
+        # Workers run in a fresh context so they don't inherit request-scoped state
+        for _ in range(len(self._worker_tasks), self.workers):
+            self._worker_tasks.append(asyncio.create_task(self._worker(), context=contextvars.Context()))
+
+    def resize(self, workers: int, queue_size: int, result_ttl: int) -> None:
+        """Apply new pool limits without interrupting running jobs.
+
+        Extra workers are started at once. Surplus idle workers stop now and
+        busy ones once their current job is done. Jobs already queued beyond
+        a smaller ``queue_size`` stay queued.
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        if self._queue is not None:
+            self._add_workers()
+            for worker in list(self._idle)[:max(0, len(self._worker_tasks) - workers)]:
+                # Waiting on the queue, so no job is lost
+                worker.cancel()
+                self._worker_tasks.remove(worker)
+                self._idle.discard(worker)
+        logger.info(f"Resized agent job pool to {workers} workers (queue size {queue_size})")
+
+    async def start(self) -> None:
+        """Start the worker pool."""
+        self._ensure_workers()
+
+    async def stop(self) -> None:
+        """Cancel running jobs and stop the worker pool."""
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._idle.clear()
+        self._queue = None
+        self._loop = None
+
+    def _purge_expired(self) -> None:
+        """Drop finished jobs whose retention period has passed."""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.expires_at is not None and job.expires_at <= now
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def _finish(self, job: AgentJob, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now()
+        job.expires_at = time.monotonic() + self.result_ttl
+
+    async def submit(self, request: Dict[str, Any]) -> AgentJob:
+        """Queue an agent task, raising JobQueueFullError if there is no room."""
+        self._purge_expired()
+        queue = self._ensure_workers()
+        if queue.qsize() >= self.queue_size:
+            raise JobQueueFullError(f"Agent job queue is full ({self.queue_size} jobs)")
+        job = AgentJob(request)
+        queue.put_nowait(job)
+        self.jobs[job.job_id] = job
+        logger.debug("Queued agent job {}", job.job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[AgentJob]:
+        """Look up a job by id."""
+        self._purge_expired()
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[AgentJob]:
+        """Cancel a queued or running job."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        if job.task is not None:
+            job.task.cancel()
+        self._finish(job, "cancelled")
+        logger.info(f"Cancelled agent job {job.job_id}")
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize queue and job state."""
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts
+        }
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        worker = asyncio.current_task()
+        while True:
+            if len(self._worker_tasks) > self.workers:
+                # The pool was shrunk while this worker was busy
+                self._worker_tasks.remove(worker)
+                return
+            self._idle.add(worker)
+            try:
+                job = await queue.get()
+            finally:
+                self._idle.discard(worker)
+            try:
+                if job.status != "queued":
+                    continue
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    # Swallow job cancellations, but stop if the worker itself is cancelled
+                    if asyncio.current_task().cancelling():
+                        raise
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: AgentJob) -> None:
+        rate_limit.bind(job.client_key)
+        usage.bind(job.tenant)
+        deadline.bind(job.deadline)
+        job.status = "running"
+        job.started_at = datetime.now()
+        request = job.request
+        try:
+            if job.deadline is not None and job.deadline.expired():
+                raise DeadlineExceeded(job.deadline)
+            async with deadline.enforce():
+                await self._consume(job, request)
+            self._finish(job, "succeeded")
+        except asyncio.CancelledError:
+            if not job.done:
+                self._finish(job, "cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Agent job {job.job_id} failed: {e}")
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    async def _consume(self, job: AgentJob, request: Dict[str, Any]) -> None:
+        """Run the agent and record its events on the job."""
+        async for event in get_agent_service().stream_agent(
+            task=request["task"],
+            agent_type=request.get("agent_type", "default"),
+            tools=request.get("tools"),
+            max_iterations=request.get("max_iterations", 10)
+        ):
+            if event["type"] == "token":
+                job.progress["iteration"] = event["iteration"]
+            elif "step" in event:
+                job.steps.append({k: v for k, v in event.items() if k != "type"})
+                job.progress["steps_completed"] = len(job.steps)
+                job.progress["last_action"] = event["action"]
+            elif event["type"] == "end":
+                job.result = {
+                    "result": event["result"],
+                    "steps": job.steps,
+                    "agent_type": event["agent_type"],
+                    "timestamp": datetime.now(),
+                    "metadata": {
+                        **event["metadata"],
+                        "iterations": event["iterations"],
+                        "elapsed_ms": event["elapsed_ms"],
+                        "job_id": job.job_id
+                    }
+                }
+
+
+# Global job manager instance
+job_manager = AgentJobManager(
+    workers=settings.agent_job_workers,
+    queue_size=settings.agent_job_queue_size,
+    result_ttl=settings.agent_job_result_ttl
+)
+
+
+def _apply_settings() -> None:
+    job_manager.resize(
+        workers=settings.agent_job_workers,
+        queue_size=settings.agent_job_queue_size,
+        result_ttl=settings.agent_job_result_ttl
+    )
+
+
+runtime_config.on_change(("agent_job_workers", "agent_job_queue_size", "agent_job_result_ttl"), _apply_settings)
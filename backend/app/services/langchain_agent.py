@@ -1,40 +1,78 @@
+import re
+import json
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, AsyncIterator, Set, Tuple
 from datetime import datetime
 
-from langchain_ollama import OllamaLLM
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.schema import HumanMessage, AIMessage
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain.tools import Tool
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import BaseMessage
-from pydantic import BaseModel
+import httpx
 from loguru import logger
 
 from app.config import settings
+from app.services import deadline, metrics, rate_limit, timing
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, backoff_delay, is_retryable
+from app.services.conversations import Conversation, ConversationStore, conversation_store
+from app.services.model_router import model_router, observe_request
+from app.services.runtime_config import runtime_config
+from app.services.usage import usage_recorder
 
+if TYPE_CHECKING:
+    # LangChain is imported lazily: it dominates import time and is only
+    # needed once a request actually reaches the agent
+    from langchain_ollama import OllamaLLM
+    from langchain.tools import Tool
 
-class ConversationState(BaseModel):
-    """State for conversation management."""
-    messages: List[BaseMessage] = []
-    conversation_id: str = ""
-    metadata: Dict[str, Any] = {}
+
+class OllamaHTTPError(Exception):
+    """Non-200 response from the Ollama HTTP API."""
+    
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"HTTP {status_code}: {body}")
+        self.status_code = status_code
 
 
 class OllamaAgentService:
-    """Enhanced LangChain agent service with LangGraph integration."""
+    """Enhanced LangChain agent service with a streaming ReAct-style tool loop."""
     
     def __init__(self):
-        self.llm = self._initialize_llm()
-        self.memory_store: Dict[str, ConversationBufferWindowMemory] = {}
+        self._llm: Optional["OllamaLLM"] = None
+        self._llm_lock = threading.Lock()
+        self.memory_store: ConversationStore = conversation_store
         self.tools = self._initialize_tools()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._compare_slots: Optional[asyncio.Semaphore] = None
+        self._compare_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        # HTTP clients replaced by reconfigure() that requests may still be using,
+        # and the timers that close them
+        self._retiring_clients: Set[httpx.AsyncClient] = set()
+        self._retiring: Set[asyncio.Task] = set()
+        self.breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                recovery_timeout=settings.circuit_breaker_recovery_timeout
+            )
+            for name in ("langchain", "http")
+        }
         logger.info("OllamaAgentService initialized successfully")
     
-    def _initialize_llm(self) -> OllamaLLM:
+    @property
+    def llm(self) -> "OllamaLLM":
+        """The LangChain LLM, created on first use."""
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._initialize_llm()
+        return self._llm
+    
+    def _initialize_llm(self) -> "OllamaLLM":
         """Initialize the Ollama LLM."""
         try:
+            from langchain_ollama import OllamaLLM
+            
             llm = OllamaLLM(
                 base_url=settings.ollama_base_url,
                 model=settings.ollama_model,
@@ -48,8 +86,10 @@ class OllamaAgentService:
             logger.error(f"Failed to initialize LLM: {e}")
             raise
     
-    def _initialize_tools(self) -> List[Tool]:
+    def _initialize_tools(self) -> List["Tool"]:
         """Initialize available tools for the agent."""
+        from langchain.tools import Tool
+        
         tools = [
             Tool(
                 name="calculator",
@@ -65,6 +105,12 @@ class OllamaAgentService:
                 name="timestamp",
                 description="Get current timestamp and date information.",
                 func=self._timestamp_tool
+            ),
+            Tool(
+                name="document_search",
+                description="Search the ingested internal documents for passages relevant to a question. Input should be a search query.",
+                func=None,
+                coroutine=self._document_search_tool
             )
         ]
         logger.info(f"Initialized {len(tools)} tools for agent")
@@ -113,14 +159,25 @@ class OllamaAgentService:
         now = datetime.now()
         return f"Current timestamp: {now.strftime('%Y-%m-%d %H:%M:%S')} UTC"
     
-    def get_memory(self, conversation_id: str) -> ConversationBufferWindowMemory:
+    async def _document_search_tool(self, query: str) -> str:
+        """Retrieve the ingested document chunks most relevant to the query."""
+        from app.services.rag import get_document_store
+        
+        try:
+            hits = await get_document_store().search(query)
+            if not hits:
+                return "No relevant documents found."
+            return "\n\n".join(
+                f"[{i}] {hit['source'] or hit['document_id']} (score {hit['score']}):\n{hit['text']}"
+                for i, hit in enumerate(hits, 1)
+            )
+        except Exception as e:
+            return f"Error searching documents: {str(e)}"
+    
+    def get_memory(self, conversation_id: str) -> Conversation:
         """Get or create memory for a conversation."""
         if conversation_id not in self.memory_store:
-            self.memory_store[conversation_id] = ConversationBufferWindowMemory(
-                k=10,  # Keep last 10 exchanges
-                return_messages=True,
-                memory_key="chat_history"
-            )
+            self.memory_store[conversation_id] = Conversation(conversation_id)
         return self.memory_store[conversation_id]
     
     async def chat(
@@ -128,233 +185,764 @@ class OllamaAgentService:
         message: str,
         conversation_id: Optional[str] = None,
         model: Optional[str] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        include_timings: bool = False
     ) -> Dict[str, Any]:
         """Process a chat message."""
         try:
             if not conversation_id:
                 conversation_id = str(uuid.uuid4())
             
-            # Get conversation memory
-            memory = self.get_memory(conversation_id)
-            
-            # Update LLM temperature if specified
-            if hasattr(self.llm, 'temperature'):
-                self.llm.temperature = temperature
-            
-            # Create prompt template
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are a helpful AI assistant powered by Ollama. You have access to various tools to help answer questions and perform tasks."),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}")
-            ])
-            
-            # Add user message to memory
-            memory.chat_memory.add_user_message(message)
+            with timing.span("prompt"):
+                # Get conversation memory
+                memory = self.get_memory(conversation_id)
+                
+                # Pick the model before the new message joins the history
+                decision = model_router.route(message, memory, requested_model=model)
+                model_name = decision.model if decision is not None else model or settings.ollama_model
+                
+                # Update LLM temperature if specified
+                if hasattr(self.llm, 'temperature'):
+                    self.llm.temperature = temperature
+                
+                # Create prompt template
+                from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+                
+                prompt = ChatPromptTemplate.from_messages([
+                    ("system", "You are a helpful AI assistant powered by Ollama. You have access to various tools to help answer questions and perform tasks."),
+                    MessagesPlaceholder(variable_name="chat_history"),
+                    ("human", "{input}")
+                ])
+                
+                # Add user message to memory
+                memory.add_user_message(message)
             
             # Generate response
-            response = await self._generate_response(prompt, message, memory)
+            started = time.perf_counter()
+            with timing.span("generate"):
+                response = await self._generate_response(prompt, message, memory, model_name)
+            observe_request(model_name, "chat", time.perf_counter() - started)
             
             # Add AI response to memory
-            memory.chat_memory.add_ai_message(response)
+            memory.add_ai_message(response)
+            
+            metadata = {
+                "temperature": temperature,
+                "memory_length": memory.message_count
+            }
+            if decision is not None:
+                metadata["routing"] = decision.to_dict()
+            timings = timing.current()
+            if include_timings and timings is not None:
+                metadata["timings"] = timings.to_dict()
             
             return {
                 "message": response,
                 "conversation_id": conversation_id,
-                "model_used": model or settings.ollama_model,
+                "model_used": model_name,
                 "timestamp": datetime.now(),
-                "metadata": {
-                    "temperature": temperature,
-                    "memory_length": len(memory.chat_memory.messages)
-                }
+                "metadata": metadata
             }
         except Exception as e:
             logger.error(f"Error in chat: {e}")
             raise
     
-    async def _generate_response(self, prompt, message: str, memory) -> str:
-        """Generate response using the LLM."""
+    async def stream_chat(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer a chat message, yielding start, token and end events.
+
+        The exchange is added to the conversation only once the answer is
+        complete, so a cancelled or failed stream leaves the history as it was.
+        """
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        memory = self.get_memory(conversation_id)
+        decision = model_router.route(message, memory, requested_model=model)
+        model_name = decision.model if decision is not None else model or settings.ollama_model
+        prompt = self._build_chat_prompt(message, memory)
+        
+        start_event = {"type": "start", "conversation_id": conversation_id, "model": model_name}
+        if decision is not None:
+            start_event["routing"] = decision.to_dict()
+        yield start_event
+        
+        started = time.perf_counter()
+        response = ""
+        async for chunk in self._stream_generate(prompt, model=model_name, temperature=temperature, max_tokens=max_tokens):
+            token = chunk.get('response', '')
+            if token:
+                response += token
+                yield {"type": "token", "content": token}
+        observe_request(model_name, "chat", time.perf_counter() - started)
+        
+        memory.add_user_message(message)
+        memory.add_ai_message(response)
+        yield {
+            "type": "end",
+            "conversation_id": conversation_id,
+            "message": response,
+            "message_id": memory.last_id,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    
+    async def compare(
+        self,
+        message: str,
+        models: List[str],
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer one message with several models at once, yielding their events as they arrive.
+
+        Every event carries its ``model``. Each model yields ``start`` once it
+        gets one of the ``COMPARE_MAX_CONCURRENCY`` generation slots shared by
+        all comparisons, then ``token`` events, then ``end`` with its timings
+        or ``error``; a model failing does not stop the others. No
+        conversation history is read or written.
+        """
+        prompt = self._build_chat_prompt(message, Conversation("compare"))
+        slots = self._get_compare_slots()
+        events: asyncio.Queue = asyncio.Queue()
+        started = time.perf_counter()
+        
+        async def run(model: str) -> None:
+            try:
+                async with slots:
+                    generation_started = time.perf_counter()
+                    events.put_nowait({
+                        "type": "start", "model": model,
+                        "queued_ms": round((generation_started - started) * 1000, 2)
+                    })
+                    response = ""
+                    ttft = None
+                    final: Dict[str, Any] = {}
+                    async for chunk in self._stream_generate(prompt, model=model, temperature=temperature, max_tokens=max_tokens):
+                        token = chunk.get('response', '')
+                        if token:
+                            if ttft is None:
+                                ttft = time.perf_counter() - generation_started
+                            response += token
+                            events.put_nowait({"type": "token", "model": model, "content": token})
+                        if chunk.get('done'):
+                            final = chunk
+                    elapsed = time.perf_counter() - generation_started
+                observe_request(model, "compare", elapsed)
+                events.put_nowait(self._compare_result(model, response, final, ttft, elapsed))
+            except Exception as e:
+                logger.warning("Compare generation with {} failed: {}", model, e)
+                status_code = 503 if isinstance(e, CircuitOpenError) else 502
+                events.put_nowait({"type": "error", "model": model, "status": status_code, "detail": str(e)})
+        
+        tasks = [asyncio.create_task(run(model)) for model in models]
         try:
-            # Try LangChain first
+            remaining = len(tasks)
+            while remaining:
+                event = await events.get()
+                if event["type"] in ("end", "error"):
+                    remaining -= 1
+                yield event
+            yield {"type": "done", "duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+        finally:
+            # Abandoned comparisons stop their upstream generations
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    @staticmethod
+    def _compare_result(model: str, response: str, final: Dict[str, Any], ttft: Optional[float], elapsed: float) -> Dict[str, Any]:
+        """The ``end`` event of one model in a comparison."""
+        completion_tokens = final.get('eval_count', 0)
+        # Ollama's own decode time excludes prefill and transport
+        decode_seconds = final.get('eval_duration', 0) / 1e9 or elapsed - (ttft or 0.0)
+        return {
+            "type": "end",
+            "model": model,
+            "message": response,
+            "ttft_ms": round(ttft * 1000, 2) if ttft is not None else None,
+            "tokens_per_second": round(completion_tokens / decode_seconds, 2) if completion_tokens and decode_seconds > 0 else None,
+            "duration_ms": round(elapsed * 1000, 2),
+            "prompt_tokens": final.get('prompt_eval_count', 0),
+            "completion_tokens": completion_tokens
+        }
+    
+    def _get_compare_slots(self) -> asyncio.Semaphore:
+        """The generation slots shared by all comparisons on this event loop."""
+        loop = asyncio.get_running_loop()
+        if self._compare_slots is None or self._compare_slots_loop is not loop:
+            self._compare_slots = asyncio.Semaphore(settings.compare_max_concurrency)
+            self._compare_slots_loop = loop
+        return self._compare_slots
+    
+    async def _generate_response(self, prompt, message: str, memory: Conversation, model: Optional[str] = None) -> str:
+        """Generate a response on the first generation path whose circuit allows it.
+
+        LangChain is preferred; while its breaker is open requests go straight
+        to the direct HTTP path, and one request at a time probes LangChain
+        again once the recovery timeout has passed.
+        """
+        model = model or settings.ollama_model
+        paths = (
+            ("langchain", "langchain", lambda: self._generate_langchain(prompt, message, memory, model)),
+            ("http", "http_fallback", lambda: self._generate_http(message, memory, model))
+        )
+        last_error: Optional[Exception] = None
+        for breaker_name, path, generate in paths:
+            breaker = self.breakers[breaker_name]
+            if not breaker.allow_request():
+                logger.debug("Skipping {} generation path: circuit {}", path, breaker.state)
+                continue
             try:
-                # Format the prompt with chat history
-                formatted_prompt = prompt.format(
-                    input=message,
-                    chat_history=memory.chat_memory.messages
-                )
-                
-                # Generate response
-                response = self.llm.invoke(formatted_prompt)
-                return response
-            except Exception as langchain_error:
-                logger.warning(f"LangChain failed, using direct HTTP: {langchain_error}")
-                
-                # Fallback to direct HTTP call to Ollama
-                import requests
-                
-                # Format chat history for prompt
-                chat_context = ""
-                if hasattr(memory, 'chat_memory') and memory.chat_memory.messages:
-                    recent_messages = memory.chat_memory.messages[-6:]  # Last 3 exchanges
-                    for msg in recent_messages:
-                        role = "Human" if msg.type == "human" else "Assistant"
-                        chat_context += f"{role}: {msg.content}\n"
-                
-                # Create full prompt
-                full_prompt = f"""You are a helpful AI assistant powered by Ollama. You have access to various tools to help answer questions and perform tasks.
+                with breaker.call():
+                    text = await self._with_retries(path, generate)
+            except Exception as e:
+                metrics.generation_errors.inc(path)
+                if path == "langchain":
+                    logger.warning(f"LangChain failed, using direct HTTP: {e}")
+                last_error = e
+                continue
+            metrics.generation_path.inc(path)
+            return text
+        
+        error = last_error or CircuitOpenError("All generation paths are unavailable (circuits open)")
+        logger.error(f"Error generating response: {error}")
+        return f"I apologize, but I encountered an error: {str(error)}"
+    
+    async def _with_retries(self, path: str, generate) -> str:
+        """Run ``generate``, retrying with jittered backoff on retryable failures."""
+        for attempt in range(settings.generation_retries + 1):
+            try:
+                return await generate()
+            except Exception as e:
+                if attempt >= settings.generation_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, settings.generation_retry_backoff)
+                logger.warning("{} generation failed ({}), retrying in {:.2f}s", path, e, delay)
+                await asyncio.sleep(delay)
+    
+    async def _generate_langchain(self, prompt, message: str, memory: Conversation, model: str) -> str:
+        """Generate a response through LangChain."""
+        with timing.span("langchain"):
+            # Format the prompt with chat history
+            formatted_prompt = prompt.format(
+                input=message,
+                chat_history=memory.to_langchain_messages(settings.conversation_prompt_messages)
+            )
+            
+            # Generate response
+            started = time.perf_counter()
+            with metrics.track_inflight():
+                # Async so the request deadline can cancel it
+                result = await self.llm.agenerate([formatted_prompt], model=model)
+            generation = result.generations[0][0]
+            timing.add_ollama_phases(generation.generation_info or {})
+        metrics.observe_generation(
+            model,
+            generation.generation_info or {},
+            wall_seconds=time.perf_counter() - started
+        )
+        await rate_limit.charge_generation(generation.generation_info or {})
+        usage_recorder.record(model, generation.generation_info or {})
+        return generation.text
+    
+    @staticmethod
+    def _build_chat_prompt(message: str, memory: Conversation) -> str:
+        """Build a plain-text chat prompt from the recent history."""
+        # Format chat history for prompt
+        chat_context = ""
+        if memory.message_count:
+            recent_messages = memory.recent(6)  # Last 3 exchanges
+            for msg in recent_messages:
+                role = "Human" if msg.role == "user" else "Assistant"
+                chat_context += f"{role}: {msg.content}\n"
+        
+        return f"""You are a helpful AI assistant powered by Ollama. You have access to various tools to help answer questions and perform tasks.
 
 {chat_context}
 Human: {message}
 Assistant:"""
-                
-                # Make direct HTTP request to Ollama
-                payload = {
-                    'model': settings.ollama_model,
-                    'prompt': full_prompt,
-                    'stream': False,
-                    'options': {
-                        'temperature': 0.7,
-                        'num_predict': 1000
-                    }
-                }
-                
-                response = requests.post(
-                    f"{settings.ollama_base_url}/api/generate",
+    
+    async def _generate_http(self, message: str, memory: Conversation, model: str) -> str:
+        """Generate a response with a direct HTTP call to Ollama."""
+        # Make direct HTTP request to Ollama
+        payload = {
+            'model': model,
+            'prompt': self._build_chat_prompt(message, memory),
+            'stream': False,
+            'options': {
+                'temperature': 0.7,
+                'num_predict': 1000
+            }
+        }
+        
+        client = self._get_http_client()
+        started = time.perf_counter()
+        with timing.span("http_fallback"):
+            with metrics.track_inflight():
+                response = await client.post(
+                    "/api/generate",
                     json=payload,
-                    timeout=30
+                    timeout=deadline.timeout(settings.ollama_timeout)
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get('response', 'No response generated')
-                else:
-                    raise Exception(f"HTTP {response.status_code}: {response.text}")
+            
+            if response.status_code != 200:
+                raise OllamaHTTPError(response.status_code, response.text)
+            result = response.json()
+            timing.add_ollama_phases(result)
+        
+        metrics.observe_generation(
+            model, result, wall_seconds=time.perf_counter() - started
+        )
+        await rate_limit.charge_generation(result)
+        usage_recorder.record(model, result)
+        return result.get('response', 'No response generated')
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for direct Ollama calls."""
+        loop = asyncio.get_running_loop()
+        # A client is bound to the event loop it was created on
+        if self._http_client is None or self._http_client.is_closed or self._http_client_loop is not loop:
+            self._http_client = httpx.AsyncClient(
+                base_url=settings.ollama_base_url,
+                timeout=settings.ollama_timeout
+            )
+            self._http_client_loop = loop
+        return self._http_client
+    
+    async def embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """Embed a batch of texts with one Ollama /api/embed call."""
+        client = self._get_http_client()
+        response = await client.post(
+            "/api/embed",
+            json={"model": model or settings.rag_embedding_model, "input": texts},
+            timeout=deadline.timeout(settings.ollama_timeout)
+        )
+        if response.status_code != 200:
+            raise OllamaHTTPError(response.status_code, response.text)
+        return response.json()["embeddings"]
+    
+    def reconfigure(self) -> None:
+        """Apply changed settings to the clients, breakers and comparison slots.
+
+        New requests get a new LLM, HTTP client and slots; requests already
+        running keep the ones they hold. The old HTTP client is closed once
+        any request could have finished with it.
+        """
+        with self._llm_lock:
+            self._llm = None
+        for breaker in self.breakers.values():
+            breaker.failure_threshold = settings.circuit_breaker_failure_threshold
+            breaker.recovery_timeout = settings.circuit_breaker_recovery_timeout
+        self._compare_slots = None
+        
+        client, loop = self._http_client, self._http_client_loop
+        self._http_client = None
+        self._http_client_loop = None
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if client is not None and not client.is_closed:
+            self._retiring_clients.add(client)
+            # A client can only be closed on the loop it was created on;
+            # otherwise it waits for close()
+            if loop is running:
+                task = running.create_task(self._close_later(client))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+        logger.info(f"Ollama settings reloaded: {settings.ollama_base_url}, model {settings.ollama_model}")
+    
+    async def _close_later(self, client: httpx.AsyncClient) -> None:
+        # No request outlives its deadline
+        await asyncio.sleep(settings.request_timeout_max)
+        self._retiring_clients.discard(client)
+        await client.aclose()
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP client, and any replaced ones still open."""
+        for task in list(self._retiring):
+            task.cancel()
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+        # Timers cancelled before they ever ran have not closed their client
+        retiring, self._retiring_clients = self._retiring_clients, set()
+        for client in retiring:
+            if not client.is_closed:
+                await client.aclose()
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._http_client_loop = None
+    
+    async def _stream_generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream raw generation chunks from Ollama's /api/generate endpoint."""
+        payload = {
+            'model': model or settings.ollama_model,
+            'prompt': prompt,
+            'stream': True,
+            'options': {
+                'temperature': temperature,
+                'num_predict': max_tokens
+            }
+        }
+        if stop:
+            payload['options']['stop'] = stop
+        
+        breaker = self.breakers["http"]
+        if not breaker.allow_request():
+            metrics.generation_errors.inc("http_stream")
+            raise CircuitOpenError("Ollama HTTP path is unavailable (circuit open)")
+        
+        client = self._get_http_client()
+        started = time.perf_counter()
+        ttft = None
+        try:
+            with breaker.call(), metrics.track_inflight():
+                async with client.stream(
+                    "POST", "/api/generate", json=payload, timeout=deadline.timeout(settings.ollama_timeout)
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        raise OllamaHTTPError(response.status_code, body.decode(errors='replace'))
                     
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return f"I apologize, but I encountered an error: {str(e)}"
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get('error'):
+                            raise Exception(chunk['error'])
+                        if ttft is None:
+                            ttft = time.perf_counter() - started
+                        if chunk.get('done'):
+                            metrics.observe_generation(payload['model'], chunk, ttft_seconds=ttft)
+                            await rate_limit.charge_generation(chunk)
+                            usage_recorder.record(payload['model'], chunk)
+                            metrics.generation_path.inc("http_stream")
+                        yield chunk
+        except Exception:
+            metrics.generation_errors.inc("http_stream")
+            raise
     
-    async def run_agent(
+    def _build_agent_prompt(self, task: str, agent_type: str, available_tools: List["Tool"], scratchpad: str) -> str:
+        """Build the ReAct-style prompt for one agent iteration."""
+        tool_lines = "\n".join(f"- {t.name}: {t.description}" for t in available_tools)
+        return f"""You are a {agent_type} agent. Use the available tools to complete the given task.
+
+Available tools:
+{tool_lines}
+
+To use a tool, respond with exactly:
+Thought: <your reasoning>
+Action: <tool name>
+Action Input: <tool input>
+
+When you know the answer, respond with:
+Final Answer: <your answer>
+
+Task: {task}
+
+{scratchpad}"""
+    
+    @staticmethod
+    def _parse_agent_output(output: str) -> Dict[str, Optional[str]]:
+        """Split an agent completion into thought, action and final answer."""
+        final_match = re.search(r"Final Answer:\s*(.*)", output, re.DOTALL)
+        action_match = re.search(r"Action:\s*(.+?)\s*\nAction Input:\s*(.*)", output, re.DOTALL)
+        thought = output
+        if action_match:
+            thought = output[:action_match.start()]
+        elif final_match:
+            thought = output[:final_match.start()]
+        thought = thought.replace("Thought:", "").strip()
+        
+        return {
+            "thought": thought or None,
+            "tool": action_match.group(1).strip() if action_match and not final_match else None,
+            "tool_input": action_match.group(2).strip() if action_match and not final_match else None,
+            "final_answer": final_match.group(1).strip() if final_match else None
+        }
+    
+    async def stream_agent(
         self,
         task: str,
         agent_type: str = "default",
         tools: Optional[List[str]] = None,
         max_iterations: int = 10
-    ) -> Dict[str, Any]:
-        """Run an agent to complete a task."""
-        try:
-            conversation_id = str(uuid.uuid4())
-            execution_steps = []
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run an agent and yield execution events as they are produced."""
+        conversation_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        step_number = 0
+        
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 2)
+        
+        def make_step(action: str, step_started: float, **fields: Any) -> Dict[str, Any]:
+            nonlocal step_number
+            step_number += 1
+            return {
+                "step": step_number,
+                "action": action,
+                **fields,
+                "timestamp": datetime.now().isoformat(),
+                "duration_ms": round((time.perf_counter() - step_started) * 1000, 2),
+                "elapsed_ms": elapsed_ms()
+            }
+        
+        # Filter tools based on request
+        available_tools = self.tools
+        if tools:
+            available_tools = [t for t in self.tools if t.name in tools]
+        tool_map = {t.name: t for t in available_tools}
+        
+        decision = model_router.route(task, tools=list(tool_map))
+        model_name = decision.model if decision is not None else settings.ollama_model
+        
+        yield {
+            "type": "start",
+            "conversation_id": conversation_id,
+            "agent_type": agent_type,
+            "tools": list(tool_map),
+            "model": model_name
+        }
+        yield {"type": "step", **make_step("analyzing_task", started, input=task)}
+        
+        scratchpad = ""
+        result = ""
+        completed = True
+        iteration = 0
+        for iteration in range(1, max_iterations + 1):
+            step_started = time.perf_counter()
+            output = ""
+            prompt = self._build_agent_prompt(task, agent_type, available_tools, scratchpad)
             
-            # Filter tools based on request
-            available_tools = self.tools
-            if tools:
-                available_tools = [t for t in self.tools if t.name in tools]
+            with timing.span(f"llm_{iteration}"):
+                async for chunk in self._stream_generate(prompt, model=model_name, stop=["Observation:"]):
+                    token = chunk.get('response', '')
+                    if token:
+                        output += token
+                        yield {"type": "token", "iteration": iteration, "content": token}
+                    if chunk.get('done'):
+                        timing.add_ollama_phases(chunk)
+            observe_request(model_name, "agent", time.perf_counter() - step_started)
             
-            # Create agent prompt
-            agent_prompt = ChatPromptTemplate.from_messages([
-                ("system", f"""You are a {agent_type} agent. Use the available tools to complete the given task.
-                Available tools: {', '.join([t.name for t in available_tools])}
-                
-                Think step by step and use tools when necessary to provide accurate and helpful responses."""),
-                ("human", "{input}"),
-                MessagesPlaceholder(variable_name="agent_scratchpad")
-            ])
+            parsed = self._parse_agent_output(output)
+            tool = tool_map.get(parsed["tool"]) if parsed["tool"] else None
             
-            # For now, use simple LLM response with tool calling
-            # In a full implementation, you'd use LangGraph for more complex agent workflows
+            if tool is None:
+                # No (known) tool requested, treat the completion as the answer
+                result = parsed["final_answer"] or output.strip()
+                break
+            
+            if parsed["thought"]:
+                yield {"type": "step", **make_step("thought", step_started, output=parsed["thought"])}
+            
+            # The time the model took to decide on this call
+            yield {"type": "tool_call", **make_step("tool_call", step_started, tool=tool.name, input=parsed["tool_input"])}
+            
+            tool_started = time.perf_counter()
+            with timing.span(f"tool_{tool.name}"):
+                if tool.coroutine is not None:
+                    observation = await tool.coroutine(parsed["tool_input"])
+                else:
+                    observation = await asyncio.to_thread(tool.func, parsed["tool_input"])
+            yield {"type": "tool_result", **make_step("tool_result", tool_started, tool=tool.name, output=observation)}
             
-            step = {
-                "step": 1,
-                "action": "analyzing_task",
-                "input": task,
-                "timestamp": datetime.now().isoformat()
+            scratchpad += f"{output.strip()}\nObservation: {observation}\n"
+        else:
+            # Still calling tools when the iterations ran out; the last
+            # observation is not an answer to the task
+            completed = False
+            result = f"No final answer within {max_iterations} iterations"
+        
+        yield {"type": "step", **make_step("generating_response", step_started, output=result)}
+        yield {
+            "type": "end",
+            "result": result,
+            "agent_type": agent_type,
+            "iterations": iteration,
+            "elapsed_ms": elapsed_ms(),
+            "metadata": {
+                "tools_used": [t.name for t in available_tools],
+                "max_iterations": max_iterations,
+                "completed": completed,
+                "conversation_id": conversation_id,
+                "model_used": model_name
             }
-            execution_steps.append(step)
+        }
+    
+    async def run_agent(
+        self,
+        task: str,
+        agent_type: str = "default",
+        tools: Optional[List[str]] = None,
+        max_iterations: int = 10,
+        include_timings: bool = False
+    ) -> Dict[str, Any]:
+        """Run an agent to complete a task."""
+        try:
+            execution_steps = []
+            final_event: Dict[str, Any] = {}
             
-            # Generate response
-            response = self.llm.invoke(f"Task: {task}\n\nPlease complete this task step by step.")
+            async for event in self.stream_agent(task, agent_type, tools, max_iterations):
+                if "step" in event:
+                    execution_steps.append({k: v for k, v in event.items() if k != "type"})
+                elif event["type"] == "end":
+                    final_event = event
             
-            step = {
-                "step": 2,
-                "action": "generating_response",
-                "output": response,
-                "timestamp": datetime.now().isoformat()
+            metadata = {
+                **final_event["metadata"],
+                "iterations": final_event["iterations"],
+                "elapsed_ms": final_event["elapsed_ms"]
             }
-            execution_steps.append(step)
+            timings = timing.current()
+            if include_timings and timings is not None:
+                metadata["timings"] = timings.to_dict()
             
             return {
-                "result": response,
+                "result": final_event["result"],
                 "steps": execution_steps,
                 "agent_type": agent_type,
                 "timestamp": datetime.now(),
-                "metadata": {
-                    "tools_used": [t.name for t in available_tools],
-                    "max_iterations": max_iterations,
-                    "conversation_id": conversation_id
-                }
+                "metadata": metadata
             }
         except Exception as e:
             logger.error(f"Error in agent execution: {e}")
             raise
     
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state of each generation path."""
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+    
     async def health_check(self) -> Dict[str, Any]:
-        """Check the health of the Ollama service."""
+        """Check that Ollama is reachable and the configured model is pulled.
+
+        Only lists local models; it never runs a generation, so it is cheap
+        enough for readiness probes.
+        """
         try:
-            # Try LangChain first, then fall back to HTTP
-            try:
-                test_response = self.llm.invoke("Say 'OK' if you're working correctly.")
-                status = "healthy" if test_response else "unhealthy"
-                
-                return {
-                    "status": status,
-                    "model": settings.ollama_model,
-                    "base_url": settings.ollama_base_url,
-                    "response": test_response[:50] if test_response else None
-                }
-            except Exception:
-                # Fall back to direct HTTP health check
-                import requests
-                
-                # Test basic connectivity
-                response = requests.get(f"{settings.ollama_base_url}/api/tags", timeout=5)
-                if response.status_code == 200:
-                    models = response.json().get('models', [])
-                    model_available = any(m['name'].startswith(settings.ollama_model) for m in models)
-                    
-                    return {
-                        "status": "healthy" if model_available else "degraded",
-                        "model": settings.ollama_model,
-                        "base_url": settings.ollama_base_url,
-                        "available_models": [m['name'] for m in models],
-                        "fallback_mode": True
-                    }
-                else:
-                    raise Exception(f"HTTP {response.status_code}")
-                    
+            client = self._get_http_client()
+            response = await client.get("/api/tags", timeout=settings.ollama_health_timeout)
+            response.raise_for_status()
+            models = [m["name"] for m in response.json().get("models", [])]
+            model_available = any(name.startswith(settings.ollama_model) for name in models)
+            return {
+                "status": "healthy" if model_available else "degraded",
+                "model": settings.ollama_model,
+                "base_url": settings.ollama_base_url,
+                "available_models": models,
+                "generation_paths": self.breaker_states()
+            }
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return {
                 "status": "unhealthy",
                 "error": str(e),
                 "model": settings.ollama_model,
-                "base_url": settings.ollama_base_url
+                "base_url": settings.ollama_base_url,
+                "generation_paths": self.breaker_states()
             }
 
 
-# Global service instance
-agent_service = OllamaAgentService()
+_agent_service: Optional[OllamaAgentService] = None
+_agent_service_lock = threading.Lock()
+
+
+def get_agent_service() -> OllamaAgentService:
+    """Return the global service, creating it on first use."""
+    global _agent_service
+    if _agent_service is None:
+        with _agent_service_lock:
+            if _agent_service is None:
+                _agent_service = OllamaAgentService()
+    return _agent_service
+
+
+async def close_agent_service() -> None:
+    """Close the global service and the legacy ``run_agent`` one, if they were ever created."""
+    if _agent_service is not None:
+        await _agent_service.close()
+    if _legacy_service is not None:
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_legacy_service.close(), _legacy_loop))
+
+
+def _apply_settings() -> None:
+    if _agent_service is not None:
+        _agent_service.reconfigure()
+    if _legacy_service is not None:
+        # Its clients belong to the legacy loop, so it is reconfigured there
+        _legacy_loop.call_soon_threadsafe(_legacy_service.reconfigure)
+
+
+runtime_config.on_change(
+    (
+        "ollama_base_url", "ollama_model", "ollama_timeout", "langchain_verbose",
+        "circuit_breaker_failure_threshold", "circuit_breaker_recovery_timeout", "compare_max_concurrency"
+    ),
+    _apply_settings
+)
+
+
+def __getattr__(name: str) -> Any:
+    # Keep ``from app.services.langchain_agent import agent_service`` working
+    # without constructing the service at import time
+    if name == "agent_service":
+        return get_agent_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+metrics.registry.gauge(
+    "conversations_in_memory",
+    "Conversations held in the in-memory store.",
+    callback=lambda: len(_agent_service.memory_store) if _agent_service is not None else 0
+)
+
+
+_legacy_loop: Optional[asyncio.AbstractEventLoop] = None
+_legacy_service: Optional[OllamaAgentService] = None
+_legacy_lock = threading.Lock()
+
+
+def _get_legacy() -> Tuple[asyncio.AbstractEventLoop, OllamaAgentService]:
+    """Event loop in a daemon thread that runs every legacy ``run_agent`` call, and its service.
+
+    The service is separate from the global one so that neither rebuilds
+    its HTTP client and comparison slots whenever calls alternate between
+    the two loops.
+    """
+    global _legacy_loop, _legacy_service
+    if _legacy_service is None:
+        with _legacy_lock:
+            if _legacy_service is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="legacy-run-agent", daemon=True).start()
+                _legacy_loop = loop
+                _legacy_service = OllamaAgentService()
+    return _legacy_loop, _legacy_service
 
 
 # Legacy function for backward compatibility
 def run_agent(question: str) -> str:
-    """Legacy function for backward compatibility."""
+    """Legacy function for backward compatibility.
+
+    Blocks until the answer is ready; safe to call from a thread that is
+    already running an event loop, although it blocks that loop meanwhile.
+    """
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(agent_service.chat(question))
-        return result["message"]
+        loop, service = _get_legacy()
+        future = asyncio.run_coroutine_threadsafe(service.chat(question), loop)
+        return future.result()["message"]
     except Exception as e:
         logger.error(f"Error in legacy run_agent: {e}")
         return f"Error: {str(e)}"
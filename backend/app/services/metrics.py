@@ -0,0 +1,268 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+THROUGHPUT_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 50.0, 75.0, 100.0, 150.0, 250.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for labelled in-process metrics."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.collect())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be computed at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def get(self, *labels: str) -> float:
+        if self._callback is not None:
+            return self._callback()
+        return self._values.get(labels, 0)
+
+    def collect(self) -> List[str]:
+        if self._callback is not None:
+            return [f"{self.name} {_format_value(self._callback())}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """Cumulative bucketed histogram of observed values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return state[-1] if state else 0
+
+    def collect(self) -> List[str]:
+        lines = []
+        for labels, state in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Global registry and application metrics
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by method, route and status code.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route.", ("method", "route")
+)
+http_errors = registry.counter(
+    "http_errors_total", "Requests that failed with a 5xx status or an unhandled exception.", ("method", "route")
+)
+
+ollama_queue = registry.histogram(
+    "ollama_queue_seconds", "Time an Ollama request waited before prefill started.", ("model",)
+)
+ollama_load = registry.histogram(
+    "ollama_load_seconds", "Ollama model load time (load_duration).", ("model",)
+)
+ollama_prefill = registry.histogram(
+    "ollama_prefill_seconds", "Ollama prompt evaluation time (prompt_eval_duration).", ("model",)
+)
+ollama_decode = registry.histogram(
+    "ollama_decode_seconds", "Ollama token generation time (eval_duration).", ("model",)
+)
+ollama_ttft = registry.histogram(
+    "ollama_time_to_first_token_seconds", "Time from sending a streaming request to its first token.", ("model",)
+)
+ollama_tokens_per_second = registry.histogram(
+    "ollama_tokens_per_second", "Decode throughput (eval_count / eval_duration).", ("model",), THROUGHPUT_BUCKETS
+)
+ollama_tokens = registry.counter(
+    "ollama_tokens_total", "Tokens processed by Ollama.", ("model", "kind")
+)
+ollama_inflight = registry.gauge(
+    "ollama_inflight_generations", "Generations currently in progress."
+)
+generation_path = registry.counter(
+    "llm_generation_path_total", "Generations served by each path (langchain, http_fallback or http_stream).", ("path",)
+)
+generation_errors = registry.counter(
+    "llm_generation_errors_total", "Failed generation attempts by path.", ("path",)
+)
+
+
+def observe_generation(
+    model: str,
+    stats: Dict,
+    wall_seconds: Optional[float] = None,
+    ttft_seconds: Optional[float] = None
+) -> None:
+    """Record the timing fields of a final Ollama generation chunk.
+
+    Ollama reports durations in nanoseconds. Queue time is estimated as the
+    part of the wall-clock time to first token not spent loading or in prefill;
+    for non-streaming calls the whole wall time is used instead.
+    """
+    load = stats.get("load_duration", 0) / 1e9
+    prefill = stats.get("prompt_eval_duration", 0) / 1e9
+    decode = stats.get("eval_duration", 0) / 1e9
+    eval_count = stats.get("eval_count", 0)
+
+    ollama_load.observe(load, model)
+    ollama_prefill.observe(prefill, model)
+    ollama_decode.observe(decode, model)
+    ollama_tokens.inc(model, "prompt", amount=stats.get("prompt_eval_count", 0))
+    ollama_tokens.inc(model, "completion", amount=eval_count)
+    if decode > 0 and eval_count:
+        ollama_tokens_per_second.observe(eval_count / decode, model)
+
+    if ttft_seconds is not None:
+        ollama_ttft.observe(ttft_seconds, model)
+        ollama_queue.observe(max(0.0, ttft_seconds - load - prefill), model)
+    elif wall_seconds is not None:
+        ollama_queue.observe(max(0.0, wall_seconds - load - prefill - decode), model)
+
+
+@contextmanager
+def track_inflight() -> Iterator[None]:
+    """Count a generation as in flight for the duration of the block."""
+    ollama_inflight.inc()
+    try:
+        yield
+    finally:
+        ollama_inflight.dec()
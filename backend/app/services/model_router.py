@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from app.config import settings
+from app.services import metrics
+from app.services.conversations import Conversation
+
+# Rough characters per token for English text; good enough to tell a
+# one-line question from a long document without running a tokenizer
+CHARS_PER_TOKEN = 4
+
+OFF = "off"
+SHADOW = "shadow"
+ON = "on"
+
+
+class RouteDecision:
+    """The model picked for one request and why."""
+
+    __slots__ = ("model", "tier", "reason", "features")
+
+    def __init__(self, model: str, tier: str, reason: str, features: Dict[str, Any]):
+        self.model = model
+        self.tier = tier
+        self.reason = reason
+        self.features = features
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"model": self.model, "tier": self.tier, "reason": self.reason, "features": self.features}
+
+
+def extract_features(message: str, memory: Optional[Conversation] = None, tools: Sequence[str] = ()) -> Dict[str, Any]:
+    """Cheap request features the router decides on."""
+    # UTF-8 bytes overcount non-ASCII text slightly, which only errs towards larger tiers
+    history_chars = memory.content_bytes if memory is not None else 0
+    return {
+        "prompt_tokens": (len(message) + history_chars) // CHARS_PER_TOKEN,
+        "history_messages": memory.message_count if memory is not None else 0,
+        "tools": len(tools)
+    }
+
+
+class ModelRouter:
+    """Pick the cheapest configured model tier that fits a request.
+
+    Tiers (``MODEL_ROUTER_TIERS``) are tried in order, cheapest first. A tier
+    fits when the request is within its ``max_prompt_tokens`` and
+    ``max_history_messages`` and, if tools are requested, it allows
+    ``tools``; missing limits are unbounded. An explicit model on the request
+    always wins, and when no tier fits the configured default model is used.
+
+    In ``shadow`` mode the decision is only logged and counted; requests keep
+    using the model they would have used without routing.
+    """
+
+    def __init__(self, tiers: Optional[List[Dict[str, Any]]] = None):
+        self._tiers = tiers
+
+    @property
+    def tiers(self) -> List[Dict[str, Any]]:
+        return self._tiers if self._tiers is not None else settings.model_router_tiers
+
+    @staticmethod
+    def _fits(tier: Dict[str, Any], features: Dict[str, Any]) -> bool:
+        max_tokens = tier.get("max_prompt_tokens")
+        max_history = tier.get("max_history_messages")
+        if max_tokens is not None and features["prompt_tokens"] > max_tokens:
+            return False
+        if max_history is not None and features["history_messages"] > max_history:
+            return False
+        return not features["tools"] or tier.get("tools", True)
+
+    def decide(
+        self,
+        message: str,
+        memory: Optional[Conversation] = None,
+        requested_model: Optional[str] = None,
+        tools: Sequence[str] = ()
+    ) -> RouteDecision:
+        """Choose a model for the request, ignoring the routing mode."""
+        features = extract_features(message, memory, tools)
+        if requested_model:
+            return RouteDecision(requested_model, "override", "model requested explicitly", features)
+        for tier in self.tiers:
+            if self._fits(tier, features):
+                return RouteDecision(tier["model"], tier.get("name", tier["model"]), "fits tier limits", features)
+        return RouteDecision(settings.ollama_model, "default", "no tier fits", features)
+
+    def route(
+        self,
+        message: str,
+        memory: Optional[Conversation] = None,
+        requested_model: Optional[str] = None,
+        tools: Sequence[str] = ()
+    ) -> Optional[RouteDecision]:
+        """Return the decision to act on, or None to keep the unrouted model.
+
+        Shadow decisions are logged and counted but never acted on.
+        """
+        mode = settings.model_routing_mode
+        if mode not in (SHADOW, ON):
+            return None
+        decision = self.decide(message, memory, requested_model, tools)
+        router_decisions.inc(mode, decision.tier, decision.model)
+        if mode == SHADOW:
+            logger.info(
+                "Model router (shadow) would use {} (tier {}, {}) for {}",
+                decision.model, decision.tier, decision.reason, decision.features
+            )
+            return None
+        logger.debug("Model router chose {} (tier {}, {})", decision.model, decision.tier, decision.reason)
+        return decision
+
+
+router_decisions = metrics.registry.counter(
+    "model_router_decisions_total", "Model router decisions by mode (on or shadow), tier and model.", ("mode", "tier", "model")
+)
+model_requests = metrics.registry.counter(
+    "model_requests_total", "Chat and agent generations by the model that served them.", ("model", "kind")
+)
+model_latency = metrics.registry.histogram(
+    "model_request_duration_seconds", "Wall time of chat and agent generations by model.", ("model", "kind")
+)
+
+
+def observe_request(model: str, kind: str, seconds: float) -> None:
+    """Record one chat or agent generation served by ``model``."""
+    model_requests.inc(model, kind)
+    model_latency.observe(seconds, model, kind)
+
+
+# Global model router instance
+model_router = ModelRouter()
@@ -0,0 +1,162 @@
+import io
+import sys
+import time
+import uuid
+import random
+import marshal
+import pstats
+import cProfile
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.services.runtime_config import runtime_config
+
+
+class StackSampler:
+    """Periodically samples one thread's stack into collapsed (flamegraph) form."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.items())
+
+
+class RequestProfile:
+    """A captured profile of a single request."""
+
+    __slots__ = ("profile_id", "mode", "method", "path", "status", "duration_ms", "timestamp", "data")
+
+    def __init__(self, mode: str, method: str, path: str):
+        self.profile_id = str(uuid.uuid4())
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.status: Optional[int] = None
+        self.duration_ms: float = 0.0
+        self.timestamp = datetime.now()
+        self.data: Any = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 2),
+            "timestamp": self.timestamp.isoformat(),
+            "formats": ["pstats", "text"] if self.mode == "cprofile" else ["collapsed"]
+        }
+
+    def pstats_bytes(self) -> bytes:
+        """Marshalled stats loadable with pstats.Stats or snakeviz."""
+        return marshal.dumps(self.data)
+
+    def text(self, limit: int = 50) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = self.data  # type: ignore[attr-defined]
+        stats.get_top_level_stats()
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def collapsed(self) -> str:
+        return self.data
+
+
+class RequestProfiler:
+    """Opt-in request profiling with a bounded buffer of recent profiles."""
+
+    def __init__(self, buffer_size: int):
+        self.profiles: Deque[RequestProfile] = deque(maxlen=buffer_size)
+        # Only one request is profiled at a time: concurrent cProfile sessions
+        # on one thread would overwrite each other's hooks
+        self._active = False
+
+    def should_profile(self, profile_header: Optional[str]) -> bool:
+        """Decide whether to profile a request, by header or 1-in-N sampling."""
+        if not settings.profiling_enabled or self._active:
+            return False
+        if profile_header == "1":
+            return True
+        rate = settings.profiling_sample_rate
+        return rate > 0 and random.randrange(rate) == 0
+
+    def start(self, method: str, path: str) -> Dict[str, Any]:
+        self._active = True
+        profile = RequestProfile(settings.profiling_mode, method, path)
+        if profile.mode == "cprofile":
+            collector: Any = cProfile.Profile()
+            collector.enable()
+        else:
+            collector = StackSampler(threading.get_ident(), settings.profiling_sample_interval_ms / 1000)
+            collector.start()
+        return {"profile": profile, "collector": collector, "started": time.perf_counter()}
+
+    def finish(self, session: Dict[str, Any], status: Optional[int]) -> RequestProfile:
+        profile: RequestProfile = session["profile"]
+        collector = session["collector"]
+        if profile.mode == "cprofile":
+            collector.disable()
+            collector.create_stats()
+            profile.data = collector.stats
+        else:
+            collector.stop()
+            profile.data = collector.collapsed()
+        profile.status = status
+        profile.duration_ms = (time.perf_counter() - session["started"]) * 1000
+        self.profiles.append(profile)
+        self._active = False
+        return profile
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self.profiles:
+            if profile.profile_id == profile_id:
+                return profile
+        return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.summary() for profile in reversed(self.profiles)]
+
+    def resize(self, buffer_size: int) -> None:
+        """Keep up to ``buffer_size`` profiles, dropping the oldest if there are more."""
+        self.profiles = deque(self.profiles, maxlen=buffer_size)
+
+
+# Global profiler instance
+profiler = RequestProfiler(buffer_size=settings.profiling_buffer_size)
+
+
+def _apply_settings() -> None:
+    profiler.resize(settings.profiling_buffer_size)
+
+
+runtime_config.on_change(("profiling_buffer_size",), _apply_settings)
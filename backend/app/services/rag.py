@@ -0,0 +1,135 @@
+import uuid
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+from app.services import timing
+from app.services.runtime_config import runtime_config
+
+if TYPE_CHECKING:
+    # numpy is imported with the index, on first use of the document store
+    from app.services.vector_index import VectorIndex
+
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+# Separators tried in order when looking for a natural place to end a chunk
+CHUNK_BREAKS = ("\n\n", "\n", ". ", " ")
+
+
+def chunk_text(text: str, size: int, overlap: int) -> List[str]:
+    """Split text into chunks of at most ``size`` characters.
+
+    Chunks end at a paragraph, line, sentence or word boundary in their
+    second half when there is one, and consecutive chunks share up to
+    ``overlap`` characters so passages are not cut off from their context.
+    """
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            for separator in CHUNK_BREAKS:
+                cut = text.rfind(separator, start + size // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class DocumentStore:
+    """Chunks, embeds and indexes documents for retrieval."""
+
+    def __init__(self, index: "VectorIndex", embed: Embedder):
+        self.index = index
+        self.embed = embed
+
+    async def _embed_batches(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        batch_size = settings.rag_embed_batch_size
+        with timing.span("embed"):
+            for start in range(0, len(texts), batch_size):
+                vectors.extend(await self.embed(texts[start:start + batch_size]))
+        return vectors
+
+    async def ingest(self, text: str, source: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Chunk and embed a document and append it to the index."""
+        document_id = str(uuid.uuid4())
+        chunks = chunk_text(text, settings.rag_chunk_size, settings.rag_chunk_overlap)
+        vectors = await self._embed_batches(chunks)
+        entries = [
+            {
+                "document_id": document_id,
+                "source": source,
+                "chunk": i,
+                "text": chunk,
+                "metadata": metadata or {}
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+        with timing.span("index"):
+            await asyncio.to_thread(self.index.add, vectors, entries)
+        logger.info(f"Ingested document {document_id} ({len(chunks)} chunks)")
+        return {"document_id": document_id, "chunks": len(chunks), "total_chunks": len(self.index)}
+
+    async def search(self, query: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the chunks most similar to ``query``, best first."""
+        if len(self.index) == 0:
+            return []
+        vector = (await self._embed_batches([query]))[0]
+        with timing.span("retrieve"):
+            hits = await asyncio.to_thread(self.index.search, vector, k or settings.rag_top_k)
+        return [{**entry, "score": round(score, 4)} for score, entry in hits]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": len(self.index),
+            "dimensions": self.index.dim,
+            "partitions": self.index.partitions,
+            "embedding_model": settings.rag_embedding_model
+        }
+
+
+_document_store: Optional[DocumentStore] = None
+_document_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Return the global document store, loading the index on first use."""
+    global _document_store
+    if _document_store is None:
+        with _document_store_lock:
+            if _document_store is None:
+                from app.services.embeddings import embedding_service, unpack
+                from app.services.vector_index import VectorIndex
+                
+                async def embed(texts: List[str]) -> List[List[float]]:
+                    # Through the shared embedding service, so chunks seen before are cached
+                    return [unpack(data) for data in await embedding_service.embed(texts, settings.rag_embedding_model)]
+
+                index = VectorIndex(
+                    settings.rag_index_path,
+                    ivf_threshold=settings.rag_ivf_threshold,
+                    ivf_probes=settings.rag_ivf_probes
+                )
+                _document_store = DocumentStore(index, embed)
+    return _document_store
+
+
+def _apply_settings() -> None:
+    # The index reads these on every add and search
+    if _document_store is not None:
+        _document_store.index.ivf_threshold = settings.rag_ivf_threshold
+        _document_store.index.ivf_probes = settings.rag_ivf_probes
+
+
+runtime_config.on_change(("rag_ivf_threshold", "rag_ivf_probes"), _apply_settings)
@@ -0,0 +1,266 @@
+import math
+import time
+import asyncio
+import sqlite3
+import hashlib
+import secrets
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+
+# Rate limit key of the client whose request is being handled, so generated
+# tokens can be charged wherever a generation completes
+_client_key: ContextVar[Optional[str]] = ContextVar("rate_limit_client_key", default=None)
+
+
+def _refill(level: float, updated: float, capacity: float, rate: float, now: float) -> float:
+    return min(capacity, level + max(0.0, now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process; each uvicorn worker limits separately."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self.buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, key: str, capacity: float, rate: float, cost: float, minimum: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            bucket = self.buckets.get(key)
+            level = capacity if bucket is None else _refill(bucket[0], bucket[1], capacity, rate, now)
+            applied = level >= minimum
+            if applied:
+                level -= cost
+            if bucket is None and len(self.buckets) >= self.max_keys:
+                self._prune(now, rate, capacity)
+            self.buckets[key] = [level, now]
+            return applied, level
+
+    def _prune(self, now: float, rate: float, capacity: float) -> None:
+        # Buckets that have refilled completely carry no state worth keeping
+        for key, (level, updated) in list(self.buckets.items()):
+            if _refill(level, updated, capacity, rate, now) >= capacity:
+                del self.buckets[key]
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file, shared by every worker on the host.
+
+    Transactions are a few statements long, so a short busy timeout is
+    plenty; when it runs out the write fails rather than stalling requests.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 0.25):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def apply(self, key: str, capacity: float, rate: float, cost: float, minimum: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so the
+            # read-modify-write is atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT level, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                level = capacity if row is None else _refill(row[0], row[1], capacity, rate, now)
+                applied = level >= minimum
+                if applied:
+                    level -= cost
+                self._conn.execute(
+                    "INSERT INTO buckets (key, level, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET level = excluded.level, updated = excluded.updated",
+                    (key, level, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return applied, level
+
+
+class RateLimitDecision:
+    """Outcome of a rate limit check and the headers describing it."""
+
+    __slots__ = ("allowed", "limit", "remaining", "reset", "retry_after", "reason")
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset: int, retry_after: int = 0, reason: Optional[str] = None):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+        self.reason = reason
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset)
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimiter:
+    """Per-client request-rate and generated-token budgets as token buckets.
+
+    Requests cost one token from the request bucket. Generated tokens
+    (Ollama's ``eval_count``) are charged to the token bucket after each
+    generation completes and may push it below zero; new requests are
+    refused until it refills.
+    """
+
+    def __init__(self):
+        self._store = None
+        self._store_lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    if settings.rate_limit_backend == "sqlite":
+                        self._store = SQLiteBucketStore(settings.rate_limit_sqlite_path)
+                    else:
+                        self._store = MemoryBucketStore()
+        return self._store
+
+    @store.setter
+    def store(self, store) -> None:
+        self._store = store
+
+    def client_key(self, headers, client_host: Optional[str]) -> str:
+        """Key a client by API key if it is one of RATE_LIMIT_API_KEYS, otherwise by IP address.
+
+        API keys are not otherwise validated, so keying by any key sent would
+        let a client dodge its limits with a new key per request.
+        """
+        api_key = headers.get("x-api-key")
+        authorization = headers.get("authorization", "")
+        if not api_key and authorization.lower().startswith("bearer "):
+            api_key = authorization[7:].strip()
+        if api_key and any(secrets.compare_digest(api_key, known) for known in settings.rate_limit_api_keys):
+            # Never keep raw credentials in the bucket store
+            return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        if settings.rate_limit_trust_forwarded:
+            # nginx sets X-Real-IP and appends the peer it saw to X-Forwarded-For;
+            # anything left of that hop came from the client
+            forwarded = headers.get("x-real-ip") or headers.get("x-forwarded-for", "").split(",")[-1].strip()
+            if forwarded:
+                return "ip:" + forwarded
+        return f"ip:{client_host or 'unknown'}"
+
+    def check(self, key: str, now: Optional[float] = None) -> RateLimitDecision:
+        """Admit or refuse one request for ``key``."""
+        now = time.time() if now is None else now
+        capacity = float(settings.rate_limit_burst)
+        rate = settings.rate_limit_requests_per_minute / 60
+
+        tokens_per_minute = settings.rate_limit_tokens_per_minute
+        if tokens_per_minute > 0:
+            token_rate = tokens_per_minute / 60
+            has_budget, token_level = self.store.apply(
+                f"tok:{key}", float(tokens_per_minute), token_rate, cost=0.0, minimum=1.0, now=now
+            )
+            if not has_budget:
+                level = self.store.apply(f"req:{key}", capacity, rate, cost=0.0, minimum=0.0, now=now)[1]
+                return RateLimitDecision(
+                    False, settings.rate_limit_burst, int(max(0.0, level)), math.ceil((capacity - level) / rate),
+                    retry_after=math.ceil((1.0 - token_level) / token_rate),
+                    reason="Generated token budget exhausted"
+                )
+
+        allowed, level = self.store.apply(f"req:{key}", capacity, rate, cost=1.0, minimum=1.0, now=now)
+        return RateLimitDecision(
+            allowed,
+            settings.rate_limit_burst,
+            int(max(0.0, level)),
+            math.ceil((capacity - level) / rate),
+            retry_after=0 if allowed else math.ceil((1.0 - level) / rate),
+            reason=None if allowed else "Request rate limit exceeded"
+        )
+
+    async def _off_loop(self, func, *args):
+        # A SQLite store may wait on other workers' write locks, so it is
+        # used from a worker thread rather than the event loop
+        if isinstance(self.store, SQLiteBucketStore):
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def acheck(self, key: str) -> RateLimitDecision:
+        """``check`` for async callers; admits the request if the store fails."""
+        try:
+            return await self._off_loop(self.check, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit store unavailable, admitting request: {e}")
+            burst = settings.rate_limit_burst
+            return RateLimitDecision(True, burst, burst, 0)
+
+    def charge_tokens(self, key: str, count: int, now: Optional[float] = None) -> None:
+        """Charge ``count`` generated tokens to ``key``'s token budget."""
+        tokens_per_minute = settings.rate_limit_tokens_per_minute
+        if count <= 0 or tokens_per_minute <= 0:
+            return
+        now = time.time() if now is None else now
+        self.store.apply(
+            f"tok:{key}", float(tokens_per_minute), tokens_per_minute / 60,
+            cost=float(count), minimum=float("-inf"), now=now
+        )
+
+    def charge_requests(self, key: str, count: int, now: Optional[float] = None) -> None:
+        """Charge ``count`` extra requests to ``key``'s request budget."""
+        if count <= 0:
+            return
+        now = time.time() if now is None else now
+        self.store.apply(
+            f"req:{key}", float(settings.rate_limit_burst), settings.rate_limit_requests_per_minute / 60,
+            cost=float(count), minimum=float("-inf"), now=now
+        )
+
+
+def bind(key: Optional[str]) -> None:
+    """Attribute generations in the current context to ``key``."""
+    _client_key.set(key)
+
+
+def current_key() -> Optional[str]:
+    return _client_key.get()
+
+
+async def charge_generation(stats: Dict) -> None:
+    """Charge a completed generation's ``eval_count`` to the current client."""
+    key = _client_key.get()
+    if key is None or not settings.rate_limit_enabled:
+        return
+    try:
+        await rate_limiter._off_loop(rate_limiter.charge_tokens, key, stats.get("eval_count", 0))
+    except Exception as e:
+        # Accounting must never fail the generation itself
+        logger.warning(f"Failed to charge generated tokens: {e}")
+
+
+async def charge_requests(count: int) -> None:
+    """Charge the current client for ``count`` requests beyond the one already admitted."""
+    key = _client_key.get()
+    if key is None or not settings.rate_limit_enabled:
+        return
+    try:
+        await rate_limiter._off_loop(rate_limiter.charge_requests, key, count)
+    except Exception as e:
+        logger.warning(f"Failed to charge requests: {e}")
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,168 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from loguru import logger
+from pydantic import ValidationError
+
+from app.config import Settings, settings
+from app.services import metrics
+
+# Settings used once while the app is built or started; they only change on restart
+RESTART_REQUIRED = frozenset({
+    "app_name", "app_version", "debug", "host", "port", "reload",
+    "compression_enabled", "compression_minimum_size", "compression_gzip_level", "compression_brotli_quality",
+    "rate_limit_backend", "rate_limit_sqlite_path", "rag_index_path",
+    "usage_enabled", "usage_db_path", "config_reload_path"
+})
+
+# Never returned by the admin API
+SECRET_SETTINGS = frozenset({"admin_api_key", "rate_limit_api_keys"})
+
+# Later layers win
+SOURCES = ("file", "admin")
+
+
+class ConfigError(Exception):
+    """Raised when a configuration change is invalid or cannot be applied at runtime."""
+
+
+class RuntimeConfig:
+    """Settings overrides applied while the app runs.
+
+    The effective configuration is the startup settings with the ``file``
+    overrides (``CONFIG_RELOAD_PATH``) and then the ``admin`` overrides
+    (``PATCH /api/v1/admin/config``) on top. A change is validated as a
+    whole ``Settings`` before anything is applied, then written to the
+    global settings without yielding to the event loop, so every request
+    sees either the old or the new configuration. Services register hooks
+    for the settings they have built objects from; the hooks swap those
+    objects, leaving in-flight requests on the old ones.
+    """
+
+    def __init__(self, target: Settings):
+        self._settings = target
+        self._baseline = target.model_dump()
+        self._layers: Dict[str, Dict[str, Any]] = {source: {} for source in SOURCES}
+        self._hooks: List[Tuple[frozenset, Callable[[], None]]] = []
+        # Differs from any stat result, so the file is read on the first check
+        self._file_mtime: Optional[float] = -1.0
+        self.version = 0
+        self.reloaded_at: Optional[datetime] = None
+
+    def on_change(self, fields: Iterable[str], hook: Callable[[], None]) -> None:
+        """Call ``hook`` after a change to any of ``fields`` has been applied."""
+        self._hooks.append((frozenset(fields), hook))
+
+    def overrides(self) -> Dict[str, Dict[str, Any]]:
+        return {source: dict(layer) for source, layer in self._layers.items()}
+
+    def _effective(self, layers: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        values = dict(self._baseline)
+        for source in SOURCES:
+            values.update(layers[source])
+        return values
+
+    def update(self, source: str, overrides: Dict[str, Any], replace: bool = False) -> Dict[str, Any]:
+        """Merge (or with ``replace``, set) one source's overrides and apply the result.
+
+        Returns the settings whose values changed. Raises ``ConfigError``
+        without applying anything if a setting is unknown, a value is
+        invalid, or a setting that needs a restart would change.
+        """
+        overrides = {name.lower(): value for name, value in overrides.items()}
+        unknown = sorted(name for name in overrides if name not in Settings.model_fields)
+        if unknown:
+            metrics_reloads.inc(source, "invalid")
+            raise ConfigError(f"Unknown settings: {', '.join(unknown)}")
+        layers = self.overrides()
+        layers[source] = overrides if replace else {**layers[source], **overrides}
+
+        try:
+            candidate = Settings(**self._effective(layers))
+        except ValidationError as e:
+            metrics_reloads.inc(source, "invalid")
+            raise ConfigError(str(e))
+
+        # Only settings this source overrides, or overrode before, are applied
+        touched = layers[source].keys() | self._layers[source].keys()
+        changed = {
+            name: getattr(candidate, name)
+            for name in sorted(touched)
+            if getattr(candidate, name) != getattr(self._settings, name)
+        }
+        restart = sorted(RESTART_REQUIRED & changed.keys())
+        if restart:
+            metrics_reloads.inc(source, "invalid")
+            raise ConfigError(f"Changing {', '.join(restart)} requires a restart")
+
+        self._layers = layers
+        for name, value in changed.items():
+            setattr(self._settings, name, value)
+        if not changed:
+            metrics_reloads.inc(source, "unchanged")
+            return {}
+
+        self.version += 1
+        self.reloaded_at = datetime.now()
+        metrics_reloads.inc(source, "applied")
+        logger.info("Applied {} configuration change (version {}): {}", source, self.version, ", ".join(sorted(changed)))
+        for fields, hook in self._hooks:
+            if fields & changed.keys():
+                try:
+                    hook()
+                except Exception as e:
+                    logger.error(f"Failed to apply changes to {', '.join(sorted(fields & changed.keys()))}: {e}")
+        return changed
+
+    def reload_file(self, path: str) -> Dict[str, Any]:
+        """Apply the overrides in a JSON file; a missing file means no overrides."""
+        return self.update("file", self._read(path), replace=True)
+
+    def _read(self, path: str) -> Dict[str, Any]:
+        try:
+            with open(path, "rb") as f:
+                overrides = orjson.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except orjson.JSONDecodeError as e:
+            metrics_reloads.inc("file", "invalid")
+            raise ConfigError(f"{path} is not valid JSON: {e}")
+        if not isinstance(overrides, dict):
+            metrics_reloads.inc("file", "invalid")
+            raise ConfigError(f"{path} must hold a JSON object of settings")
+        return overrides
+
+    def _file_changed(self, path: str) -> bool:
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        changed = mtime != self._file_mtime
+        self._file_mtime = mtime
+        return changed
+
+    async def watch(self, path: str) -> None:
+        """Apply ``path`` now and again whenever it changes, until cancelled.
+
+        An invalid file is logged and leaves the current configuration in place.
+        """
+        while True:
+            if self._file_changed(path):
+                try:
+                    self.update("file", await asyncio.to_thread(self._read, path), replace=True)
+                except ConfigError as e:
+                    logger.error(f"Ignoring configuration file: {e}")
+            await asyncio.sleep(settings.config_reload_interval)
+
+
+metrics_reloads = metrics.registry.counter(
+    "config_reloads_total",
+    "Runtime configuration changes by source (file or admin) and outcome (applied, unchanged or invalid).",
+    ("source", "outcome")
+)
+
+# Global runtime configuration
+runtime_config = RuntimeConfig(settings)
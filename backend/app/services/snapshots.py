@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+from loguru import logger
+
+from app.services.conversations import Conversation, ConversationStore
+
+# NDJSON: a header line, then one conversation record per line. Records are
+# independent, so a conversation can be decoded straight from its byte range.
+FORMAT = "ollamastack.conversations"
+VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+
+class SnapshotError(Exception):
+    """Raised for files that are not a readable conversation snapshot."""
+
+
+def encode_header(count: int) -> bytes:
+    return orjson.dumps({"format": FORMAT, "version": VERSION, "count": count, "created": round(time.time(), 3)}) + b"\n"
+
+
+def check_header(line: bytes) -> Dict:
+    try:
+        header = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        raise SnapshotError("Missing snapshot header")
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise SnapshotError("Not a conversation snapshot")
+    if header.get("version") != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {header.get('version')}")
+    return header
+
+
+def encode_conversation(conversation: Conversation) -> bytes:
+    return orjson.dumps(conversation.to_record()) + b"\n"
+
+
+class SnapshotReader:
+    """Random access to the conversations of a snapshot file.
+
+    Only the index (conversation id to byte range) is held in memory; it is
+    read from the ``.idx`` sidecar when that matches the snapshot, or rebuilt
+    by scanning the file otherwise. Conversations are decoded on ``read``.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fd = os.open(self.path, os.O_RDONLY)
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        try:
+            self._load_index()
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    def _load_index(self) -> None:
+        size = os.fstat(self._fd).st_size
+        with open(self.path, "rb") as f:
+            check_header(f.readline())
+        index_path = Path(str(self.path) + INDEX_SUFFIX)
+        if index_path.exists():
+            try:
+                index = orjson.loads(index_path.read_bytes())
+                if index.get("version") == VERSION and index.get("size") == size:
+                    self._offsets = {cid: (offset, length) for cid, (offset, length) in index["offsets"].items()}
+                    return
+            except (orjson.JSONDecodeError, ValueError, KeyError, TypeError):
+                pass
+            logger.warning(f"Ignoring stale snapshot index {index_path}")
+        self._offsets = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        offsets = {}
+        with open(self.path, "rb") as f:
+            offset = len(f.readline())
+            for line in f:
+                if line.endswith(b"\n"):
+                    offsets[orjson.loads(line)["id"]] = (offset, len(line))
+                offset += len(line)
+        return offsets
+
+    def __contains__(self, conversation_id: object) -> bool:
+        return conversation_id in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def ids(self) -> List[str]:
+        return list(self._offsets)
+
+    def discard(self, conversation_id: str) -> None:
+        """Forget a conversation that is now live (or deleted)."""
+        with self._lock:
+            self._offsets.pop(conversation_id, None)
+
+    def raw(self, conversation_id: str) -> bytes:
+        """The conversation's encoded record line, without decoding it."""
+        offset, length = self._offsets[conversation_id]
+        return os.pread(self._fd, length, offset)
+
+    def read(self, conversation_id: str) -> Conversation:
+        return Conversation.from_record(orjson.loads(self.raw(conversation_id)))
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def iter_records(store: ConversationStore) -> Iterator[Tuple[str, bytes]]:
+    """Encoded records of every conversation with messages, live ones first."""
+    for conversation_id, conversation in list(store.live().items()):
+        if conversation.message_count:
+            yield conversation_id, encode_conversation(conversation)
+    reader = store.restored
+    if reader is not None:
+        for conversation_id in reader.ids():
+            try:
+                yield conversation_id, reader.raw(conversation_id)
+            except KeyError:
+                continue  # Accessed or deleted meanwhile
+
+
+def export_lines(store: ConversationStore) -> Iterator[bytes]:
+    """The store in snapshot format, line by line."""
+    yield encode_header(len(store))
+    for _, line in iter_records(store):
+        yield line
+
+
+def import_lines(store: ConversationStore, lines: Iterable[bytes]) -> int:
+    """Load snapshot-format lines into the store, replacing same-id conversations."""
+    lines = iter(lines)
+    check_header(next(lines, b""))
+    count = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            conversation = Conversation.from_record(orjson.loads(line))
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise SnapshotError(f"Invalid conversation record on line {count + 2}: {e}")
+        store[conversation.conversation_id] = conversation
+        count += 1
+    return count
+
+
+def write_snapshot(store: ConversationStore, path: str) -> int:
+    """Write every conversation to ``path`` atomically, with its index sidecar."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    offsets: Dict[str, List[int]] = {}
+    with open(tmp_path, "wb") as f:
+        # The count is a hint; conversations without messages are skipped
+        f.write(encode_header(len(store)))
+        for conversation_id, line in iter_records(store):
+            offsets[conversation_id] = [f.tell(), len(line)]
+            f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+
+    index_tmp_path = path.with_name(path.name + INDEX_SUFFIX + ".tmp")
+    index_tmp_path.write_bytes(orjson.dumps({"version": VERSION, "size": size, "offsets": offsets}))
+    os.replace(tmp_path, path)
+    os.replace(index_tmp_path, str(path) + INDEX_SUFFIX)
+    return len(offsets)
+
+
+def restore_snapshot(store: ConversationStore, path: str) -> Optional[SnapshotReader]:
+    """Attach the snapshot at ``path`` to the store, if there is one."""
+    if not Path(path).exists():
+        return None
+    reader = SnapshotReader(path)
+    store.attach(reader)
+    return reader
@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Span:
+    """A timed section of a request, possibly containing child spans."""
+
+    __slots__ = ("name", "start", "end", "children")
+
+    def __init__(self, name: str, start: float, end: Optional[float] = None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"name": self.name, "duration_ms": round(self.duration_ms, 2)}
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+
+class RequestTimings:
+    """Span tree collected while handling a single request."""
+
+    def __init__(self):
+        self.root = Span("total", time.perf_counter())
+        self._stack: List[Span] = [self.root]
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """Time a block as a child of the currently open span."""
+        span = Span(name, time.perf_counter())
+        self._stack[-1].children.append(span)
+        self._stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            # Tolerate spans closed out of order by interleaved generators
+            if span in self._stack:
+                self._stack.remove(span)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        """Attach an externally measured duration to the currently open span."""
+        now = time.perf_counter()
+        self._stack[-1].children.append(Span(name, now - duration_ms / 1000, now))
+
+    def finish(self) -> None:
+        self.root.end = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict()
+
+    def server_timing(self) -> str:
+        """Flatten the span tree into a Server-Timing header value."""
+        entries = []
+
+        def visit(span: Span, prefix: str) -> None:
+            for child in span.children:
+                name = f"{prefix}{child.name}"
+                entries.append(f"{name};dur={child.duration_ms:.1f}")
+                visit(child, f"{name}.")
+
+        visit(self.root, "")
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def render(self) -> str:
+        """Render the span tree as indented text for logging."""
+        lines = []
+
+        def visit(span: Span, depth: int) -> None:
+            lines.append(f"{'  ' * depth}{span.name}: {span.duration_ms:.1f}ms")
+            for child in span.children:
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return "\n".join(lines)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    """Begin collecting timings for the current request."""
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def current() -> Optional[RequestTimings]:
+    """Return the timings of the request being handled, if any."""
+    return _current_timings.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Span]]:
+    """Time a block within the current request; a no-op outside of one."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield None
+        return
+    with timings.span(name) as s:
+        yield s
+
+
+def add(name: str, duration_ms: float) -> None:
+    """Attach an externally measured duration to the current request."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, duration_ms)
+
+
+def add_ollama_phases(stats: Dict[str, Any]) -> None:
+    """Attach Ollama's reported load, prefill and decode durations (in ns)."""
+    for name, key in (("load", "load_duration"), ("prefill", "prompt_eval_duration"), ("decode", "eval_duration")):
+        if stats.get(key):
+            add(name, stats[key] / 1e6)
@@ -0,0 +1,200 @@
+import time
+import asyncio
+import sqlite3
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+
+GRANULARITIES = {"minute": 60, "hour": 3600, "day": 86400}
+
+FIELDS = ("requests", "prompt_tokens", "completion_tokens", "prompt_ms", "completion_ms", "total_ms")
+
+_tenant: ContextVar[Optional[str]] = ContextVar("usage_tenant", default=None)
+
+
+def bind(tenant: Optional[str]) -> None:
+    """Attribute generations in the current context to ``tenant``."""
+    _tenant.set(tenant)
+
+
+def current_tenant() -> Optional[str]:
+    return _tenant.get()
+
+
+class UsageStore:
+    """Per-minute usage rows in a local SQLite file."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            "tenant TEXT NOT NULL, model TEXT NOT NULL, minute INTEGER NOT NULL, "
+            "requests INTEGER NOT NULL, prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL, "
+            "prompt_ms REAL NOT NULL, completion_ms REAL NOT NULL, total_ms REAL NOT NULL, "
+            "PRIMARY KEY (minute, tenant, model)) WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+
+    def add(self, rows: List[Tuple]) -> None:
+        """Add ``(tenant, model, minute, *FIELDS)`` rows to the stored totals, in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO usage (tenant, model, minute, requests, prompt_tokens, completion_tokens, "
+                    "prompt_ms, completion_ms, total_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(minute, tenant, model) DO UPDATE SET "
+                    "requests = requests + excluded.requests, "
+                    "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                    "completion_tokens = completion_tokens + excluded.completion_tokens, "
+                    "prompt_ms = prompt_ms + excluded.prompt_ms, "
+                    "completion_ms = completion_ms + excluded.completion_ms, "
+                    "total_ms = total_ms + excluded.total_ms",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query(
+        self,
+        start: int,
+        end: int,
+        bucket_seconds: int,
+        tenant: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Totals per bucket, tenant and model for minutes in ``[start, end)`` (epoch seconds)."""
+        conditions = ["minute >= ?", "minute < ?"]
+        params: List[Any] = [start, end]
+        if tenant is not None:
+            conditions.append("tenant = ?")
+            params.append(tenant)
+        if model is not None:
+            conditions.append("model = ?")
+            params.append(model)
+        sums = ", ".join(f"SUM({field})" for field in FIELDS)
+        sql = (
+            f"SELECT minute - minute % ? AS bucket, tenant, model, {sums} FROM usage "
+            f"WHERE {' AND '.join(conditions)} GROUP BY bucket, tenant, model ORDER BY bucket, tenant, model"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, [bucket_seconds, *params]).fetchall()
+        return [
+            {"start": row[0], "tenant": row[1], "model": row[2], **dict(zip(FIELDS, row[3:]))}
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class UsageRecorder:
+    """Aggregate generation usage in memory and flush it to SQLite in batches.
+
+    ``record`` only updates a dict keyed by tenant, model and minute, so
+    recording adds no I/O to the request path. ``run`` flushes the
+    aggregates every ``USAGE_FLUSH_INTERVAL`` seconds from a background task,
+    with the SQLite writes in a worker thread.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._store: Optional[UsageStore] = None
+        self._store_lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> UsageStore:
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = UsageStore(self._path or settings.usage_db_path)
+        return self._store
+
+    def record(self, model: str, stats: Dict, tenant: Optional[str] = None, now: Optional[float] = None) -> None:
+        """Count one completed generation from its final Ollama chunk."""
+        if not settings.usage_enabled:
+            return
+        tenant = tenant or _tenant.get() or "anonymous"
+        minute = int((time.time() if now is None else now) // 60 * 60)
+        values = (
+            1,
+            stats.get("prompt_eval_count", 0),
+            stats.get("eval_count", 0),
+            stats.get("prompt_eval_duration", 0) / 1e6,
+            stats.get("eval_duration", 0) / 1e6,
+            stats.get("total_duration", 0) / 1e6
+        )
+        key = (tenant, model, minute)
+        with self._lock:
+            totals = self._pending.get(key)
+            if totals is None:
+                self._pending[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    totals[i] += value
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """Write the pending aggregates to SQLite; blocking, returns the rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = [(tenant, model, minute, *totals) for (tenant, model, minute), totals in pending.items()]
+        try:
+            self.store.add(rows)
+        except Exception:
+            # Put the batch back so it is retried with the next flush
+            with self._lock:
+                for key, totals in pending.items():
+                    current = self._pending.setdefault(key, [0] * len(FIELDS))
+                    for i, value in enumerate(totals):
+                        current[i] += value
+            raise
+        return len(rows)
+
+    async def run(self) -> None:
+        """Flush periodically until cancelled, then flush once more."""
+        try:
+            while True:
+                await asyncio.sleep(settings.usage_flush_interval)
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.warning(f"Failed to flush usage: {e}")
+        finally:
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Failed to flush usage on shutdown: {e}")
+
+    async def query(
+        self,
+        start: float,
+        end: float,
+        granularity: str = "hour",
+        tenant: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Rollups per ``granularity`` bucket, including usage not yet flushed."""
+        await asyncio.to_thread(self.flush)
+        return await asyncio.to_thread(
+            self.store.query, int(start), int(end), GRANULARITIES[granularity], tenant, model
+        )
+
+
+# Global usage recorder instance
+usage_recorder = UsageRecorder()
@@ -0,0 +1,183 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "chunks.jsonl"
+INFO_FILE = "index.json"
+
+# k-means iterations and training sample size per partition when building the IVF partitions
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_PARTITION = 40
+
+
+class VectorIndex:
+    """Append-only cosine-similarity index over a memory-mapped float32 file.
+
+    Vectors are normalized on insert and stored row by row in
+    ``vectors.f32``; ``chunks.jsonl`` holds one metadata line per row. Both
+    files are only ever appended to, so an interrupted write leaves at most
+    a partial last row, which is dropped on load.
+
+    Search is exact (one matrix-vector product and ``argpartition``) until
+    the index holds ``ivf_threshold`` vectors. From then on the rows are
+    partitioned by spherical k-means and a query only scans the rows of its
+    ``ivf_probes`` nearest partitions. Partitions are rebuilt in memory when
+    the index is loaded and whenever it has doubled since the last build.
+    """
+
+    def __init__(self, path: str, ivf_threshold: int = 50000, ivf_probes: int = 8):
+        self.path = Path(path)
+        self.ivf_threshold = ivf_threshold
+        self.ivf_probes = ivf_probes
+        self.dim: Optional[int] = None
+        self.metadata: List[Dict[str, Any]] = []
+        self._vectors: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._partitioned_size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    @property
+    def partitions(self) -> int:
+        """Number of IVF partitions, 0 while search is exact."""
+        return 0 if self._centroids is None else len(self._centroids)
+
+    def _load(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        info_path = self.path / INFO_FILE
+        if not info_path.exists():
+            return
+        self.dim = json.loads(info_path.read_text())["dim"]
+
+        metadata_path = self.path / METADATA_FILE
+        if metadata_path.exists():
+            with open(metadata_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Partial last line from an interrupted write
+                    self.metadata.append(json.loads(line))
+
+        vectors_path = self.path / VECTORS_FILE
+        vectors_path.touch()
+        size = vectors_path.stat().st_size
+        row_bytes = self.dim * 4
+        count = min(size // row_bytes, len(self.metadata))
+        if size != count * row_bytes:
+            with open(vectors_path, "r+b") as f:
+                f.truncate(count * row_bytes)
+        if count < len(self.metadata):
+            self.metadata = self.metadata[:count]
+            self._rewrite_metadata()
+        self._remap(count)
+        if count >= self.ivf_threshold:
+            self._build_partitions()
+        logger.info(f"Loaded vector index with {count} vectors from {self.path}")
+
+    def _rewrite_metadata(self) -> None:
+        with open(self.path / METADATA_FILE, "wb") as f:
+            for entry in self.metadata:
+                f.write(json.dumps(entry).encode() + b"\n")
+
+    def _remap(self, count: int) -> None:
+        if count == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(self.path / VECTORS_FILE, dtype=np.float32, mode="r", shape=(count, self.dim))
+
+    def add(self, vectors: Sequence[Sequence[float]], metadata: List[Dict[str, Any]]) -> None:
+        """Append vectors with one metadata entry each."""
+        if not metadata:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(metadata):
+            raise ValueError("Expected one vector per metadata entry")
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                (self.path / INFO_FILE).write_text(json.dumps({"dim": self.dim}))
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dim}")
+
+            # Vectors first: metadata without a vector would be dropped on load anyway
+            with open(self.path / VECTORS_FILE, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self.path / METADATA_FILE, "ab") as f:
+                f.write(b"".join(json.dumps(entry).encode() + b"\n" for entry in metadata))
+
+            self.metadata.extend(metadata)
+            self._remap(len(self.metadata))
+            if len(self) >= self.ivf_threshold and len(self) >= 2 * self._partitioned_size:
+                self._build_partitions()
+            elif self._centroids is not None:
+                self._assignments = np.concatenate([self._assignments, self._assign_with(self._centroids, matrix)])
+
+    @staticmethod
+    def _assign_with(centroids: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each row, in blocks to bound memory."""
+        assignments = np.empty(len(matrix), dtype=np.int32)
+        for start in range(0, len(matrix), 8192):
+            block = matrix[start:start + 8192]
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+    def _build_partitions(self) -> None:
+        """Partition the rows by spherical k-means over a sample."""
+        count = len(self)
+        partitions = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample_size = min(count, partitions * KMEANS_SAMPLES_PER_PARTITION)
+        sample = np.asarray(self._vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(sample_size, partitions, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        assignments = self._assign_with(centroids, self._vectors)
+        self._centroids, self._assignments = centroids, assignments
+        self._partitioned_size = count
+        logger.info(f"Partitioned vector index into {partitions} partitions ({count} vectors)")
+
+    def search(self, query: Sequence[float], k: int = 4) -> List[Tuple[float, Dict[str, Any]]]:
+        """Return up to ``k`` (score, metadata) pairs, most similar first."""
+        vectors, centroids, assignments = self._vectors, self._centroids, self._assignments
+        if vectors is None or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        if q.shape != (self.dim,):
+            raise ValueError(f"Query dimension {q.shape[-1]} does not match index dimension {self.dim}")
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        if centroids is not None:
+            probes = min(self.ivf_probes, len(centroids))
+            nearest = np.argpartition(-(centroids @ q), probes - 1)[:probes]
+            rows = np.flatnonzero(np.isin(assignments, nearest))
+            # Rows appended after ``vectors`` was read are not searched yet
+            rows = rows[rows < len(vectors)]
+            scores = vectors[rows] @ q
+        else:
+            rows = None
+            scores = vectors @ q
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        ids = top if rows is None else rows[top]
+        return [(float(scores[i]), self.metadata[row]) for i, row in zip(top, ids)]
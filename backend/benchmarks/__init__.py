@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the OllamaStack API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_logging``.
+"""
@@ -0,0 +1,120 @@
+"""
+Per-request logging overhead benchmark.
+
+Compares the original logging setup (synchronous sinks, diagnose/backtrace
+enabled, two f-string lines per request) with the current one (queued sinks,
+one lazily formatted line per request, sampled health probes).
+
+Queued sinks move the write off the request path at the price of pickling each
+record, so with a fast local file they cost slightly more CPU per line. The
+``--sink-latency-ms`` scenario shows what they buy: when the sink stalls (a
+backed-up stdout pipe or a slow disk), synchronous logging stalls the event
+loop with it.
+
+Usage:
+    python -m benchmarks.bench_logging [--requests 20000] [--sink-latency-ms 1] [--json]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from loguru import logger
+
+from app.config import settings
+from app.main import format_json_record, should_log_request
+
+
+def legacy_request_logging(method: str, path: str, client: str, status: int, process_time: float) -> None:
+    logger.info(f"📥 {method} {path} - Client: {client}")
+    logger.info(f"📤 {method} {path} - Status: {status} - Time: {process_time:.3f}s")
+
+
+def current_request_logging(method: str, path: str, client: str, status: int, process_time: float) -> None:
+    if status >= 400 or should_log_request(path):
+        logger.bind(
+            method=method,
+            path=path,
+            status=status,
+            duration_ms=round(process_time * 1000, 2),
+            client=client
+        ).info("📤 {} {} - Status: {} - Time: {:.3f}s", method, path, status, process_time)
+
+
+def configure(mode: str, sink: Any) -> None:
+    logger.remove()
+    if mode == "legacy":
+        logger.add(sink, format=settings.log_format, level="INFO", backtrace=True, diagnose=True)
+    else:
+        logger.add(
+            sink,
+            format=format_json_record if mode == "json" else settings.log_format,
+            level="INFO",
+            enqueue=True,
+            backtrace=False,
+            diagnose=False
+        )
+
+
+def slow_sink(latency: float) -> Callable[[str], None]:
+    def write(message: str) -> None:
+        time.sleep(latency)
+    return write
+
+
+def run(mode: str, path: str, requests: int, sink: Any) -> float:
+    """Return the mean logging cost per request in microseconds."""
+    configure(mode, sink)
+    log_request = legacy_request_logging if mode == "legacy" else current_request_logging
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        log_request("GET" if path == "/ping" else "POST", path, "127.0.0.1", 200, 0.0123)
+    elapsed = time.perf_counter() - started
+
+    logger.remove()  # Drains any queued messages
+    return elapsed / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated requests per scenario")
+    parser.add_argument("--sink-latency-ms", type=float, default=1.0, help="Per-write latency of the stalled sink scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON only")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {"file": {}, "stalled_sink": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in ("/api/v1/chat", "/ping"):
+            results["file"][path] = {
+                mode: round(run(mode, path, args.requests, Path(tmp) / f"{mode}{path.replace('/', '_')}.log"), 2)
+                for mode in ("legacy", "current", "json")
+            }
+    # Stalled sinks are slow by definition, so use fewer requests
+    stalled_requests = max(1, min(args.requests, 500))
+    for path in ("/api/v1/chat", "/ping"):
+        results["stalled_sink"][path] = {
+            mode: round(run(mode, path, stalled_requests, slow_sink(args.sink_latency_ms / 1000)), 2)
+            for mode in ("legacy", "current", "json")
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for scenario, title in (
+        ("file", f"local file sink, {args.requests} requests"),
+        ("stalled_sink", f"sink stalling {args.sink_latency_ms} ms per write, {stalled_requests} requests")
+    ):
+        print(f"Per-request logging overhead on the request path (µs, {title})")
+        print(f"{'path':<16}{'legacy':>12}{'current':>12}{'json':>12}")
+        for path, row in results[scenario].items():
+            print(f"{path:<16}{row['legacy']:>12}{row['current']:>12}{row['json']:>12}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
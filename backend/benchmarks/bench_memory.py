@@ -0,0 +1,155 @@
+"""
+Conversation memory benchmark.
+
+Fills many conversations with the same messages in each in-memory layout and
+reports the Python heap each one takes (measured with ``tracemalloc``):
+
+- ``stored_messages``: a list of slotted message objects holding a ``str``
+  and a ``datetime`` each (the previous ``Conversation`` layout);
+- ``langchain``: a list of LangChain ``HumanMessage``/``AIMessage`` objects,
+  as a ``ConversationBufferMemory`` would keep (skipped if not installed);
+- ``compact``: ``Conversation`` with its column-wise ring buffer.
+
+Results are bytes per conversation and per message, next to the UTF-8 size
+of the content itself.
+
+Usage:
+    python -m benchmarks.bench_memory [--conversations 2000] [--messages 20] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.conversations import Conversation
+from benchmarks.load_test import git_commit
+
+try:
+    from langchain_core.messages import AIMessage, HumanMessage
+except ImportError:  # pragma: no cover - optional comparison
+    AIMessage = HumanMessage = None
+
+QUESTION = "How do I keep a long-running conversation from using too much memory?"
+ANSWER = (
+    "Keep only the most recent messages, store them compactly and build the "
+    "prompt objects when the prompt is assembled rather than keeping them around. "
+)
+
+
+class LegacyMessage:
+    __slots__ = ("id", "role", "content", "timestamp")
+
+    def __init__(self, message_id: int, role: str, content: str):
+        self.id = message_id
+        self.role = role
+        self.content = content
+        self.timestamp = datetime.now()
+
+
+class LegacyConversation:
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.created_at = datetime.now()
+        self.updated_at = self.created_at
+        self.messages: List[LegacyMessage] = []
+
+
+def script(conversation: int, messages: int) -> List[Tuple[str, str]]:
+    # Distinct strings per conversation, as real traffic would have
+    return [
+        ("user", f"{QUESTION} ({conversation}.{i})") if i % 2 == 0 else ("assistant", f"{ANSWER * 3}({conversation}.{i})")
+        for i in range(messages)
+    ]
+
+
+def build_stored_messages(conversation_id: str, turns: List[Tuple[str, str]]) -> Any:
+    conversation = LegacyConversation(conversation_id)
+    for role, content in turns:
+        conversation.messages.append(LegacyMessage(len(conversation.messages) + 1, role, content))
+    return conversation
+
+
+def build_langchain(conversation_id: str, turns: List[Tuple[str, str]]) -> Any:
+    return [HumanMessage(content=content) if role == "user" else AIMessage(content=content) for role, content in turns]
+
+
+def build_compact(conversation_id: str, turns: List[Tuple[str, str]]) -> Any:
+    conversation = Conversation(conversation_id)
+    for role, content in turns:
+        conversation.add(role, content)
+    return conversation
+
+
+def measure(build: Callable[[str, List[Tuple[str, str]]], Any], count: int, messages: int) -> int:
+    """Heap bytes still allocated after building ``count`` conversations.
+
+    Message strings are created inside the traced region, so layouts that
+    keep them are charged for them and layouts that re-encode them are not.
+    """
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    conversations = [build(f"conv-{i}", script(i, messages)) for i in range(count)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del conversations
+    return used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=2000, help="Conversations per layout")
+    parser.add_argument("--messages", type=int, default=20, help="Messages per conversation")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    content_bytes = sum(
+        len(content.encode()) for i in range(args.conversations) for _, content in script(i, args.messages)
+    ) / args.conversations
+
+    layouts: Dict[str, Optional[Callable]] = {
+        "stored_messages": build_stored_messages,
+        "langchain": build_langchain if HumanMessage is not None else None,
+        "compact": build_compact
+    }
+    results: List[Dict[str, Any]] = []
+    for name, build in layouts.items():
+        if build is None:
+            print(f"{name:<16} skipped (not installed)", file=sys.stderr)
+            continue
+        per_conversation = measure(build, args.conversations, args.messages) / args.conversations
+        results.append({
+            "layout": name,
+            "bytes_per_conversation": round(per_conversation),
+            "bytes_per_message": round(per_conversation / args.messages, 1),
+            "overhead_per_message": round((per_conversation - content_bytes) / args.messages, 1)
+        })
+        print(f"{name:<16} {round(per_conversation)}B/conversation", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "conversations": args.conversations,
+            "messages": args.messages,
+            "content_bytes_per_conversation": round(content_bytes)
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Serialization benchmark for large API payloads.
+
+Builds a large ``AgentResponse`` (many steps with tool output and timings) and
+a long ``ConversationHistoryResponse`` page, then times the ways they can be
+turned into a response body:
+
+- ``fastapi_default``: ``jsonable_encoder`` + stdlib ``json`` (FastAPI's
+  ``JSONResponse``, the previous default);
+- ``encoder_orjson``: ``jsonable_encoder`` + orjson (a plain ``ORJSONResponse``);
+- ``direct``: ``FastJSONResponse`` rendering the model with pydantic-core.
+
+It also reports gzip and, when installed, brotli compression time and ratio
+for each payload.
+
+Usage:
+    python -m benchmarks.bench_serialization [--steps 500] [--messages 200] [--output results.json]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.models.schemas import AgentResponse, ConversationHistoryResponse
+from app.responses import FastJSONResponse, brotli
+from benchmarks.load_test import git_commit
+
+PARAGRAPH = (
+    "Ollama runs large language models locally and exposes them over a small HTTP API. "
+    "The agent reasons step by step, calling tools when it needs facts or arithmetic. "
+)
+
+
+def build_agent_response(steps: int) -> AgentResponse:
+    started = datetime(2024, 1, 1, 12)
+    return AgentResponse(
+        result=PARAGRAPH * 20,
+        steps=[
+            {
+                "step": i + 1,
+                "thought": PARAGRAPH * 2,
+                "action": "calculator",
+                "action_input": f"{i} * 42",
+                "observation": f"Result: {i * 42}",
+                "duration_ms": 12.5 + i,
+                "timestamp": started + timedelta(seconds=i)
+            }
+            for i in range(steps)
+        ],
+        agent_type="default",
+        timestamp=started,
+        metadata={"iterations": steps, "timings": {f"llm_{i}": {"duration_ms": 100.0 + i} for i in range(steps)}}
+    )
+
+
+def build_history(messages: int) -> ConversationHistoryResponse:
+    started = datetime(2024, 1, 1, 12)
+    return ConversationHistoryResponse(
+        conversation_id="bench",
+        messages=[
+            {
+                "id": i + 1,
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": PARAGRAPH * (1 if i % 2 == 0 else 6),
+                "timestamp": started + timedelta(seconds=i)
+            }
+            for i in range(messages)
+        ],
+        message_count=messages,
+        has_more=False,
+        last_updated=started + timedelta(seconds=messages)
+    )
+
+
+def time_call(func: Callable[[], Any], runs: int) -> float:
+    """Median seconds per call."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def bench_payload(name: str, model: BaseModel, runs: int) -> Dict[str, Any]:
+    renderers = {
+        "fastapi_default": lambda: JSONResponse(jsonable_encoder(model)).body,
+        "encoder_orjson": lambda: orjson.dumps(jsonable_encoder(model)),
+        "direct": lambda: FastJSONResponse(model).body
+    }
+    body = FastJSONResponse(model).body
+    result: Dict[str, Any] = {
+        "payload": name,
+        "bytes": len(body),
+        "serialize_ms": {key: round(time_call(func, runs) * 1000, 3) for key, func in renderers.items()}
+    }
+
+    compressors = {"gzip": lambda: zlib.compress(body, 6)}
+    if brotli is not None:
+        compressors["br"] = lambda: brotli.compress(body, quality=4)
+    result["compression"] = {
+        key: {
+            "ms": round(time_call(func, runs) * 1000, 3),
+            "ratio": round(len(func()) / len(body), 3)
+        }
+        for key, func in compressors.items()
+    }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=500, help="Steps in the AgentResponse payload")
+    parser.add_argument("--messages", type=int, default=200, help="Messages in the history payload")
+    parser.add_argument("--runs", type=int, default=50, help="Timed runs per measurement")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = [
+        bench_payload("agent_response", build_agent_response(args.steps), args.runs),
+        bench_payload("history", build_history(args.messages), args.runs)
+    ]
+    for result in results:
+        timings = " ".join(f"{key}={value}ms" for key, value in result["serialize_ms"].items())
+        print(f"{result['payload']:<16} {result['bytes']}B {timings}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "steps": args.steps,
+            "messages": args.messages
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
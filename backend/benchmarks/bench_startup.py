@@ -0,0 +1,118 @@
+"""
+Startup benchmark for the OllamaStack API.
+
+Measures, in fresh interpreters so nothing is cached between runs:
+
+- ``import``: wall time of ``import app.main`` (and, for comparison, of
+  ``app.services.langchain_agent`` with the service actually constructed);
+- ``first_ping``: time from spawning uvicorn to the first successful ``/ping``.
+
+Ollama does not need to be running: startup must not depend on it.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.load_test import BACKEND_DIR, free_port, git_commit
+
+IMPORT_SNIPPETS = {
+    "app.main": "import app.main",
+    "agent_service": "from app.services.langchain_agent import get_agent_service; get_agent_service()"
+}
+
+
+def time_import(snippet: str) -> float:
+    """Seconds taken by ``snippet`` in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); {snippet}; print(time.perf_counter() - t)"
+    output = subprocess.check_output(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+    )
+    return float(output.strip().splitlines()[-1])
+
+
+def time_first_ping(timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until ``/ping`` answers."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/ping"
+    env = {
+        **os.environ,
+        # Point at a closed port so the benchmark never waits on a real Ollama
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{free_port()}",
+        "LOG_LEVEL": "WARNING"
+    }
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if httpx.get(url, timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"{url} did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def summarize(name: str, samples: List[float]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for name, snippet in IMPORT_SNIPPETS.items():
+        results.append(summarize(f"import:{name}", [time_import(snippet) for _ in range(args.runs)]))
+    results.append(summarize("first_ping", [time_first_ping() for _ in range(args.runs)]))
+    for result in results:
+        print(f"{result['name']:<22} median={result['median_ms']}ms", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version()
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
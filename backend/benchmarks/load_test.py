@@ -0,0 +1,268 @@
+"""
+Load test harness for the OllamaStack API.
+
+Drives ``/chat``, ``/ask``, ``/agent`` and ``/agent/stream`` at the given
+concurrency levels and reports requests per second, p50/p95/p99 latency and
+time to first token as JSON, so results can be compared between commits.
+
+By default it starts a mock Ollama server and the backend (both via uvicorn on
+free local ports); pass ``--target`` to benchmark an already running backend.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,8,32] [--requests 200]
+        [--endpoints chat,ask,agent,agent_stream] [--token-delay-ms 5]
+        [--failure-rate 0.0] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ENDPOINTS: Dict[str, Dict[str, Any]] = {
+    "chat": {"method": "POST", "path": "/api/v1/chat", "json": {"message": "What is Ollama?"}},
+    "ask": {"method": "GET", "path": "/api/v1/ask", "params": {"question": "What is Ollama?"}},
+    "agent": {"method": "POST", "path": "/api/v1/agent", "json": {"task": "Explain Ollama", "max_iterations": 2}},
+    "agent_stream": {
+        "method": "POST",
+        "path": "/api/v1/agent/stream",
+        "json": {"task": "Explain Ollama", "max_iterations": 2},
+        "stream": True
+    }
+}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(name: str, concurrency: int, latencies: List[float], ttfts: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 2) if value is not None else None
+
+    completed = len(latencies)
+    return {
+        "endpoint": name,
+        "concurrency": concurrency,
+        "requests": completed + errors,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(completed / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / completed) if completed else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99))
+        },
+        "ttft_ms": {
+            "p50": ms(percentile(ttfts, 50)),
+            "p95": ms(percentile(ttfts, 95)),
+            "p99": ms(percentile(ttfts, 99))
+        }
+    }
+
+
+async def timed_request(client: httpx.AsyncClient, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Issue one request, returning its latency and time to first token.
+
+    For SSE endpoints the first token is the first ``token`` event; otherwise it
+    is the first byte of the response body.
+    """
+    started = time.perf_counter()
+    ttft = None
+    async with client.stream(spec["method"], spec["path"], json=spec.get("json"), params=spec.get("params")) as response:
+        if spec.get("stream"):
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("event: token"):
+                    ttft = time.perf_counter() - started
+                if line.startswith("event: error"):
+                    raise RuntimeError("error event in stream")
+        else:
+            async for _ in response.aiter_bytes():
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+    return {"latency": time.perf_counter() - started, "ttft": ttft}
+
+
+async def run_scenario(base_url: str, name: str, concurrency: int, total: int, timeout: float) -> Dict[str, Any]:
+    spec = ENDPOINTS[name]
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors = 0
+    remaining = total
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker() -> None:
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                try:
+                    result = await timed_request(client, spec)
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(result["latency"])
+                if result["ttft"] is not None:
+                    ttfts.append(result["ttft"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(name, concurrency, latencies, ttfts, errors, elapsed)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+@contextmanager
+def local_stack(args: argparse.Namespace) -> Iterator[str]:
+    """Start a mock Ollama server and the backend, yielding the backend URL."""
+    mock_port, backend_port = free_port(), free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": mock_url,
+        "OLLAMA_HOST": mock_url,  # Used by the ollama client behind LangChain
+        "LOG_LEVEL": "WARNING"
+    }
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "benchmarks.mock_ollama",
+                "--port", str(mock_port),
+                "--token-delay-ms", str(args.token_delay_ms),
+                "--prefill-ms", str(args.prefill_ms),
+                "--failure-rate", str(args.failure_rate)
+            ],
+            cwd=BACKEND_DIR
+        )
+    ]
+    try:
+        wait_until_ready(f"{mock_url}/api/tags")
+        processes.append(subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(backend_port), "--log-level", "warning", "--no-access-log"
+            ],
+            cwd=BACKEND_DIR,
+            env=env
+        ))
+        backend_url = f"http://127.0.0.1:{backend_port}"
+        wait_until_ready(f"{backend_url}/ping")
+        yield backend_url
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_all(base_url: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for name in args.endpoints:
+        for concurrency in args.concurrency:
+            result = await run_scenario(base_url, name, concurrency, args.requests, args.timeout)
+            print(
+                f"{name:<14} c={concurrency:<4} rps={result['rps']} "
+                f"p50={result['latency_ms']['p50']}ms p99={result['latency_ms']['p99']}ms errors={result['errors']}",
+                file=sys.stderr
+            )
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Benchmark a running backend instead of starting one")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated endpoints to drive")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--token-delay-ms", type=float, default=5.0, help="Mock Ollama delay between tokens")
+    parser.add_argument("--prefill-ms", type=float, default=20.0, help="Mock Ollama delay before the first token")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Mock Ollama failure rate")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.endpoints = [e.strip() for e in args.endpoints.split(",")]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    if args.target:
+        results = asyncio.run(run_all(args.target, args))
+    else:
+        with local_stack(args) as base_url:
+            results = asyncio.run(run_all(base_url, args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "target": args.target or "local mock stack",
+            "requests_per_scenario": args.requests,
+            "mock": None if args.target else {
+                "token_delay_ms": args.token_delay_ms,
+                "prefill_ms": args.prefill_ms,
+                "failure_rate": args.failure_rate
+            }
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
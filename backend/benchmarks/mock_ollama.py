@@ -0,0 +1,171 @@
+"""
+Mock Ollama server for load tests and benchmarks.
+
+Implements enough of the Ollama API (``/api/generate``, ``/api/chat`` and
+``/api/tags``, streaming and non-streaming) to drive the backend without a
+model, with configurable prefill time, per-token delay and failure rate.
+Responses carry Ollama-style timing fields (nanoseconds).
+
+Usage:
+    python -m benchmarks.mock_ollama [--port 11434] [--token-delay-ms 20] [--failure-rate 0.0]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_RESPONSE = (
+    "Ollama is a tool for running large language models locally. It exposes a simple HTTP API "
+    "for generating completions and chatting with models on your own hardware."
+)
+
+
+class MockOllamaConfig:
+    """Behaviour of the mock server."""
+
+    def __init__(
+        self,
+        token_delay_ms: float = 20.0,
+        prefill_ms: float = 50.0,
+        failure_rate: float = 0.0,
+        max_tokens: int = 32,
+        response_text: str = DEFAULT_RESPONSE,
+        models: Optional[List[str]] = None,
+        seed: Optional[int] = None
+    ):
+        self.token_delay = token_delay_ms / 1000
+        self.prefill = prefill_ms / 1000
+        self.failure_rate = failure_rate
+        self.max_tokens = max_tokens
+        self.words = response_text.split()
+        self.models = models or ["llama3.2:latest"]
+        self.random = random.Random(seed)
+
+
+def create_app(config: Optional[MockOllamaConfig] = None) -> FastAPI:
+    """Create the mock Ollama application."""
+    config = config or MockOllamaConfig()
+    app = FastAPI(title="Mock Ollama")
+
+    def tokens_for(options: Dict[str, Any]) -> List[str]:
+        limit = options.get("num_predict") or config.max_tokens
+        count = max(1, min(config.max_tokens, limit))
+        return [f"{config.words[i % len(config.words)]} " for i in range(count)]
+
+    def final_stats(prompt: str, token_count: int, started: float, prefill: float, decode: float) -> Dict[str, Any]:
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": max(1, len(prompt) // 4),
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": token_count,
+            "eval_duration": int(decode * 1e9)
+        }
+
+    async def generate_tokens(tokens: List[str]) -> AsyncIterator[str]:
+        for token in tokens:
+            if config.token_delay:
+                await asyncio.sleep(config.token_delay)
+            yield token
+
+    def failure() -> Optional[JSONResponse]:
+        if config.failure_rate and config.random.random() < config.failure_rate:
+            return JSONResponse({"error": "mock failure"}, status_code=500)
+        return None
+
+    async def run(request: Request, chat: bool):
+        body = await request.json()
+        error = failure()
+        if error is not None:
+            return error
+
+        model = body.get("model", config.models[0])
+        stream = body.get("stream", True)
+        if chat:
+            prompt = "".join(m.get("content", "") for m in body.get("messages", []))
+        else:
+            prompt = body.get("prompt", "")
+        tokens = tokens_for(body.get("options") or {})
+        started = time.perf_counter()
+
+        def chunk(content: str) -> Dict[str, Any]:
+            base = {"model": model, "created_at": datetime.now(timezone.utc).isoformat()}
+            if chat:
+                base["message"] = {"role": "assistant", "content": content}
+            else:
+                base["response"] = content
+            return base
+
+        if not stream:
+            await asyncio.sleep(config.prefill)
+            decode_started = time.perf_counter()
+            text = "".join([token async for token in generate_tokens(tokens)])
+            decode = time.perf_counter() - decode_started
+            return {**chunk(text), **final_stats(prompt, len(tokens), started, config.prefill, decode)}
+
+        async def lines() -> AsyncIterator[str]:
+            await asyncio.sleep(config.prefill)
+            decode_started = time.perf_counter()
+            async for token in generate_tokens(tokens):
+                yield json.dumps({**chunk(token), "done": False}) + "\n"
+            decode = time.perf_counter() - decode_started
+            yield json.dumps({**chunk(""), **final_stats(prompt, len(tokens), started, config.prefill, decode)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        return await run(request, chat=False)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        return await run(request, chat=True)
+
+    @app.get("/api/tags")
+    async def tags():
+        return {
+            "models": [
+                {"name": name, "model": name, "size": 2_000_000_000, "details": {"family": "mock"}}
+                for name in config.models
+            ]
+        }
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--token-delay-ms", type=float, default=20.0, help="Delay between streamed tokens")
+    parser.add_argument("--prefill-ms", type=float, default=50.0, help="Delay before the first token")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--max-tokens", type=int, default=32, help="Tokens generated per response")
+    parser.add_argument("--model", action="append", dest="models", help="Model name reported by /api/tags (repeatable)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockOllamaConfig(
+        token_delay_ms=args.token_delay_ms,
+        prefill_ms=args.prefill_ms,
+        failure_rate=args.failure_rate,
+        max_tokens=args.max_tokens,
+        models=args.models,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Python client for the OllamaStack API.
+
+``OllamaStackClient`` (blocking) and ``AsyncOllamaStackClient`` share one
+pooled HTTP client per instance, retry refused requests honoring
+``Retry-After``, stream chat and agent events, and batch chat and embedding
+calls. Needs only ``httpx`` and ``orjson``.
+"""
+
+from .client import (
+    AsyncOllamaStackClient,
+    BackgroundLoop,
+    OllamaStackClient,
+    OllamaStackError,
+    background_loop
+)
+
+__all__ = [
+    "AsyncOllamaStackClient",
+    "BackgroundLoop",
+    "OllamaStackClient",
+    "OllamaStackError",
+    "background_loop"
+]
@@ -0,0 +1,363 @@
+import time
+import uuid
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Optional, Sequence, TypeVar, Union
+
+import httpx
+import orjson
+
+T = TypeVar("T")
+
+# Statuses the server answers before doing any work, so retrying is safe
+RETRY_STATUSES = (429, 502, 503)
+MAX_RETRY_AFTER = 60.0
+EMBEDDING_BATCH_SIZE = 512  # The server's default EMBEDDING_MAX_INPUTS
+
+
+class OllamaStackError(Exception):
+    """Error response from the OllamaStack API, or an error event in a stream."""
+
+    def __init__(self, status_code: Optional[int], detail: str):
+        super().__init__(f"HTTP {status_code}: {detail}" if status_code else detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_from(response: httpx.Response) -> OllamaStackError:
+    try:
+        body = response.json()
+        detail = body.get("detail") or body.get("error") or response.text
+    except ValueError:
+        detail = response.text
+    return OllamaStackError(response.status_code, str(detail))
+
+
+class AsyncOllamaStackClient:
+    """Async client for the OllamaStack API.
+
+    One pooled ``httpx.AsyncClient`` serves every call. Requests refused with
+    429, 502 or 503, or that could not connect, are retried up to
+    ``max_retries`` times, waiting as long as the server's ``Retry-After``
+    asks or else with jittered exponential backoff. Streams are retried only
+    before their first event. POSTs send an ``Idempotency-Key`` so retries
+    never run twice on the server.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        api_key: Optional[str] = None,
+        timeout: float = 300.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        headers = {"X-API-Key": api_key} if api_key else {}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport
+        )
+
+    async def __aenter__(self) -> "AsyncOllamaStackClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            wait = retry_after(response)
+            if wait is not None:
+                return min(wait, MAX_RETRY_AFTER)
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _send(self, method: str, path: str, stream: bool = False, **kwargs: Any) -> httpx.Response:
+        """Send a request with retries, returning a successful response.
+
+        POSTs carry one Idempotency-Key across their retries, so a retry of a
+        request the server already ran is answered without running it again.
+        """
+        if method == "POST":
+            kwargs["headers"] = {"Idempotency-Key": uuid.uuid4().hex, **kwargs.get("headers", {})}
+        for attempt in range(self.max_retries + 1):
+            try:
+                request = self._http.build_request(method, path, **kwargs)
+                response = await self._http.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            if response.status_code < 400:
+                return response
+            if stream:
+                await response.aread()
+                await response.aclose()
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                raise _error_from(response)
+            await asyncio.sleep(self._delay(attempt, response))
+        raise AssertionError("unreachable")
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        response = await self._send(method, path, **kwargs)
+        return orjson.loads(response.content)
+
+    async def _events(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate the Server-Sent Events of a streaming endpoint.
+
+        An ``error`` event ends the stream by raising ``OllamaStackError``,
+        except for one model's error in a comparison, which is yielded.
+        """
+        response = await self._send("POST", path, stream=True, json=payload)
+        try:
+            data: List[str] = []
+            async for line in response.aiter_lines():
+                if line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                elif not line and data:
+                    event = orjson.loads("\n".join(data))
+                    data = []
+                    if event.get("type") == "error" and "model" not in event:
+                        raise OllamaStackError(event.get("status"), event.get("detail", "Stream failed"))
+                    yield event
+        finally:
+            await response.aclose()
+
+    async def health(self) -> Dict[str, Any]:
+        return await self._request("GET", "/api/v1/health")
+
+    async def chat(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        **options: Any
+    ) -> Dict[str, Any]:
+        """Send a chat message and return the complete response."""
+        payload = {"message": message, "conversation_id": conversation_id, "model": model, "temperature": temperature, **options}
+        return await self._request("POST", "/api/v1/chat", json=payload)
+
+    def stream_chat(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        **options: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat answer as start, token and end events."""
+        payload = {"message": message, "conversation_id": conversation_id, "model": model, "temperature": temperature, **options}
+        return self._events("/api/v1/chat/stream", payload)
+
+    async def compare(self, message: str, models: Sequence[str], **options: Any) -> Dict[str, Any]:
+        """Send one message to several models and return each model's answer and timings."""
+        payload = {"message": message, "models": list(models), **options}
+        return await self._request("POST", "/api/v1/chat/compare", json=payload)
+
+    def stream_compare(self, message: str, models: Sequence[str], **options: Any) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a comparison as model-tagged start, token, end and error events, then done."""
+        payload = {"message": message, "models": list(models), **options, "stream": True}
+        return self._events("/api/v1/chat/compare", payload)
+
+    async def agent(
+        self,
+        task: str,
+        agent_type: str = "default",
+        tools: Optional[List[str]] = None,
+        max_iterations: int = 10,
+        **options: Any
+    ) -> Dict[str, Any]:
+        """Run an agent task and return its result and steps."""
+        payload = {"task": task, "agent_type": agent_type, "tools": tools, "max_iterations": max_iterations, **options}
+        return await self._request("POST", "/api/v1/agent", json=payload)
+
+    def stream_agent(
+        self,
+        task: str,
+        agent_type: str = "default",
+        tools: Optional[List[str]] = None,
+        max_iterations: int = 10,
+        **options: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an agent run as start, step, token, tool and end events."""
+        payload = {"task": task, "agent_type": agent_type, "tools": tools, "max_iterations": max_iterations, **options}
+        return self._events("/api/v1/agent/stream", payload)
+
+    async def history(
+        self,
+        conversation_id: str,
+        limit: int = 50,
+        before: Optional[int] = None,
+        after: Optional[int] = None
+    ) -> Dict[str, Any]:
+        params = {key: value for key, value in (("limit", limit), ("before", before), ("after", after)) if value is not None}
+        return await self._request("GET", f"/api/v1/conversations/{conversation_id}/history", params=params)
+
+    async def embed(self, texts: Union[str, List[str]], model: Optional[str] = None) -> List[List[float]]:
+        """Embed texts in one request, returning one vector per text."""
+        body = await self._request("POST", "/api/v1/embeddings", json={"input": texts, "model": model})
+        return [item["embedding"] for item in body["data"]]
+
+    async def embed_many(
+        self,
+        texts: Sequence[str],
+        model: Optional[str] = None,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        concurrency: int = 4
+    ) -> List[List[float]]:
+        """Embed any number of texts in concurrent requests of ``batch_size``."""
+        batches = [list(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        results = await gather_limited([self.embed(batch, model) for batch in batches], concurrency)
+        return [vector for vectors in results for vector in vectors]
+
+    async def chat_many(self, messages: Sequence[str], concurrency: int = 4, **options: Any) -> List[Dict[str, Any]]:
+        """Send independent chat messages concurrently, returning responses in order."""
+        return await gather_limited([self.chat(message, **options) for message in messages], concurrency)
+
+
+async def gather_limited(awaitables: Sequence[Awaitable[T]], concurrency: int) -> List[T]:
+    """``asyncio.gather`` running at most ``concurrency`` awaitables at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(a) for a in awaitables))
+
+
+class BackgroundLoop:
+    """An event loop running in a daemon thread, for calling async code from sync code.
+
+    Works from any thread, including one that already runs an event loop,
+    without creating or installing a loop per call.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="ollamastack-client", daemon=True)
+        self._thread.start()
+
+    def run(self, awaitable: Awaitable[T]) -> T:
+        """Run ``awaitable`` on the background loop and wait for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Cannot wait on the background loop from its own thread")
+
+        async def wrapper() -> T:
+            return await awaitable
+
+        return asyncio.run_coroutine_threadsafe(wrapper(), self.loop).result()
+
+    def iterate(self, iterator: AsyncIterator[T]) -> Iterator[T]:
+        """Drive an async iterator from sync code, one item per round trip."""
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if hasattr(iterator, "aclose"):
+                self.run(iterator.aclose())
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def background_loop() -> BackgroundLoop:
+    """The shared background loop, started on first use."""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                _background_loop = BackgroundLoop()
+    return _background_loop
+
+
+class OllamaStackClient:
+    """Blocking client for the OllamaStack API.
+
+    Wraps an ``AsyncOllamaStackClient`` on a background loop shared by all
+    blocking clients, so it keeps the same connection pool, retries and
+    streaming, and can be used from inside async code too.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._loop = background_loop()
+        self._client = self._loop.run(self._create(*args, **kwargs))
+
+    @staticmethod
+    async def _create(*args: Any, **kwargs: Any) -> AsyncOllamaStackClient:
+        # The pool is created on the loop that will use it
+        return AsyncOllamaStackClient(*args, **kwargs)
+
+    def __enter__(self) -> "OllamaStackClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._loop.run(self._client.aclose())
+
+    def health(self) -> Dict[str, Any]:
+        return self._loop.run(self._client.health())
+
+    def chat(self, message: str, **kwargs: Any) -> Dict[str, Any]:
+        return self._loop.run(self._client.chat(message, **kwargs))
+
+    def stream_chat(self, message: str, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return self._loop.iterate(self._client.stream_chat(message, **kwargs))
+
+    def compare(self, message: str, models: Sequence[str], **kwargs: Any) -> Dict[str, Any]:
+        return self._loop.run(self._client.compare(message, models, **kwargs))
+
+    def stream_compare(self, message: str, models: Sequence[str], **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return self._loop.iterate(self._client.stream_compare(message, models, **kwargs))
+
+    def agent(self, task: str, **kwargs: Any) -> Dict[str, Any]:
+        return self._loop.run(self._client.agent(task, **kwargs))
+
+    def stream_agent(self, task: str, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        return self._loop.iterate(self._client.stream_agent(task, **kwargs))
+
+    def history(self, conversation_id: str, **kwargs: Any) -> Dict[str, Any]:
+        return self._loop.run(self._client.history(conversation_id, **kwargs))
+
+    def embed(self, texts: Union[str, List[str]], model: Optional[str] = None) -> List[List[float]]:
+        return self._loop.run(self._client.embed(texts, model))
+
+    def embed_many(self, texts: Sequence[str], **kwargs: Any) -> List[List[float]]:
+        return self._loop.run(self._client.embed_many(texts, **kwargs))
+
+    def chat_many(self, messages: Sequence[str], **kwargs: Any) -> List[Dict[str, Any]]:
+        return self._loop.run(self._client.chat_many(messages, **kwargs))
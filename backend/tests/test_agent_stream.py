@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.langchain_agent import agent_service
+
+
+def fake_generate(*completions):
+    """Build a _stream_generate replacement returning canned completions."""
+    remaining = list(completions)
+
+    async def _stream_generate(prompt, **kwargs):
+        completion = remaining.pop(0)
+        for token in completion.split(" "):
+            yield {"response": token + " ", "done": False}
+        yield {"response": "", "done": True, "eval_count": len(completion.split(" "))}
+
+    return _stream_generate
+
+
+def parse_sse(body: str):
+    """Parse a Server-Sent Events body into a list of event payloads."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        data = [line[len("data: "):] for line in block.splitlines() if line.startswith("data: ")]
+        if data:
+            events.append(json.loads("".join(data)))
+    return events
+
+
+class TestAgentStreaming:
+    """Test cases for the streaming agent endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        """Create test client."""
+        return TestClient(app)
+
+    def test_stream_emits_tool_steps_and_tokens(self, client, monkeypatch):
+        """Test that tool calls, tool results and tokens are streamed."""
+        monkeypatch.setattr(agent_service, "_stream_generate", fake_generate(
+            "Thought: I should add.\nAction: calculator\nAction Input: 2 + 2",
+            "Final Answer: The answer is 4",
+        ))
+
+        response = client.post("/api/v1/agent/stream", json={"task": "What is 2 + 2?"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_sse(response.text)
+        types = [e["type"] for e in events]
+        assert types[0] == "start"
+        assert types[-1] == "end"
+        assert "token" in types
+        assert types.index("tool_call") < types.index("tool_result")
+
+        tool_result = next(e for e in events if e["type"] == "tool_result")
+        assert tool_result["tool"] == "calculator"
+        assert tool_result["output"] == "Result: 4"
+        assert "duration_ms" in tool_result
+        assert events[-1]["result"].strip() == "The answer is 4"
+
+    def test_running_out_of_iterations_is_not_an_answer(self, client, monkeypatch):
+        """Test that the last tool output is not returned as the result when no final answer came."""
+        monkeypatch.setattr(agent_service, "_stream_generate", fake_generate(
+            "Action: calculator\nAction Input: 2 + 2",
+            "Action: calculator\nAction Input: 3 + 3",
+        ))
+
+        response = client.post("/api/v1/agent/stream", json={"task": "Keep adding", "max_iterations": 2})
+        end = parse_sse(response.text)[-1]
+        assert end["type"] == "end" and end["iterations"] == 2
+        assert end["result"] == "No final answer within 2 iterations"
+        assert end["metadata"]["completed"] is False
+
+    def test_stream_reports_errors_as_events(self, client, monkeypatch):
+        """Test that upstream failures end the stream with an error event."""
+        async def failing_generate(prompt, **kwargs):
+            raise Exception("connection refused")
+            yield
+
+        monkeypatch.setattr(agent_service, "_stream_generate", failing_generate)
+
+        response = client.post("/api/v1/agent/stream", json={"task": "Hello"})
+        assert response.status_code == 200
+        events = parse_sse(response.text)
+        assert events[-1]["type"] == "error"
+        assert "connection refused" in events[-1]["detail"]
+
+    def test_agent_endpoint_collects_streamed_steps(self, client, monkeypatch):
+        """Test that /agent returns the same steps the stream produces."""
+        monkeypatch.setattr(agent_service, "_stream_generate", fake_generate(
+            "Final Answer: Done",
+        ))
+
+        response = client.post("/api/v1/agent", json={"task": "Say done"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["result"] == "Done"
+        assert [s["action"] for s in data["steps"]] == ["analyzing_task", "generating_response"]
+        assert all("duration_ms" in s for s in data["steps"])
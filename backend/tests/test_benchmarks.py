@@ -0,0 +1,72 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from benchmarks.load_test import percentile, summarize
+from benchmarks.mock_ollama import MockOllamaConfig, create_app
+
+
+class TestMockOllama:
+    """Test cases for the mock Ollama server used by the benchmarks."""
+
+    def test_streaming_generate(self):
+        """Test that /api/generate streams tokens then a final stats chunk."""
+        client = TestClient(create_app(MockOllamaConfig(token_delay_ms=0, prefill_ms=0, max_tokens=4)))
+        response = client.post("/api/generate", json={"model": "llama3.2", "prompt": "Hi"})
+        assert response.status_code == 200
+
+        chunks = [json.loads(line) for line in response.text.splitlines()]
+        assert [c["done"] for c in chunks] == [False] * 4 + [True]
+        assert chunks[-1]["eval_count"] == 4
+        assert "prompt_eval_duration" in chunks[-1]
+
+    def test_non_streaming_chat(self):
+        """Test that /api/chat answers in one message when stream is false."""
+        client = TestClient(create_app(MockOllamaConfig(token_delay_ms=0, prefill_ms=0, max_tokens=3)))
+        response = client.post("/api/chat", json={
+            "model": "llama3.2",
+            "messages": [{"role": "user", "content": "Hi"}],
+            "stream": False
+        })
+        data = response.json()
+        assert data["done"] is True
+        assert data["message"]["role"] == "assistant"
+        assert len(data["message"]["content"].split()) == 3
+
+    def test_failure_rate(self):
+        """Test that a failure rate of 1 fails every request."""
+        client = TestClient(create_app(MockOllamaConfig(failure_rate=1.0)))
+        response = client.post("/api/generate", json={"prompt": "Hi"})
+        assert response.status_code == 500
+        assert response.json()["error"] == "mock failure"
+
+
+class TestLoadTestReport:
+    """Test cases for load test statistics."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 50) is None
+
+    def test_summarize(self):
+        """Test the per-scenario summary."""
+        result = summarize("chat", 4, [0.1, 0.2, 0.3], [0.05], errors=1, elapsed=1.5)
+        assert result["requests"] == 4
+        assert result["rps"] == 2.0
+        assert result["latency_ms"]["p50"] == 200.0
+        assert result["ttft_ms"]["p50"] == 50.0
+
+
+class TestSerializationBenchmark:
+    """Test cases for the serialization benchmark."""
+
+    def test_bench_payload(self):
+        """Test that every renderer is timed and compression ratios are reported."""
+        from benchmarks.bench_serialization import bench_payload, build_history
+
+        result = bench_payload("history", build_history(10), runs=2)
+        assert set(result["serialize_ms"]) == {"fastapi_default", "encoder_orjson", "direct"}
+        assert 0 < result["compression"]["gzip"]["ratio"] < 1
@@ -0,0 +1,131 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, is_retryable
+from app.services.conversations import Conversation
+from app.services.langchain_agent import OllamaHTTPError, agent_service
+
+
+class TestCircuitBreaker:
+    """Test cases for the circuit breaker state machine."""
+
+    def test_opens_after_threshold(self):
+        """Test that consecutive failures open the breaker."""
+        breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=60)
+        breaker.record_failure(RuntimeError("boom"))
+        assert breaker.allow_request()
+        breaker.record_failure(RuntimeError("boom"))
+        assert breaker.state == "open"
+        assert not breaker.allow_request()
+        assert breaker.snapshot()["last_error"] == "RuntimeError: boom"
+
+    def test_half_open_single_probe(self):
+        """Test that one probe is let through after the recovery timeout."""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        assert breaker.allow_request()
+        assert breaker.state == "half_open"
+        assert not breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.failures == 0
+
+    def test_cancelled_probe_is_released(self):
+        """Test that a probe ending without an outcome frees the half-open slot."""
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        assert breaker.allow_request()
+        with pytest.raises(asyncio.CancelledError):
+            with breaker.call():
+                raise asyncio.CancelledError()
+        assert breaker.allow_request()
+
+    def test_is_retryable(self):
+        """Test that only failures before generation started are retried."""
+        request = httpx.Request("POST", "http://ollama/api/generate")
+        assert is_retryable(httpx.ConnectError("refused"))
+        assert is_retryable(OllamaHTTPError(503, "server busy"))
+        assert not is_retryable(OllamaHTTPError(500, "model crashed"))
+        assert not is_retryable(httpx.ReadTimeout("slow", request=request))
+        assert not is_retryable(ValueError("bad output"))
+
+
+class TestGenerationPaths:
+    """Test cases for breaker-driven path selection in the agent service."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_breakers(self, monkeypatch):
+        monkeypatch.setattr(settings, "generation_retry_backoff", 0.0)
+        for breaker in agent_service.breakers.values():
+            monkeypatch.setattr(breaker, "failure_threshold", 2)
+            monkeypatch.setattr(breaker, "recovery_timeout", 60)
+            breaker.reset()
+        yield
+        for breaker in agent_service.breakers.values():
+            breaker.reset()
+
+    def generate(self):
+        return asyncio.run(agent_service._generate_response(None, "Hi", Conversation("c")))
+
+    def test_skips_open_langchain_path(self, monkeypatch):
+        """Test that a broken LangChain path stops being tried once its circuit opens."""
+        calls = {"langchain": 0, "http": 0}
+
+        async def broken_langchain(*args):
+            calls["langchain"] += 1
+            raise RuntimeError("langchain broken")
+
+        async def working_http(*args):
+            calls["http"] += 1
+            return "from http"
+
+        monkeypatch.setattr(agent_service, "_generate_langchain", broken_langchain)
+        monkeypatch.setattr(agent_service, "_generate_http", working_http)
+
+        assert [self.generate() for _ in range(4)] == ["from http"] * 4
+        assert calls == {"langchain": 2, "http": 4}
+        assert agent_service.breaker_states()["langchain"]["state"] == "open"
+
+        # After the recovery timeout one request probes LangChain again
+        monkeypatch.setattr(agent_service.breakers["langchain"], "recovery_timeout", 0)
+        monkeypatch.setattr(agent_service, "_generate_langchain", lambda *args: asyncio.sleep(0, "from langchain"))
+        assert self.generate() == "from langchain"
+        assert agent_service.breaker_states()["langchain"]["state"] == "closed"
+
+    def test_retries_retryable_failures(self, monkeypatch):
+        """Test that connection failures are retried and other failures are not."""
+        attempts = []
+
+        async def flaky_http(*args):
+            attempts.append(1)
+            if attempts.count(1) < 3:
+                raise httpx.ConnectError("refused")
+            return "eventually"
+
+        async def broken_langchain(*args):
+            attempts.append(0)
+            raise ValueError("bad prompt")
+
+        monkeypatch.setattr(agent_service, "_generate_langchain", broken_langchain)
+        monkeypatch.setattr(agent_service, "_generate_http", flaky_http)
+        assert self.generate() == "eventually"
+        assert attempts == [0, 1, 1, 1]
+
+    def test_all_paths_open(self, monkeypatch):
+        """Test that requests fail fast when every circuit is open."""
+        for breaker in agent_service.breakers.values():
+            breaker.record_failure()
+            breaker.record_failure()
+
+        async def unreachable(*args):
+            raise AssertionError("open paths must not be called")
+
+        monkeypatch.setattr(agent_service, "_generate_langchain", unreachable)
+        monkeypatch.setattr(agent_service, "_generate_http", unreachable)
+        assert "circuits open" in self.generate()
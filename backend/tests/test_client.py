@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from app.main import app
+from app.services import langchain_agent
+from app.services.langchain_agent import agent_service
+from ollamastack_client import AsyncOllamaStackClient, OllamaStackClient, OllamaStackError
+
+
+def sse(*events):
+    return b"".join(b"event: " + e["type"].encode() + b"\ndata: " + orjson.dumps(e) + b"\n\n" for e in events)
+
+
+class TestAsyncClient:
+    """Test cases for retries and streaming in the async client."""
+
+    def test_retries_honor_retry_after(self):
+        """Test that 429 responses are retried after Retry-After and other errors are raised."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"}, json={"detail": "slow down"})
+            if request.url.path == "/api/v1/health":
+                return httpx.Response(200, json={"status": "healthy"})
+            return httpx.Response(400, json={"error": "Bad Request", "detail": "no"})
+
+        async def run():
+            async with AsyncOllamaStackClient(transport=httpx.MockTransport(handler), backoff=0) as client:
+                assert (await client.health())["status"] == "healthy"
+                with pytest.raises(OllamaStackError) as error:
+                    await client.chat("Hi")
+                return error.value
+
+        error = asyncio.run(run())
+        assert calls == ["/api/v1/health", "/api/v1/health", "/api/v1/chat"]
+        assert (error.status_code, error.detail) == (400, "no")
+
+    def test_stream_events_and_errors(self):
+        """Test that SSE events are parsed and an error event raises."""
+        def handler(request):
+            body = sse({"type": "start"}, {"type": "token", "content": "Hi"})
+            if request.url.path == "/api/v1/agent/stream":
+                body += sse({"type": "error", "status": 504, "detail": "Deadline exceeded"})
+            return httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+
+        async def run():
+            async with AsyncOllamaStackClient(transport=httpx.MockTransport(handler)) as client:
+                events = [e async for e in client.stream_chat("Hi")]
+                with pytest.raises(OllamaStackError) as error:
+                    async for _ in client.stream_agent("task"):
+                        pass
+                return events, error.value
+
+        events, error = asyncio.run(run())
+        assert [e["type"] for e in events] == ["start", "token"]
+        assert error.status_code == 504
+
+    def test_embed_many_batches_in_order(self):
+        """Test that embed_many splits inputs into batches and keeps their order."""
+        def handler(request):
+            texts = orjson.loads(request.content)["input"]
+            return httpx.Response(200, json={"data": [{"index": i, "embedding": [float(len(t))]} for i, t in enumerate(texts)]})
+
+        async def run():
+            async with AsyncOllamaStackClient(transport=httpx.MockTransport(handler)) as client:
+                return await client.embed_many(["a", "bb", "ccc"], batch_size=2)
+
+        assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+
+
+class TestBlockingClient:
+    """Test cases for the blocking client against the app."""
+
+    def test_stream_chat_from_inside_a_running_loop(self, monkeypatch):
+        """Test the blocking client's streaming end to end, called from async code."""
+        async def _stream_generate(prompt, **kwargs):
+            for token in ("Hello", " there"):
+                yield {"response": token, "done": False}
+            yield {"response": "", "done": True}
+
+        monkeypatch.setattr(agent_service, "_stream_generate", _stream_generate)
+
+        async def run():
+            with OllamaStackClient(transport=httpx.ASGITransport(app=app)) as client:
+                return list(client.stream_chat("Hi", conversation_id="sdk-stream"))
+
+        events = asyncio.run(run())
+        assert events[-1]["type"] == "end" and events[-1]["message"] == "Hello there"
+
+
+class TestLegacyRunAgent:
+    """Test cases for the legacy run_agent wrapper."""
+
+    def test_reuses_one_loop(self, monkeypatch):
+        """Test that run_agent works inside a running loop and reuses its background loop and service."""
+        loops = []
+
+        async def fake_chat(message, **kwargs):
+            loops.append(asyncio.get_running_loop())
+            return {"message": f"echo {message}"}
+
+        _, service = langchain_agent._get_legacy()
+        assert service is not agent_service
+        monkeypatch.setattr(service, "chat", fake_chat)
+
+        async def run():
+            return langchain_agent.run_agent("one"), langchain_agent.run_agent("two")
+
+        assert asyncio.run(run()) == ("echo one", "echo two")
+        assert loops[0] is loops[1]
@@ -0,0 +1,73 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.langchain_agent import agent_service
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replace _stream_generate with one answering with the model's name.
+
+    The "broken" model fails; ``running`` records the peak number of
+    concurrent generations.
+    """
+    running = {"now": 0, "peak": 0}
+
+    async def _stream_generate(prompt, model=None, **kwargs):
+        if model == "broken":
+            raise RuntimeError("model not found")
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        try:
+            for token in (model, " says hi"):
+                await asyncio.sleep(0.01)
+                yield {"response": token, "done": False}
+            yield {"response": "", "done": True, "prompt_eval_count": 12, "eval_count": 4, "eval_duration": 200_000_000}
+        finally:
+            running["now"] -= 1
+
+    monkeypatch.setattr(agent_service, "_stream_generate", _stream_generate)
+    return running
+
+
+class TestCompare:
+    """Test cases for the model comparison endpoint."""
+
+    def test_results_per_model(self, client, upstream):
+        """Test that each model gets its answer and timings, and a failing model only fails itself."""
+        response = client.post("/api/v1/chat/compare", json={"message": "Hi", "models": ["a", "broken", "b"]})
+        assert response.status_code == 200
+
+        results = response.json()["results"]
+        assert [r["model"] for r in results] == ["a", "broken", "b"]
+        assert results[0]["message"] == "a says hi" and results[2]["message"] == "b says hi"
+        assert results[0]["tokens_per_second"] == 20.0 and results[0]["ttft_ms"] > 0
+        assert results[1]["error"] == "model not found" and results[1]["message"] is None
+
+    def test_stream_is_tagged_and_slots_are_shared(self, client, upstream, monkeypatch):
+        """Test the model-tagged event stream and that generations wait for a comparison slot."""
+        monkeypatch.setattr(settings, "compare_max_concurrency", 1)
+        monkeypatch.setattr(agent_service, "_compare_slots", None)
+        response = client.post("/api/v1/chat/compare", json={"message": "Hi", "models": ["a", "b"], "stream": True})
+
+        events = [orjson.loads(line[6:]) for line in response.text.splitlines() if line.startswith("data: ")]
+        assert events[-1]["type"] == "done"
+        assert {e["model"] for e in events if e["type"] == "end"} == {"a", "b"}
+        assert all("model" in e for e in events[:-1])
+        assert upstream["peak"] == 1
+
+    def test_rejects_too_many_or_repeated_models(self, client, upstream, monkeypatch):
+        """Test that comparisons are limited to COMPARE_MAX_MODELS distinct models."""
+        monkeypatch.setattr(settings, "compare_max_models", 2)
+        assert client.post("/api/v1/chat/compare", json={"message": "Hi", "models": ["a", "b", "c"]}).status_code == 422
+        assert client.post("/api/v1/chat/compare", json={"message": "Hi", "models": ["a", "a"]}).status_code == 422
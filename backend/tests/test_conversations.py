@@ -0,0 +1,137 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.conversations import Conversation
+from app.services.langchain_agent import agent_service
+
+
+def make_conversation(conversation_id: str, count: int) -> Conversation:
+    conversation = agent_service.get_memory(conversation_id)
+    for i in range(count):
+        if i % 2 == 0:
+            conversation.add_user_message(f"question {i}")
+        else:
+            conversation.add_ai_message(f"answer {i}")
+    return conversation
+
+
+class TestConversation:
+    """Test cases for the conversation message log."""
+
+    def test_ids_and_roles(self):
+        """Test that messages get increasing ids and explicit roles."""
+        conversation = Conversation("c")
+        first = conversation.add_user_message("Hi")
+        second = conversation.add_ai_message("Hello")
+        assert (first.id, second.id) == (1, 2)
+        assert [m.role for m in conversation.messages] == ["user", "assistant"]
+        assert second.timestamp >= first.timestamp
+
+    def test_page_cursors(self):
+        """Test newest-first default paging and before/after cursors."""
+        conversation = Conversation("c")
+        for i in range(10):
+            conversation.add_user_message(str(i))
+
+        messages, has_more = conversation.page(3)
+        assert [m.id for m in messages] == [8, 9, 10] and has_more
+
+        messages, has_more = conversation.page(3, before=8)
+        assert [m.id for m in messages] == [5, 6, 7] and has_more
+
+        messages, has_more = conversation.page(3, after=8)
+        assert [m.id for m in messages] == [9, 10] and not has_more
+
+        messages, has_more = conversation.page(10, after=2, before=5)
+        assert [m.id for m in messages] == [3, 4] and not has_more
+
+        assert conversation.page(3, after=10) == ([], False)
+
+    def test_oldest_messages_are_dropped(self):
+        """Test that the ring buffer keeps the newest messages with their ids."""
+        conversation = Conversation("c", max_messages=4)
+        for i in range(10):
+            conversation.add_user_message(f"message {i}")
+
+        assert [m.id for m in conversation.messages] == [7, 8, 9, 10]
+        assert conversation.messages[0].content == "message 6"
+        assert conversation.content_bytes == 4 * len("message 0")
+        assert [m.id for m in conversation.recent(2)] == [9, 10]
+        assert [m.content for m in conversation.to_langchain_messages(2)] == ["message 8", "message 9"]
+
+        messages, has_more = conversation.page(3, before=9)
+        assert [m.id for m in messages] == [7, 8] and not has_more
+        assert conversation.page(3, before=5) == ([], False)
+
+    def test_record_round_trip(self):
+        """Test that the compact buffer round-trips through snapshot records."""
+        conversation = Conversation("c", max_messages=3)
+        for i in range(5):
+            conversation.add("user" if i % 2 == 0 else "assistant", f"héllo {i}")
+        record = conversation.to_record()
+        assert [m[0] for m in record["messages"]] == [3, 4, 5]
+        assert Conversation.from_record(record).to_record() == record
+
+    def test_etag_changes(self):
+        """Test that the ETag changes with new messages and across clears."""
+        conversation = Conversation("c")
+        etag = conversation.etag
+        conversation.add_user_message("Hi")
+        assert conversation.etag != etag
+        assert Conversation("c").etag != Conversation("c").etag
+
+
+class TestConversationHistoryEndpoint:
+    """Test cases for the paginated history endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_unknown_conversation_is_not_created(self, client):
+        """Test that reading history of an unknown conversation has no side effects."""
+        response = client.get("/api/v1/conversations/history-unknown/history")
+        assert response.status_code == 200
+        assert response.json()["messages"] == []
+        assert "history-unknown" not in agent_service.memory_store
+
+    def test_incremental_polling(self, client):
+        """Test fetching only new messages with after and If-None-Match."""
+        conversation = make_conversation("history-poll", 4)
+        try:
+            response = client.get("/api/v1/conversations/history-poll/history?limit=10")
+            data = response.json()
+            assert [m["id"] for m in data["messages"]] == [1, 2, 3, 4]
+            assert [m["role"] for m in data["messages"]] == ["user", "assistant", "user", "assistant"]
+            assert data["message_count"] == 4
+            etag = response.headers["ETag"]
+
+            unchanged = client.get("/api/v1/conversations/history-poll/history", headers={"If-None-Match": etag})
+            assert unchanged.status_code == 304
+
+            conversation.add_user_message("one more")
+            response = client.get(
+                "/api/v1/conversations/history-poll/history?after=4",
+                headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 200
+            assert [m["content"] for m in response.json()["messages"]] == ["one more"]
+            assert response.headers["ETag"] != etag
+        finally:
+            agent_service.memory_store.pop("history-poll", None)
+
+    def test_paging_back(self, client):
+        """Test paging back through older messages with before."""
+        make_conversation("history-back", 5)
+        try:
+            data = client.get("/api/v1/conversations/history-back/history?limit=2").json()
+            assert [m["id"] for m in data["messages"]] == [4, 5] and data["has_more"]
+
+            data = client.get("/api/v1/conversations/history-back/history?limit=2&before=4").json()
+            assert [m["id"] for m in data["messages"]] == [2, 3] and data["has_more"]
+
+            data = client.get("/api/v1/conversations/history-back/history?limit=2&before=2").json()
+            assert [m["id"] for m in data["messages"]] == [1] and not data["has_more"]
+        finally:
+            agent_service.memory_store.pop("history-back", None)
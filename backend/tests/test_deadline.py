@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+from fastapi.testclient import TestClient
+
+from app.config import Settings, settings
+from app.main import app
+from app.services import deadline
+from app.services.deadline import DeadlineExceeded
+from app.services.langchain_agent import agent_service
+
+
+class TestDeadline:
+    """Test cases for request deadlines."""
+
+    def test_budget_for(self, monkeypatch):
+        """Test route defaults, the client header and the cap."""
+        monkeypatch.setattr(settings, "request_timeout_default", 120.0)
+        monkeypatch.setattr(settings, "request_timeout_max", 600.0)
+        monkeypatch.setattr(settings, "request_timeout_routes", {"/api/v1/agent": 300.0})
+
+        assert deadline.budget_for("/api/v1/chat") == 120.0
+        assert deadline.budget_for("/api/v1/agent") == 300.0
+        assert deadline.budget_for("/api/v1/agent", "2.5") == 2.5
+        assert deadline.budget_for("/api/v1/chat", "9999") == 600.0
+        assert deadline.budget_for("/api/v1/chat", "soon") == 120.0
+        assert deadline.budget_for("/api/v1/chat", "-1") == 120.0
+
+    def test_route_defaults_within_cap(self):
+        """Test that a route default above REQUEST_TIMEOUT_MAX is rejected rather than cut."""
+        assert Settings().request_timeout_routes["/api/v1/agent/jobs"] <= Settings().request_timeout_max
+        with pytest.raises(ValidationError):
+            Settings(request_timeout_max=600.0)
+
+    def test_timeout_is_shortened(self):
+        """Test that per-call timeouts never outlast the deadline by more than the grace."""
+        async def run():
+            assert deadline.timeout(30.0) == 30.0
+            deadline.start(5.0)
+            assert deadline.timeout(2.0) == 2.0
+            assert deadline.timeout(300.0) <= 5.0 + deadline.TIMEOUT_GRACE
+
+        asyncio.run(run())
+
+    def test_enforce_cancels_work(self):
+        """Test that work running past the deadline is cancelled."""
+        async def run():
+            deadline.start(0.05)
+            async with deadline.enforce():
+                await asyncio.sleep(5)
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run())
+
+    def test_iterate_cancels_stream(self):
+        """Test that a stream is cut off once the deadline passes."""
+        async def slow_events():
+            yield 1
+            await asyncio.sleep(5)
+            yield 2
+
+        async def run():
+            deadline.start(0.05)
+            items = []
+            with pytest.raises(DeadlineExceeded):
+                async for item in deadline.iterate(slow_events()):
+                    items.append(item)
+            return items
+
+        assert asyncio.run(run()) == [1]
+
+
+class TestDeadlineRoutes:
+    """Test cases for deadline handling in the API."""
+
+    def test_chat_returns_504(self, monkeypatch):
+        """Test that an expired chat request gets 504 with the elapsed breakdown."""
+        async def slow_generate(*args):
+            await asyncio.sleep(5)
+            return "too late"
+
+        monkeypatch.setattr(agent_service, "_generate_response", slow_generate)
+        client = TestClient(app)
+
+        response = client.post("/api/v1/chat", json={"message": "Hi"}, headers={"X-Request-Timeout": "0.1"})
+        assert response.status_code == 504
+        data = response.json()
+        assert data["error"] == "Gateway Timeout"
+        assert "0.1s" in data["detail"]
+        assert [span["name"] for span in data["timings"]["children"]] == ["prompt", "generate"]
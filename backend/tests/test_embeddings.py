@@ -0,0 +1,97 @@
+import base64
+import asyncio
+import struct
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.embeddings import EmbeddingService, embedding_service, unpack
+from app.services.langchain_agent import agent_service
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replace Ollama's /api/embed with a recorder returning [len, 1.5]."""
+    calls = []
+
+    async def fake_embed(texts, model=None):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.5] for text in texts]
+
+    monkeypatch.setattr(agent_service, "embed", fake_embed)
+    return calls
+
+
+class TestEmbeddingService:
+    """Test cases for embedding batching and caching."""
+
+    def test_concurrent_callers_share_one_call(self, upstream):
+        """Test that inputs arriving within the window are batched and deduplicated."""
+        service = EmbeddingService(cache_size=100, batch_window=0.01, max_batch_size=64)
+
+        async def run():
+            return await asyncio.gather(
+                service.embed(["a", "bb"], "m"),
+                service.embed(["bb", "ccc"], "m")
+            )
+
+        first, second = asyncio.run(run())
+        assert upstream == [["a", "bb", "ccc"]]
+        assert [unpack(v) for v in first] == [[1.0, 1.5], [2.0, 1.5]]
+        assert [unpack(v) for v in second] == [[2.0, 1.5], [3.0, 1.5]]
+
+        asyncio.run(service.embed(["a", "ccc"], "m"))
+        assert len(upstream) == 1  # Served from the cache
+
+    def test_full_batch_is_sent_immediately(self, upstream):
+        """Test that batches are capped at max_batch_size."""
+        service = EmbeddingService(cache_size=100, batch_window=10.0, max_batch_size=2)
+        vectors = asyncio.run(asyncio.wait_for(service.embed(["a", "b", "c", "d"], "m"), timeout=1.0))
+        assert upstream == [["a", "b"], ["c", "d"]]
+        assert len(vectors) == 4
+
+    def test_cache_is_bounded_lru(self, upstream):
+        """Test that the least recently used vectors are evicted first."""
+        service = EmbeddingService(cache_size=2, batch_window=0.0, max_batch_size=64)
+        asyncio.run(service.embed(["a", "b"], "m"))
+        asyncio.run(service.embed(["a"], "m"))  # Touch "a"
+        asyncio.run(service.embed(["c"], "m"))  # Evicts "b"
+        asyncio.run(service.embed(["a", "b"], "m"))
+        assert upstream == [["a", "b"], ["c"], ["b"]]
+
+    def test_upstream_failure_reaches_every_caller(self, monkeypatch):
+        """Test that a failed batch fails all of its callers and is not cached."""
+        async def broken_embed(texts, model=None):
+            raise RuntimeError("model not found")
+
+        monkeypatch.setattr(agent_service, "embed", broken_embed)
+        service = EmbeddingService(cache_size=10, batch_window=0.0, max_batch_size=64)
+        with pytest.raises(RuntimeError):
+            asyncio.run(service.embed(["a"], "m"))
+        assert service.stats()["cached"] == 0 and service.stats()["inflight"] == 0
+
+
+class TestEmbeddingsEndpoint:
+    """Test cases for POST /api/v1/embeddings."""
+
+    def test_float_and_base64_formats(self, upstream):
+        """Test both encodings of the same embedding."""
+        embedding_service.cache_clear()
+        client = TestClient(app)
+
+        response = client.post("/api/v1/embeddings", json={"input": ["hello", "hi"], "model": "m"})
+        assert response.status_code == 200
+        data = response.json()
+        assert [d["embedding"] for d in data["data"]] == [[5.0, 1.5], [2.0, 1.5]]
+        assert data["usage"] == {"inputs": 2, "dimensions": 2}
+
+        response = client.post("/api/v1/embeddings", json={"input": "hello", "model": "m", "encoding_format": "base64"})
+        encoded = response.json()["data"][0]["embedding"]
+        assert struct.unpack("<2f", base64.b64decode(encoded)) == (5.0, 1.5)
+        assert len(upstream) == 1
+
+    def test_rejects_empty_input(self):
+        """Test that an empty input list is refused."""
+        response = TestClient(app).post("/api/v1/embeddings", json={"input": []})
+        assert response.status_code == 422
@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.main import app
+from app.services.idempotency import DONE, IN_FLIGHT, MISMATCH, NEW, IdempotencyStore, StoredResponse, idempotency_store
+from app.services.langchain_agent import agent_service
+
+
+@pytest.fixture
+def generations(monkeypatch):
+    """Count upstream generations; each takes a little while."""
+    calls = []
+
+    async def fake_generate(prompt, message, memory, model=None):
+        calls.append(message)
+        await asyncio.sleep(0.05)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(agent_service, "_generate_response", fake_generate)
+    idempotency_store.clear()
+    return calls
+
+
+class TestIdempotencyStore:
+    """Test cases for the idempotency key store."""
+
+    def test_lifecycle(self):
+        """Test claiming, attaching, storing and expiring a key."""
+        store = IdempotencyStore(ttl=10, max_entries=10)
+        state, entry = store.begin("k", "body", now=0)
+        assert state == NEW
+        assert store.begin("k", "body", now=1)[0] == IN_FLIGHT
+        assert store.begin("k", "other", now=1)[0] == MISMATCH
+
+        store.complete("k", entry, StoredResponse(200, [], b"ok"), now=2)
+        assert store.begin("k", "body", now=11)[0] == DONE
+        assert store.begin("k", "body", now=12)[0] == NEW  # Expired
+
+    def test_failures_release_the_key(self):
+        """Test that a request without a stored response lets the next one run."""
+        store = IdempotencyStore(ttl=10, max_entries=10)
+        _, entry = store.begin("k", "body")
+        store.complete("k", entry, None)
+        assert store.begin("k", "body")[0] == NEW
+
+    def test_repeated_headers_are_kept(self):
+        """Test that a replay has every Set-Cookie header of the stored response."""
+        headers = Headers(raw=[(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2"), (b"content-length", b"2")])
+        replay = StoredResponse.capture(200, headers, b"ok").replay()
+        assert replay.headers.getlist("set-cookie") == ["a=1", "b=2"]
+        assert replay.headers["content-length"] == "2"
+
+    def test_bounded(self):
+        """Test that the oldest completed keys are evicted past max_entries."""
+        store = IdempotencyStore(ttl=100, max_entries=2)
+        for key in ("a", "b", "c"):
+            _, entry = store.begin(key, "body", now=0)
+            store.complete(key, entry, StoredResponse(200, [], b""), now=0)
+        assert len(store) == 2 and store.begin("a", "body", now=0)[0] == NEW
+
+
+class TestIdempotentEndpoints:
+    """Test cases for Idempotency-Key handling on the API."""
+
+    def test_retry_is_replayed(self, generations):
+        """Test that a completed request is replayed without a second generation or memory write."""
+        client = TestClient(app)
+        body = {"message": "Hi", "conversation_id": "idem-replay"}
+        headers = {"Idempotency-Key": "retry-1"}
+
+        first = client.post("/api/v1/chat", json=body, headers=headers)
+        second = client.post("/api/v1/chat", json=body, headers=headers)
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["idempotent-replayed"] == "true"
+        assert generations == ["Hi"]
+        assert agent_service.memory_store["idem-replay"].message_count == 2
+
+        response = client.post("/api/v1/chat", json={**body, "message": "Other"}, headers=headers)
+        assert response.status_code == 422
+
+    def test_concurrent_retry_attaches(self, generations):
+        """Test that a retry arriving while the original runs waits for it."""
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(
+                    client.post("/api/v1/chat", json={"message": "Hi"}, headers={"Idempotency-Key": "concurrent"})
+                    for _ in range(3)
+                ))
+
+        responses = asyncio.run(run())
+        assert len(generations) == 1
+        assert len({r.json()["conversation_id"] for r in responses}) == 1
@@ -0,0 +1,98 @@
+import time
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.jobs import AgentJobManager, JobQueueFullError
+from app.services.langchain_agent import agent_service
+
+
+async def quick_generate(prompt, **kwargs):
+    yield {"response": "Final Answer: finished", "done": True}
+
+
+async def slow_generate(prompt, **kwargs):
+    await asyncio.sleep(30)
+    yield {"response": "too late", "done": True}
+
+
+def wait_for_status(client, job_id, statuses, timeout=5.0):
+    """Poll a job until it reaches one of the given statuses."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(f"/api/v1/agent/jobs/{job_id}").json()
+        if data["status"] in statuses:
+            return data
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} never reached {statuses}")
+
+
+class TestAgentJobs:
+    """Test cases for the asynchronous agent job API."""
+
+    @pytest.fixture
+    def client(self):
+        """Create test client with the application lifespan running."""
+        with TestClient(app) as client:
+            yield client
+
+    def test_job_runs_to_completion(self, client, monkeypatch):
+        """Test that a submitted job reports its result."""
+        monkeypatch.setattr(agent_service, "_stream_generate", quick_generate)
+
+        response = client.post("/api/v1/agent/jobs", json={"task": "Finish up"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        data = wait_for_status(client, job_id, {"succeeded", "failed"})
+        assert data["status"] == "succeeded"
+        assert data["result"]["result"] == "finished"
+        assert data["progress"]["steps_completed"] == len(data["result"]["steps"])
+
+    def test_cancel_running_job(self, client, monkeypatch):
+        """Test that a running job can be cancelled."""
+        monkeypatch.setattr(agent_service, "_stream_generate", slow_generate)
+
+        job_id = client.post("/api/v1/agent/jobs", json={"task": "Take forever"}).json()["job_id"]
+        wait_for_status(client, job_id, {"running"})
+
+        response = client.delete(f"/api/v1/agent/jobs/{job_id}")
+        assert response.status_code == 200
+        assert response.json()["status"] == "cancelled"
+
+    def test_unknown_job(self, client):
+        """Test that unknown job ids return 404."""
+        assert client.get("/api/v1/agent/jobs/missing").status_code == 404
+        assert client.delete("/api/v1/agent/jobs/missing").status_code == 404
+
+
+@pytest.mark.asyncio
+class TestAgentJobManager:
+    """Test cases for the job manager itself."""
+
+    async def test_queue_full(self, monkeypatch):
+        """Test that submissions beyond the queue size are rejected."""
+        monkeypatch.setattr(agent_service, "_stream_generate", slow_generate)
+        manager = AgentJobManager(workers=1, queue_size=1, result_ttl=60)
+        try:
+            await manager.submit({"task": "one"})
+            await asyncio.sleep(0)  # Let the worker pick up the first job
+            await manager.submit({"task": "two"})
+            with pytest.raises(JobQueueFullError):
+                await manager.submit({"task": "three"})
+        finally:
+            await manager.stop()
+
+    async def test_results_expire_after_ttl(self, monkeypatch):
+        """Test that finished jobs are dropped once their TTL passes."""
+        monkeypatch.setattr(agent_service, "_stream_generate", quick_generate)
+        manager = AgentJobManager(workers=1, queue_size=10, result_ttl=0)
+        try:
+            job = await manager.submit({"task": "quick"})
+            while not job.done:
+                await asyncio.sleep(0.01)
+            assert manager.get(job.job_id) is None
+        finally:
+            await manager.stop()
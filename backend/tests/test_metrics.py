@@ -0,0 +1,71 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import metrics
+
+
+class TestMetricsEndpoint:
+    """Test cases for the /metrics endpoint."""
+
+    @pytest.fixture
+    def client(self):
+        """Create test client."""
+        return TestClient(app)
+
+    def test_metrics_exposition(self, client):
+        """Test that request metrics are exposed per route template."""
+        client.get("/ping")
+        client.get("/api/v1/conversations/abc/history")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        body = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_requests_total{method="GET",route="/ping",status="200"}' in body
+        assert 'route="/api/v1/conversations/{conversation_id}/history"' in body
+        assert "conversations_in_memory" in body
+        assert "ollama_inflight_generations" in body
+
+
+class TestMetricPrimitives:
+    """Test cases for the in-process metric types."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket rendering."""
+        histogram = metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        lines = histogram.collect()
+        assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'test_seconds_count{route="/a"} 3' in lines
+
+    def test_observe_generation_splits_phases(self):
+        """Test that Ollama durations are split into queue, prefill and decode."""
+        model = "test-model"
+        metrics.observe_generation(
+            model,
+            {
+                "load_duration": 100_000_000,
+                "prompt_eval_duration": 200_000_000,
+                "eval_duration": 2_000_000_000,
+                "prompt_eval_count": 20,
+                "eval_count": 50
+            },
+            ttft_seconds=0.5
+        )
+
+        assert metrics.ollama_prefill.count(model) == 1
+        assert metrics.ollama_decode.count(model) == 1
+        assert metrics.ollama_ttft.count(model) == 1
+        assert metrics.ollama_tokens.get(model, "completion") == 50
+        # 50 tokens over 2 seconds of decode
+        assert metrics.ollama_tokens_per_second._values[(model,)][-2] == pytest.approx(25.0)
+        # 0.5s to first token minus 0.1s load and 0.2s prefill
+        assert metrics.ollama_queue._values[(model,)][-2] == pytest.approx(0.2)
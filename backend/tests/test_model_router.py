@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import model_router as router_module
+from app.services.conversations import Conversation
+from app.services.langchain_agent import agent_service
+from app.services.model_router import ModelRouter
+
+TIERS = [
+    {"name": "small", "model": "tiny", "max_prompt_tokens": 50, "max_history_messages": 2, "tools": False},
+    {"name": "medium", "model": "mid", "max_prompt_tokens": 500}
+]
+
+
+class TestModelRouter:
+    """Test cases for tier selection."""
+
+    @pytest.fixture
+    def router(self):
+        return ModelRouter(TIERS)
+
+    def test_picks_cheapest_fitting_tier(self, router):
+        """Test that short prompts go to the smallest tier and long ones move up."""
+        assert router.decide("What is 2 + 2?").model == "tiny"
+        assert router.decide("word " * 100).model == "mid"
+        assert router.decide("word " * 1000).model == settings.ollama_model
+
+    def test_history_and_tools(self, router):
+        """Test that long conversations and tool use skip tiers that cannot handle them."""
+        memory = Conversation("c")
+        for i in range(3):
+            memory.add_user_message(f"question {i}")
+        assert router.decide("Hi", memory).tier == "medium"
+        assert router.decide("Hi", tools=["calculator"]).tier == "medium"
+
+    def test_explicit_model_wins(self, router):
+        """Test that a model named on the request is always used."""
+        decision = router.decide("Hi", requested_model="llama3.1:70b")
+        assert (decision.model, decision.tier) == ("llama3.1:70b", "override")
+
+    def test_modes(self, router, monkeypatch):
+        """Test that only ``on`` acts on decisions and shadow mode only counts them."""
+        monkeypatch.setattr(settings, "model_routing_mode", "off")
+        assert router.route("Hi") is None
+
+        monkeypatch.setattr(settings, "model_routing_mode", "shadow")
+        before = router_module.router_decisions.get("shadow", "small", "tiny")
+        assert router.route("Hi") is None
+        assert router_module.router_decisions.get("shadow", "small", "tiny") == before + 1
+
+        monkeypatch.setattr(settings, "model_routing_mode", "on")
+        assert router.route("Hi").model == "tiny"
+
+
+class TestChatRouting:
+    """Test cases for routing in the chat path."""
+
+    def test_chat_uses_routed_model(self, monkeypatch):
+        """Test that chat generates with the routed model and reports it."""
+        used = []
+
+        async def fake_generate(prompt, message, memory, model=None):
+            used.append(model)
+            return "ok"
+
+        monkeypatch.setattr(settings, "model_routing_mode", "on")
+        monkeypatch.setattr(settings, "model_router_tiers", TIERS)
+        monkeypatch.setattr(agent_service, "_generate_response", fake_generate)
+        before = router_module.model_requests.get("tiny", "chat")
+
+        result = asyncio.run(agent_service.chat("Hi there"))
+        assert used == ["tiny"]
+        assert result["model_used"] == "tiny"
+        assert result["metadata"]["routing"]["tier"] == "small"
+        assert router_module.model_requests.get("tiny", "chat") == before + 1
+
+    def test_shadow_mode_keeps_default_model(self, monkeypatch):
+        """Test that shadow mode leaves the generation on the default model."""
+        used = []
+
+        async def fake_generate(prompt, message, memory, model=None):
+            used.append(model)
+            return "ok"
+
+        monkeypatch.setattr(settings, "model_routing_mode", "shadow")
+        monkeypatch.setattr(settings, "model_router_tiers", TIERS)
+        monkeypatch.setattr(agent_service, "_generate_response", fake_generate)
+
+        result = asyncio.run(agent_service.chat("Hi there"))
+        assert used == [settings.ollama_model]
+        assert "routing" not in result["metadata"]
@@ -0,0 +1,80 @@
+import io
+import time
+import marshal
+import pstats
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+ADMIN_HEADERS = {"X-Admin-Key": "secret"}
+
+
+class TestProfiling:
+    """Test cases for opt-in request profiling."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """Create test client with profiling and the admin API enabled."""
+        monkeypatch.setattr(settings, "profiling_enabled", True)
+        monkeypatch.setattr(settings, "admin_api_key", "secret")
+        return TestClient(app)
+
+    def test_requests_are_not_profiled_by_default(self, client):
+        """Test that requests without the header are not profiled."""
+        response = client.get("/ping")
+        assert "X-Profile-Id" not in response.headers
+
+    def test_cprofile_capture(self, client, monkeypatch):
+        """Test capturing a request with cProfile and downloading pstats."""
+        monkeypatch.setattr(settings, "profiling_mode", "cprofile")
+
+        response = client.get("/api/v1/tools", headers={"X-Profile": "1"})
+        profile_id = response.headers["X-Profile-Id"]
+
+        listing = client.get("/api/v1/admin/profiles", headers=ADMIN_HEADERS).json()
+        assert listing["profiles"][0]["profile_id"] == profile_id
+        assert listing["profiles"][0]["path"] == "/api/v1/tools"
+
+        text = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=ADMIN_HEADERS)
+        assert "function calls" in text.text
+
+        raw = client.get(f"/api/v1/admin/profiles/{profile_id}?format=pstats", headers=ADMIN_HEADERS)
+        stats = pstats.Stats(stream=io.StringIO())
+        stats.stats = marshal.loads(raw.content)
+        assert any(func_name == "list_available_tools" for _, _, func_name in stats.stats)
+
+    def test_sampler_capture(self, client, monkeypatch):
+        """Test capturing collapsed stacks with the stack sampler."""
+        monkeypatch.setattr(settings, "profiling_mode", "sampler")
+        monkeypatch.setattr(settings, "profiling_sample_interval_ms", 1.0)
+
+        @app.get("/_test/busy")
+        async def busy_endpoint():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+            return {}
+
+        try:
+            response = client.get("/_test/busy", headers={"X-Profile": "1"})
+        finally:
+            app.router.routes.pop()
+
+        profile_id = response.headers["X-Profile-Id"]
+        collapsed = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=ADMIN_HEADERS).text
+        lines = collapsed.splitlines()
+        assert any("busy_endpoint" in line for line in lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        assert ";" in stack
+        assert int(count) >= 1
+
+    def test_admin_requires_key(self, client, monkeypatch):
+        """Test that profile endpoints require the admin key."""
+        assert client.get("/api/v1/admin/profiles").status_code == 403
+        assert client.get("/api/v1/admin/profiles", headers={"X-Admin-Key": "wrong"}).status_code == 403
+
+        monkeypatch.setattr(settings, "admin_api_key", None)
+        assert client.get("/api/v1/admin/profiles", headers=ADMIN_HEADERS).status_code == 404
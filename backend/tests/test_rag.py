@@ -0,0 +1,137 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.langchain_agent import agent_service
+from app.services.rag import DocumentStore, chunk_text
+from app.services.vector_index import VectorIndex
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+async def keyword_embed(texts):
+    """Embed texts by counting a few keywords, enough to rank chunks."""
+    words = ("ollama", "vector", "deadline")
+    return [[text.lower().count(word) + 0.01 for word in words] for text in texts]
+
+
+class TestChunking:
+    """Test cases for document chunking."""
+
+    def test_chunks_respect_size_and_overlap(self):
+        """Test that chunks stay under the size limit and overlap."""
+        text = " ".join(f"word{i}" for i in range(500))
+        chunks = chunk_text(text, size=100, overlap=20)
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert chunks[0].split()[0] == "word0" and chunks[-1].split()[-1] == "word499"
+        assert chunks[1].split()[0] in chunks[0]
+
+    def test_prefers_paragraph_breaks(self):
+        """Test that chunks end at paragraph boundaries when possible."""
+        text = "a" * 60 + "\n\n" + "b" * 60
+        assert chunk_text(text, size=100, overlap=0) == ["a" * 60, "b" * 60]
+        assert chunk_text("   ", size=100, overlap=0) == []
+
+
+class TestVectorIndex:
+    """Test cases for the memory-mapped vector index."""
+
+    def test_top_k_and_persistence(self, tmp_path):
+        """Test ranking, incremental appends and reloading from disk."""
+        index = VectorIndex(str(tmp_path))
+        index.add([unit(1, 0, 0), unit(0, 1, 0)], [{"id": "x"}, {"id": "y"}])
+        index.add([unit(1, 1, 0)], [{"id": "xy"}])
+
+        hits = index.search([1, 0.1, 0], k=2)
+        assert [entry["id"] for _, entry in hits] == ["x", "xy"]
+        assert hits[0][0] > hits[1][0]
+
+        reloaded = VectorIndex(str(tmp_path))
+        assert len(reloaded) == 3 and reloaded.dim == 3
+        assert reloaded.search([0, 1, 0], k=1)[0][1]["id"] == "y"
+
+    def test_drops_partial_rows(self, tmp_path):
+        """Test that an interrupted append is discarded on load."""
+        index = VectorIndex(str(tmp_path))
+        index.add([unit(1, 0), unit(0, 1)], [{"id": "x"}, {"id": "y"}])
+        with open(tmp_path / "vectors.f32", "ab") as f:
+            f.write(b"\x00\x00")
+        with open(tmp_path / "chunks.jsonl", "ab") as f:
+            f.write(b'{"id": "partial"')
+
+        reloaded = VectorIndex(str(tmp_path))
+        assert len(reloaded) == 2
+        assert (tmp_path / "vectors.f32").stat().st_size == 2 * 2 * 4
+
+    def test_rejects_dimension_mismatch(self, tmp_path):
+        """Test that vectors from a different embedding model are refused."""
+        index = VectorIndex(str(tmp_path))
+        index.add([unit(1, 0, 0)], [{}])
+        with pytest.raises(ValueError):
+            index.add([unit(1, 0)], [{}])
+
+    def test_partitioned_search(self, tmp_path):
+        """Test that IVF search finds the same neighbours on clustered data."""
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(8, 16))
+        vectors = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.05, size=(400, 16))
+        index = VectorIndex(str(tmp_path), ivf_threshold=300, ivf_probes=2)
+        index.add(vectors[:200], [{"row": i} for i in range(200)])
+        assert index.partitions == 0
+        index.add(vectors[200:], [{"row": i} for i in range(200, 400)])
+        assert index.partitions > 0
+
+        exact = VectorIndex(str(tmp_path / "exact"))
+        exact.add(vectors, [{"row": i} for i in range(400)])
+        for query in vectors[::37]:
+            assert index.search(query, k=1)[0][1] == exact.search(query, k=1)[0][1]
+
+
+class TestDocumentStore:
+    """Test cases for ingestion and retrieval."""
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "rag_chunk_size", 60)
+        monkeypatch.setattr(settings, "rag_chunk_overlap", 0)
+        monkeypatch.setattr(settings, "rag_embed_batch_size", 2)
+        return DocumentStore(VectorIndex(str(tmp_path)), keyword_embed)
+
+    def test_ingest_and_search(self, store):
+        """Test that documents are embedded in batches and retrievable."""
+        batches = []
+
+        async def counting_embed(texts):
+            batches.append(len(texts))
+            return await keyword_embed(texts)
+
+        store.embed = counting_embed
+        text = (
+            "Ollama runs models locally. Ollama serves them over HTTP.\n\n"
+            "The vector index is memory mapped. Each vector is float32.\n\n"
+            "A deadline bounds every request. The deadline is propagated."
+        )
+        result = asyncio.run(store.ingest(text, source="notes.md"))
+        assert result["chunks"] == 3 and result["total_chunks"] == 3
+        assert batches == [2, 1]
+
+        hits = asyncio.run(store.search("vector vector", k=1))
+        assert hits[0]["source"] == "notes.md"
+        assert "memory mapped" in hits[0]["text"]
+
+    def test_retrieval_tool(self, store, monkeypatch):
+        """Test that the agent's document_search tool returns ranked passages."""
+        from app.services import rag
+
+        monkeypatch.setattr(rag, "_document_store", store)
+        tool = next(t for t in agent_service.tools if t.name == "document_search")
+        assert asyncio.run(tool.coroutine("anything")) == "No relevant documents found."
+
+        asyncio.run(store.ingest("A deadline bounds every request.", source="deadlines.md"))
+        observation = asyncio.run(tool.coroutine("deadline"))
+        assert observation.startswith("[1] deadlines.md")
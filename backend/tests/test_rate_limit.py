@@ -0,0 +1,164 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services import rate_limit
+from app.services.rate_limit import MemoryBucketStore, SQLiteBucketStore, rate_limiter
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Enable small limits on a fresh in-memory store."""
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_burst", 2)
+    monkeypatch.setattr(settings, "rate_limit_requests_per_minute", 60.0)
+    monkeypatch.setattr(settings, "rate_limit_tokens_per_minute", 600)
+    monkeypatch.setattr(rate_limiter, "store", MemoryBucketStore())
+
+
+class TestRateLimiter:
+    """Test cases for token-bucket budgets."""
+
+    def test_request_bucket(self, limits):
+        """Test burst capacity, refill and Retry-After."""
+        assert rate_limiter.check("ip:a", now=1000.0).allowed
+        second = rate_limiter.check("ip:a", now=1000.0)
+        assert second.allowed and second.remaining == 0
+
+        refused = rate_limiter.check("ip:a", now=1000.0)
+        assert not refused.allowed
+        assert refused.headers()["Retry-After"] == "1"
+
+        assert rate_limiter.check("ip:b", now=1000.0).allowed
+        assert rate_limiter.check("ip:a", now=1001.0).allowed
+
+    def test_token_budget(self, limits):
+        """Test that generated tokens are charged after the fact and block new requests."""
+        assert rate_limiter.check("ip:a", now=1000.0).allowed
+        rate_limiter.charge_tokens("ip:a", 650, now=1000.0)
+
+        refused = rate_limiter.check("ip:a", now=1000.0)
+        assert not refused.allowed
+        assert refused.reason == "Generated token budget exhausted"
+        assert refused.retry_after == 6  # 51 tokens at 10 tokens/second
+
+        assert rate_limiter.check("ip:a", now=1006.0).allowed
+
+    def test_extra_requests(self, limits):
+        """Test that requests charged after admission (compare fan-out) block new requests."""
+        assert rate_limiter.check("ip:a", now=1000.0).allowed
+        rate_limiter.charge_requests("ip:a", 3, now=1000.0)
+
+        refused = rate_limiter.check("ip:a", now=1000.0)
+        assert not refused.allowed and refused.retry_after == 3
+
+    def test_charge_generation_uses_bound_client(self, limits):
+        """Test that eval_count is charged to the client bound in the context."""
+        async def generate():
+            rate_limit.bind("key:abc")
+            await rate_limit.charge_generation({"eval_count": 600})
+
+        asyncio.run(generate())
+        assert rate_limiter.store.buckets["tok:key:abc"][0] <= 0
+
+    def test_sqlite_charges_run_off_the_loop(self, limits, tmp_path, monkeypatch):
+        """Test that generation charges to a SQLite store are written from a worker thread."""
+        store = SQLiteBucketStore(str(tmp_path / "limits.db"))
+        monkeypatch.setattr(rate_limiter, "store", store)
+        threads = []
+        apply = store.apply
+
+        def recording_apply(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return apply(*args, **kwargs)
+
+        monkeypatch.setattr(store, "apply", recording_apply)
+
+        async def generate():
+            rate_limit.bind("key:abc")
+            await rate_limit.charge_generation({"eval_count": 600})
+            await rate_limit.charge_requests(2)
+
+        asyncio.run(generate())
+        assert len(threads) == 2 and threading.get_ident() not in threads
+
+    def test_sqlite_store_is_shared(self, tmp_path):
+        """Test that two stores on one file (two workers) share buckets."""
+        path = str(tmp_path / "limits.db")
+        first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+        assert first.apply("req:a", 2.0, 1.0, cost=1.0, minimum=1.0, now=0.0) == (True, 1.0)
+        assert second.apply("req:a", 2.0, 1.0, cost=1.0, minimum=1.0, now=0.0) == (True, 0.0)
+        assert first.apply("req:a", 2.0, 1.0, cost=1.0, minimum=1.0, now=0.0) == (False, 0.0)
+
+    def test_locked_sqlite_store_fails_open(self, limits, tmp_path, monkeypatch):
+        """Test that async checks run off the loop and admit requests while the store is locked."""
+        store = SQLiteBucketStore(str(tmp_path / "limits.db"))
+        monkeypatch.setattr(rate_limiter, "store", store)
+        assert asyncio.run(rate_limiter.acheck("ip:a")).remaining == 1
+
+        def locked(*args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+        monkeypatch.setattr(store, "apply", locked)
+        assert asyncio.run(rate_limiter.acheck("ip:a")).allowed
+
+    def test_client_key(self, monkeypatch):
+        """Test keying by known API key (hashed) or IP, and which forwarded hop is trusted."""
+        monkeypatch.setattr(settings, "rate_limit_api_keys", ["secret"])
+        key = rate_limiter.client_key({"x-api-key": "secret"}, "1.2.3.4")
+        assert key.startswith("key:") and "secret" not in key
+        assert rate_limiter.client_key({"authorization": "Bearer secret"}, "1.2.3.4") == key
+        assert rate_limiter.client_key({"x-api-key": "made-up"}, "1.2.3.4") == "ip:1.2.3.4"
+        assert rate_limiter.client_key({}, "1.2.3.4") == "ip:1.2.3.4"
+
+        spoofed = {"x-forwarded-for": "6.6.6.6, 5.5.5.5"}
+        assert rate_limiter.client_key(spoofed, "10.0.0.2") == "ip:10.0.0.2"
+        monkeypatch.setattr(settings, "rate_limit_trust_forwarded", True)
+        assert rate_limiter.client_key(spoofed, "10.0.0.2") == "ip:5.5.5.5"
+        assert rate_limiter.client_key({**spoofed, "x-real-ip": "7.7.7.7"}, "10.0.0.2") == "ip:7.7.7.7"
+
+
+class TestRateLimitMiddleware:
+    """Test cases for the rate limit middleware."""
+
+    def test_limited_requests_get_429(self, limits, monkeypatch):
+        """Test rate limit headers and 429 responses on limited paths."""
+        monkeypatch.setattr(settings, "rate_limit_paths", ["/api/v1/tools"])
+        monkeypatch.setattr(settings, "rate_limit_api_keys", ["other"])
+        client = TestClient(app)
+
+        response = client.get("/api/v1/tools")
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Limit"] == "2"
+        assert response.headers["RateLimit-Remaining"] == "1"
+
+        client.get("/api/v1/tools")
+        response = client.get("/api/v1/tools")
+        assert response.status_code == 429
+        assert response.json()["error"] == "Too Many Requests"
+        assert int(response.headers["Retry-After"]) >= 1
+
+        assert client.get("/api/v1/tools", headers={"X-API-Key": "other"}).status_code == 200
+        assert client.get("/api/v1/tools", headers={"X-API-Key": "unknown"}).status_code == 429
+        assert "RateLimit-Limit" not in client.get("/ping").headers
+
+    def test_preflights_are_free_and_429s_carry_cors_headers(self, limits, monkeypatch):
+        """Test that browsers can read a 429 and that CORS preflights spend no budget."""
+        monkeypatch.setattr(settings, "rate_limit_paths", ["/api/v1/tools"])
+        client = TestClient(app)
+        origin = {"Origin": "http://localhost:3000"}
+        preflight = {**origin, "Access-Control-Request-Method": "GET"}
+
+        for _ in range(3):
+            assert client.options("/api/v1/tools", headers=preflight).status_code == 200
+        client.get("/api/v1/tools", headers=origin)
+        assert client.get("/api/v1/tools", headers=origin).status_code == 200
+
+        response = client.get("/api/v1/tools", headers=origin)
+        assert response.status_code == 429
+        assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
@@ -0,0 +1,106 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.models.schemas import AgentResponse
+from app.responses import CompressionMiddleware, FastJSONResponse, select_encoding
+
+LARGE_TEXT = "x" * 4096
+
+
+@pytest.fixture
+def client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return {"text": LARGE_TEXT}
+
+    @app.get("/small")
+    async def small():
+        return {"text": "tiny"}
+
+    @app.get("/chunked")
+    async def chunked():
+        async def chunks():
+            for _ in range(8):
+                yield LARGE_TEXT[:512]
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            yield f"data: {LARGE_TEXT}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse(gzip.compress(LARGE_TEXT.encode()), headers={"Content-Encoding": "gzip"})
+
+    return TestClient(app)
+
+
+class TestFastJSONResponse:
+    """Test cases for the orjson/pydantic-backed response class."""
+
+    def test_renders_models_like_fastapi(self):
+        """Test that models serialize to the same JSON FastAPI would produce."""
+        model = AgentResponse(result="done", steps=[{"step": 1}], agent_type="default", timestamp=datetime(2024, 1, 1, 12))
+        body = json.loads(FastJSONResponse(model).body)
+        assert body == json.loads(model.model_dump_json())
+        assert body["timestamp"] == "2024-01-01T12:00:00"
+
+    def test_renders_plain_content(self):
+        """Test that dicts with datetimes and non-string keys serialize."""
+        body = json.loads(FastJSONResponse({"at": datetime(2024, 1, 1), 1: "one"}).body)
+        assert body == {"at": "2024-01-01T00:00:00", "1": "one"}
+
+
+class TestCompressionMiddleware:
+    """Test cases for size-thresholded response compression."""
+
+    def test_select_encoding(self):
+        """Test Accept-Encoding negotiation."""
+        assert select_encoding("gzip, deflate") == "gzip"
+        assert select_encoding("gzip;q=0, identity") is None
+        assert select_encoding("") is None
+
+    def test_large_response_is_compressed(self, client):
+        """Test that large bodies are gzipped with a correct Content-Length."""
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(LARGE_TEXT)
+        assert response.json()["text"] == LARGE_TEXT
+
+    def test_small_response_is_not_compressed(self, client):
+        """Test that bodies below the threshold are sent as-is."""
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"text": "tiny"}
+
+    def test_streaming_response_is_compressed(self, client):
+        """Test that chunked bodies are compressed as a stream."""
+        response = client.get("/chunked", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == LARGE_TEXT[:512] * 8
+
+    def test_sse_and_encoded_responses_pass_through(self, client):
+        """Test that SSE streams and already encoded bodies are untouched."""
+        response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.text == f"data: {LARGE_TEXT}\n\n"
+
+        response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        assert response.text == LARGE_TEXT
+
+    def test_identity_when_not_accepted(self, client):
+        """Test that clients without gzip support get plain bodies."""
+        response = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
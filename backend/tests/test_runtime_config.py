@@ -0,0 +1,131 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import Settings, settings
+from app.main import app
+from app.services.jobs import AgentJobManager
+from app.services.langchain_agent import agent_service
+from app.services.runtime_config import ConfigError, RuntimeConfig, runtime_config
+
+
+@pytest.fixture
+def config():
+    return RuntimeConfig(Settings())
+
+
+class TestRuntimeConfig:
+    """Test cases for validating and applying setting overrides."""
+
+    def test_changes_are_validated_before_anything_is_applied(self, config):
+        """Test that one invalid, unknown or restart-only setting rejects the whole change."""
+        target = config._settings
+        calls = []
+        config.on_change(("ollama_model",), lambda: calls.append(target.ollama_model))
+
+        assert config.update("admin", {"OLLAMA_MODEL": "mistral", "rag_top_k": "8"}) == {"ollama_model": "mistral", "rag_top_k": 8}
+        assert (target.ollama_model, target.rag_top_k, config.version) == ("mistral", 8, 1)
+        assert calls == ["mistral"]
+
+        for overrides in ({"rag_top_k": 2, "rate_limit_burst": "many"}, {"rag_top_k": 2, "no_such_setting": 1}, {"rag_top_k": 2, "port": 9000}):
+            with pytest.raises(ConfigError):
+                config.update("admin", overrides)
+            assert target.rag_top_k == 8
+
+        assert config.update("admin", {"ollama_model": "mistral"}) == {}
+        assert config.version == 1
+
+    def test_admin_overrides_win_over_the_file(self, config, tmp_path):
+        """Test the file and admin layers, and that removing an override restores the layer below."""
+        target = config._settings
+        path = tmp_path / "overrides.json"
+        path.write_bytes(orjson.dumps({"ollama_model": "from-file", "log_level": "DEBUG"}))
+        config.reload_file(str(path))
+        config.update("admin", {"ollama_model": "from-admin"})
+        assert (target.ollama_model, target.log_level) == ("from-admin", "DEBUG")
+
+        path.write_bytes(orjson.dumps({"ollama_model": "from-file-2"}))
+        assert config.reload_file(str(path)) == {"log_level": "INFO"}
+
+        config.update("admin", {}, replace=True)
+        assert target.ollama_model == "from-file-2"
+
+        path.write_text("[1, 2]")
+        with pytest.raises(ConfigError):
+            config.reload_file(str(path))
+        path.unlink()
+        config.reload_file(str(path))
+        assert target.ollama_model == Settings().ollama_model
+
+
+class TestReconfiguredServices:
+    """Test cases for services picking up changed settings."""
+
+    def test_job_pool_resizes(self):
+        """Test that the worker pool grows and shrinks without a restart."""
+        async def run():
+            manager = AgentJobManager(workers=2, queue_size=10, result_ttl=60)
+            await manager.start()
+            await asyncio.sleep(0)
+            manager.resize(workers=1, queue_size=1, result_ttl=60)
+            shrunk = len(manager._worker_tasks)
+            manager.resize(workers=3, queue_size=1, result_ttl=60)
+            grown = len(manager._worker_tasks)
+            await manager.stop()
+            return shrunk, grown
+
+        assert asyncio.run(run()) == (1, 3)
+
+    def test_http_client_is_replaced_and_old_one_closed_later(self):
+        """Test that new requests get a new client while the old one stays open for requests in flight."""
+        async def run():
+            old = agent_service._get_http_client()
+            agent_service.reconfigure()
+            new = agent_service._get_http_client()
+            assert new is not old and not old.is_closed
+            await agent_service.close()
+            return old
+
+        assert asyncio.run(run()).is_closed
+
+    def test_replaced_clients_are_closed_even_if_their_timer_never_ran(self):
+        """Test that close() closes clients replaced twice in a row before yielding to the loop."""
+        async def run():
+            first = agent_service._get_http_client()
+            agent_service.reconfigure()
+            second = agent_service._get_http_client()
+            agent_service.reconfigure()
+            await agent_service.close()
+            return first, second
+
+        assert all(client.is_closed for client in asyncio.run(run()))
+
+
+class TestConfigEndpoints:
+    """Test cases for the admin configuration endpoints."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(settings, "admin_api_key", "secret")
+        yield TestClient(app)
+        runtime_config.update("admin", {}, replace=True)
+
+    def test_patch_applies_and_delete_restores(self, client):
+        """Test changing CORS origins at runtime and resetting them."""
+        headers = {"X-Admin-Key": "secret"}
+        origin = {"Origin": "https://eval.example.com"}
+        assert "access-control-allow-origin" not in client.get("/ping", headers=origin).headers
+
+        response = client.patch("/api/v1/admin/config", json={"cors_origins": ["https://eval.example.com"]}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["changed"] == ["cors_origins"]
+        assert response.json()["settings"]["admin_api_key"] == "***"
+        assert client.get("/ping", headers=origin).headers["access-control-allow-origin"] == "https://eval.example.com"
+
+        response = client.patch("/api/v1/admin/config", json={"port": 9000}, headers=headers)
+        assert response.status_code == 422 and "restart" in response.json()["detail"]
+
+        assert client.delete("/api/v1/admin/config", headers=headers).json()["overrides"]["admin"] == {}
+        assert "access-control-allow-origin" not in client.get("/ping", headers=origin).headers
@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.conversations import Conversation, ConversationStore, conversation_store
+from app.services.snapshots import SnapshotError, SnapshotReader, export_lines, import_lines, restore_snapshot, write_snapshot
+
+
+def make_store(count: int) -> ConversationStore:
+    store = ConversationStore()
+    for i in range(count):
+        conversation = Conversation(f"conv-{i}")
+        conversation.add_user_message(f"question {i}")
+        conversation.add_ai_message(f"answer {i}")
+        store[conversation.conversation_id] = conversation
+    return store
+
+
+class TestSnapshots:
+    """Test cases for conversation snapshots."""
+
+    def test_round_trip_is_lazy(self, tmp_path):
+        """Test that a restored store decodes conversations only on access."""
+        path = str(tmp_path / "conversations.ndjson")
+        original = make_store(3)
+        original["empty"] = Conversation("empty")
+        assert write_snapshot(original, path) == 3
+
+        store = ConversationStore()
+        reader = restore_snapshot(store, path)
+        assert len(store) == 3 and not store.live()
+        assert "conv-1" in store and "empty" not in store
+
+        conversation = store["conv-1"]
+        assert list(store.live()) == ["conv-1"] and len(reader) == 2
+        assert [m.content for m in conversation.messages] == ["question 1", "answer 1"]
+        assert conversation.etag == original["conv-1"].etag
+        assert conversation.add_user_message("more").id == 3
+
+        del store["conv-2"]
+        assert "conv-2" not in store and len(store) == 2
+
+    def test_resnapshot_keeps_untouched_conversations(self, tmp_path):
+        """Test that conversations never accessed after a restore survive the next snapshot."""
+        path = str(tmp_path / "conversations.ndjson")
+        write_snapshot(make_store(3), path)
+
+        store = ConversationStore()
+        restore_snapshot(store, path)
+        store["conv-0"].add_user_message("follow-up")
+        assert write_snapshot(store, path) == 3
+
+        restored = ConversationStore()
+        restore_snapshot(restored, path)
+        assert len(restored["conv-0"].messages) == 3
+        assert restored["conv-2"].messages[1].content == "answer 2"
+
+    def test_index_is_rebuilt_when_stale(self, tmp_path):
+        """Test that a missing or mismatched index sidecar is rebuilt by scanning."""
+        path = tmp_path / "conversations.ndjson"
+        write_snapshot(make_store(2), str(path))
+        (tmp_path / "conversations.ndjson.idx").write_bytes(b"{}")
+        reader = SnapshotReader(str(path))
+        assert sorted(reader.ids()) == ["conv-0", "conv-1"]
+        assert reader.read("conv-1").messages[0].content == "question 1"
+
+    def test_conversation_created_before_restore_wins(self, tmp_path):
+        """Test that a live conversation shadows the restored one with the same id."""
+        path = str(tmp_path / "conversations.ndjson")
+        write_snapshot(make_store(1), path)
+
+        store = ConversationStore()
+        store["conv-0"] = Conversation("conv-0")
+        restore_snapshot(store, path)
+        assert len(store) == 1 and store["conv-0"].messages == []
+
+    def test_import_rejects_other_formats(self):
+        """Test that import checks the header."""
+        with pytest.raises(SnapshotError):
+            import_lines(ConversationStore(), [b'{"format": "something-else", "version": 1}'])
+        assert import_lines(ConversationStore(), list(export_lines(make_store(2)))) == 2
+
+
+class TestSnapshotEndpoints:
+    """Test cases for the admin export and import endpoints."""
+
+    def test_export_then_import(self, monkeypatch):
+        """Test that an export can be imported back."""
+        monkeypatch.setattr(settings, "admin_api_key", "secret")
+        headers = {"X-Admin-Key": "secret"}
+        client = TestClient(app)
+        conversation = Conversation("snapshot-export")
+        conversation.add_user_message("keep me")
+        conversation_store["snapshot-export"] = conversation
+        try:
+            response = client.get("/api/v1/admin/conversations/export", headers=headers)
+            assert response.status_code == 200
+            body = response.content
+            assert b"keep me" in body
+
+            del conversation_store["snapshot-export"]
+            response = client.post("/api/v1/admin/conversations/import", content=body, headers=headers)
+            assert response.status_code == 200
+            assert conversation_store["snapshot-export"].messages[0].content == "keep me"
+
+            response = client.post("/api/v1/admin/conversations/import", content=b"not a snapshot", headers=headers)
+            assert response.status_code == 400
+        finally:
+            conversation_store.pop("snapshot-export", None)
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import langchain_agent
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestStartup:
+    """Test cases for lazy, side-effect-free startup."""
+
+    def test_import_does_not_load_langchain(self):
+        """Test that importing the app neither imports LangChain nor builds the service."""
+        code = (
+            "import sys, app.main\n"
+            "from app.services import langchain_agent\n"
+            "assert not [m for m in sys.modules if m.startswith('langchain')], 'langchain imported'\n"
+            "assert langchain_agent._agent_service is None, 'service constructed'\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+    def test_get_agent_service_is_singleton(self):
+        """Test that the lazily created service is shared."""
+        service = langchain_agent.get_agent_service()
+        assert langchain_agent.get_agent_service() is service
+        assert langchain_agent.agent_service is service
+
+    def test_health_check_does_not_generate(self, monkeypatch):
+        """Test that the health check only lists models."""
+        service = langchain_agent.get_agent_service()
+
+        def fail_invoke(*args, **kwargs):
+            raise AssertionError("health check must not run a generation")
+
+        monkeypatch.setattr(type(service), "llm", property(fail_invoke))
+        with TestClient(app) as client:
+            response = client.get("/api/v1/health")
+        assert response.status_code == 200
+        assert response.json()["status"] in ("healthy", "degraded")
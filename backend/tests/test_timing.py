@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from langchain_ollama import OllamaLLM
+
+from app.main import app
+from app.services.langchain_agent import agent_service
+from app.services.timing import RequestTimings
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {
+            "response": "Hello there",
+            "done": True,
+            "prompt_eval_duration": 40_000_000,
+            "eval_duration": 120_000_000,
+            "eval_count": 6
+        }
+
+
+class FakeClient:
+    """Stands in for the service's pooled httpx client."""
+
+    async def post(self, *args, **kwargs):
+        return FakeResponse()
+
+
+class TestServerTiming:
+    """Test cases for per-request timing breakdowns."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """Create test client with a failing LangChain path and a working HTTP fallback."""
+        async def failing_agenerate(self, *args, **kwargs):
+            raise ConnectionError("langchain unavailable")
+
+        monkeypatch.setattr(OllamaLLM, "agenerate", failing_agenerate)
+        monkeypatch.setattr(agent_service, "_get_http_client", lambda: FakeClient())
+        # Start with both generation paths closed so LangChain is tried first
+        for breaker in agent_service.breakers.values():
+            breaker.reset()
+        return TestClient(app)
+
+    def test_chat_server_timing_header(self, client):
+        """Test that the Server-Timing header breaks down the chat call."""
+        response = client.post("/api/v1/chat", json={"message": "Hi"})
+        assert response.status_code == 200
+
+        names = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+        assert "prompt" in names
+        assert "generate.langchain" in names
+        assert "generate.http_fallback" in names
+        assert "generate.http_fallback.prefill" in names
+        assert "generate.http_fallback.decode" in names
+        assert names[-1] == "total"
+        assert "timings" not in response.json()["metadata"]
+
+    def test_chat_metadata_timings(self, client):
+        """Test that timings can be requested in the response metadata."""
+        response = client.post("/api/v1/chat", json={"message": "Hi", "include_timings": True})
+        assert response.status_code == 200
+
+        timings = response.json()["metadata"]["timings"]
+        assert timings["name"] == "total"
+        generate = next(child for child in timings["children"] if child["name"] == "generate")
+        assert [child["name"] for child in generate["children"]] == ["langchain", "http_fallback"]
+
+
+class TestRequestTimings:
+    """Test cases for the span tree itself."""
+
+    def test_nested_spans(self):
+        """Test that spans nest under the currently open span."""
+        timings = RequestTimings()
+        with timings.span("outer"):
+            with timings.span("inner"):
+                pass
+            timings.add("decode", 12.5)
+        timings.finish()
+
+        tree = timings.to_dict()
+        outer = tree["children"][0]
+        assert outer["name"] == "outer"
+        assert [child["name"] for child in outer["children"]] == ["inner", "decode"]
+        assert outer["children"][1]["duration_ms"] == pytest.approx(12.5)
+        assert timings.server_timing().startswith("outer;dur=")
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.usage import UsageRecorder, UsageStore, usage_recorder
+
+HOUR = 1_700_000_000 // 3600 * 3600
+
+
+def stats(prompt, completion):
+    return {
+        "prompt_eval_count": prompt, "eval_count": completion,
+        "prompt_eval_duration": 2_000_000, "eval_duration": 8_000_000, "total_duration": 10_000_000
+    }
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    return UsageRecorder(str(tmp_path / "usage.db"))
+
+
+class TestUsageRecorder:
+    """Test cases for in-memory aggregation and batched persistence."""
+
+    def test_aggregates_until_flushed(self, recorder):
+        """Test that records for one tenant, model and minute share a row until flushed."""
+        recorder.record("llama2", stats(10, 5), tenant="a", now=HOUR + 1)
+        recorder.record("llama2", stats(20, 7), tenant="a", now=HOUR + 59)
+        recorder.record("llama2", stats(1, 1), tenant="a", now=HOUR + 60)
+        assert recorder.pending() == 2
+
+        assert recorder.flush() == 2
+        assert recorder.pending() == 0 and recorder.flush() == 0
+
+        (bucket,) = recorder.store.query(HOUR, HOUR + 60, 60)
+        assert (bucket["requests"], bucket["prompt_tokens"], bucket["completion_tokens"]) == (2, 30, 12)
+        assert bucket["total_ms"] == 20.0
+
+    def test_query_rolls_up_and_filters(self, recorder):
+        """Test hourly and daily rollups, tenant filters and that queries include unflushed usage."""
+        for minute in range(3):
+            recorder.record("llama2", stats(10, 5), tenant="a", now=HOUR + minute * 60)
+        recorder.record("mistral", stats(4, 4), tenant="b", now=HOUR + 3600)
+        recorder.flush()
+        recorder.record("llama2", stats(10, 5), tenant="a", now=HOUR + 600)
+
+        hourly = asyncio.run(recorder.query(HOUR, HOUR + 7200, "hour"))
+        assert [(b["start"], b["tenant"], b["requests"]) for b in hourly] == [
+            (HOUR, "a", 4), (HOUR + 3600, "b", 1)
+        ]
+        (daily,) = asyncio.run(recorder.query(HOUR, HOUR + 7200, "day", tenant="b"))
+        assert daily["model"] == "mistral" and daily["completion_tokens"] == 4
+
+    def test_failed_flush_keeps_the_batch(self, recorder, monkeypatch):
+        """Test that a batch that fails to write is retried with the next flush."""
+        recorder.record("llama2", stats(10, 5), tenant="a", now=HOUR)
+
+        def fail(rows):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(recorder.store, "add", fail)
+        with pytest.raises(OSError):
+            recorder.flush()
+        recorder.record("llama2", stats(10, 5), tenant="a", now=HOUR)
+        monkeypatch.undo()
+
+        recorder.flush()
+        (bucket,) = recorder.store.query(HOUR, HOUR + 60, 60)
+        assert bucket["requests"] == 2
+
+
+class TestUsageEndpoint:
+    """Test cases for the usage query endpoint."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(usage_recorder, "_store", UsageStore(str(tmp_path / "usage.db")))
+        monkeypatch.setattr(usage_recorder, "_pending", {})
+        monkeypatch.setattr(settings, "admin_api_key", "secret")
+        usage_recorder.record("llama2", stats(10, 5), tenant="ip:testclient", now=HOUR)
+        usage_recorder.record("llama2", stats(30, 3), tenant="key:other", now=HOUR)
+        return TestClient(app)
+
+    def test_callers_see_their_own_usage(self, client):
+        """Test that usage is scoped to the caller unless an admin key is sent."""
+        params = {"start": "2023-11-14T22:00:00Z", "end": "2023-11-15T00:00:00Z"}
+        response = client.get("/api/v1/usage", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert [b["tenant"] for b in data["buckets"]] == ["ip:testclient"]
+        assert data["totals"]["prompt_tokens"] == 10
+
+        assert client.get("/api/v1/usage", params={**params, "tenant": "key:other"}).status_code == 403
+
+        response = client.get("/api/v1/usage", params={**params, "granularity": "day"}, headers={"X-Admin-Key": "secret"})
+        assert response.json()["totals"]["prompt_tokens"] == 40
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.langchain_agent import agent_service
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Replace _stream_generate with one echoing the prompt's last line, token by token.
+
+    A message containing "slow" streams forever, so it can be cancelled.
+    """
+    closed = []
+
+    async def _stream_generate(prompt, **kwargs):
+        message = prompt.rsplit("Human: ", 1)[-1].split("\n", 1)[0]
+        try:
+            if "slow" in message:
+                while True:
+                    yield {"response": "tick ", "done": False}
+                    await asyncio.sleep(0.01)
+            for word in message.split():
+                yield {"response": word.upper() + " ", "done": False}
+            yield {"response": "", "done": True}
+        finally:
+            closed.append(message)
+
+    monkeypatch.setattr(agent_service, "_stream_generate", _stream_generate)
+    return closed
+
+
+def receive_until(ws, predicate):
+    events = []
+    while True:
+        event = ws.receive_json()
+        events.append(event)
+        if predicate(event):
+            return events
+
+
+class TestWebSocketChat:
+    """Test cases for the multiplexed WebSocket chat endpoint."""
+
+    def test_streams_are_multiplexed(self, client, upstream):
+        """Test that two streams on one connection each get their own tagged events."""
+        with client.websocket_connect("/api/v1/ws") as ws:
+            ws.send_json({"type": "chat", "id": "a", "message": "hello there", "conversation_id": "ws-a"})
+            ws.send_json({"type": "chat", "id": "b", "message": "good morning", "conversation_id": "ws-b"})
+            events = receive_until(ws, lambda e: e["type"] == "end")
+            events += receive_until(ws, lambda e: e["type"] == "end")
+
+        by_id = {stream_id: [e for e in events if e["id"] == stream_id] for stream_id in ("a", "b")}
+        assert by_id["a"][0]["type"] == "start" and by_id["a"][-1]["message"] == "HELLO THERE "
+        assert "".join(e["content"] for e in by_id["b"] if e["type"] == "token") == "GOOD MORNING "
+        assert [m.role for m in agent_service.memory_store["ws-a"].messages] == ["user", "assistant"]
+
+    def test_cancel_aborts_upstream(self, client, upstream):
+        """Test that a cancel frame closes the upstream generation and leaves history untouched."""
+        with client.websocket_connect("/api/v1/ws") as ws:
+            ws.send_json({"type": "chat", "id": "s", "message": "slow one", "conversation_id": "ws-cancel"})
+            receive_until(ws, lambda e: e["type"] == "token")
+            ws.send_json({"type": "cancel", "id": "s"})
+            events = receive_until(ws, lambda e: e["type"] in ("cancelled", "end"))
+
+            assert events[-1] == {"type": "cancelled", "id": "s"}
+            assert upstream == ["slow one"]
+            assert agent_service.memory_store["ws-cancel"].message_count == 0
+
+    def test_rejected_frames(self, client, upstream, monkeypatch):
+        """Test errors for invalid frames and for too many concurrent streams."""
+        monkeypatch.setattr(settings, "ws_max_streams", 1)
+        with client.websocket_connect("/api/v1/ws") as ws:
+            ws.send_text("not json")
+            assert ws.receive_json()["detail"] == "Frames must be JSON objects"
+
+            ws.send_json({"type": "chat", "id": "x"})
+            assert ws.receive_json()["status"] == 422
+
+            ws.send_json({"type": "chat", "id": "s1", "message": "slow"})
+            receive_until(ws, lambda e: e["type"] == "start")
+            ws.send_json({"type": "chat", "id": "s2", "message": "slow"})
+            error = receive_until(ws, lambda e: e["id"] == "s2")[-1]
+            assert error["status"] == 429
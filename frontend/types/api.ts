@@ -43,11 +43,21 @@ export interface AgentResponse {
 export interface AgentStep {
   step: number;
   action: string;
+  tool?: string;
   input?: string;
   output?: string;
   timestamp: string;
+  duration_ms?: number;
+  elapsed_ms?: number;
 }
 
+export type AgentStreamEvent =
+  | { type: 'start'; conversation_id: string; agent_type: string; tools: string[] }
+  | ({ type: 'step' | 'tool_call' | 'tool_result' } & AgentStep)
+  | { type: 'token'; iteration: number; content: string }
+  | { type: 'end'; result: string; agent_type: string; iterations: number; elapsed_ms: number; metadata: Record<string, any> }
+  | { type: 'error'; detail: string };
+
 export interface HealthResponse {
   status: string;
   timestamp: string;
@@ -67,10 +77,12 @@ export interface ConversationHistory {
   conversation_id: string;
   messages: ChatMessage[];
   message_count: number;
-  last_updated: string;
+  has_more: boolean;
+  last_updated: string | null;
 }
 
 export interface ChatMessage {
+  id?: number;
   role: 'user' | 'assistant' | 'system';
   content: string;
   timestamp: string;